@@ -331,6 +331,8 @@ CREATE TABLE IF NOT EXISTS ufmg.departament (
       PRIMARY KEY (dep_id)
 );
 
+ALTER TABLE ufmg.departament ALTER COLUMN img_data SET STORAGE EXTERNAL;
+
 CREATE TABLE IF NOT EXISTS ufmg.departament_technician (
       dep_id character varying(10),
       technician_id uuid,
@@ -370,6 +372,558 @@ CREATE TABLE IF NOT EXISTS ufmg.disciplines (
       FOREIGN KEY (dep_id) REFERENCES ufmg.departament (dep_id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+CREATE INDEX IF NOT EXISTS researcher_institution_id_idx
+      ON public.researcher (institution_id);
+CREATE INDEX IF NOT EXISTS graduate_program_institution_id_idx
+      ON public.graduate_program (institution_id);
+
+CREATE TABLE IF NOT EXISTS public.institution_stats (
+      institution_id uuid PRIMARY KEY,
+      count_r INT NOT NULL DEFAULT 0,
+      count_gp INT NOT NULL DEFAULT 0,
+      count_gpr INT NOT NULL DEFAULT 0,
+      count_gps INT NOT NULL DEFAULT 0,
+      count_d INT NOT NULL DEFAULT 0,
+      refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      sample TEXT[] NOT NULL DEFAULT '{}',
+      sample_refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      FOREIGN KEY (institution_id) REFERENCES institution (institution_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Pre-shuffled pool of lattes ids the institution cards draw from. Only
+-- rotate_researcher_sample rebuilds it; writes just mark it stale by moving
+-- sample_refreshed_at to -infinity.
+CREATE OR REPLACE FUNCTION public.researcher_sample(institution uuid)
+RETURNS TEXT[] AS $$
+      SELECT COALESCE(ARRAY_AGG(lattes_id), '{}')
+      FROM (
+            SELECT lattes_id
+            FROM public.researcher
+            WHERE institution_id = institution
+            ORDER BY random()
+            LIMIT 200
+      ) pool;
+$$ LANGUAGE sql VOLATILE;
+
+-- Recomputes the counters of the given institutions, or of all of them when
+-- ids is NULL. With counters, only those are recomputed; a full refresh also
+-- marks the samples stale. The stats rows are locked before counting, so a
+-- concurrent writer on the same institution is either seen or waited for.
+DROP FUNCTION IF EXISTS public.refresh_institution_stats(uuid[]);
+CREATE OR REPLACE FUNCTION public.refresh_institution_stats(
+      ids uuid[], counters TEXT[] DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+      refreshed INT;
+BEGIN
+      IF ids IS NULL THEN
+            SELECT ARRAY_AGG(institution_id) INTO ids FROM public.institution;
+      END IF;
+
+      INSERT INTO public.institution_stats (institution_id, sample_refreshed_at)
+      SELECT institution_id, '-infinity'
+      FROM public.institution
+      WHERE institution_id = ANY(ids)
+      ON CONFLICT (institution_id) DO NOTHING;
+
+      PERFORM 1
+      FROM public.institution_stats
+      WHERE institution_id = ANY(ids)
+      ORDER BY institution_id
+      FOR UPDATE;
+
+      UPDATE public.institution_stats s
+      SET count_r = CASE WHEN counters IS NULL OR 'count_r' = ANY(counters)
+            THEN (
+                  SELECT COUNT(DISTINCT r.researcher_id)
+                  FROM public.researcher r
+                  WHERE r.institution_id = s.institution_id)
+            ELSE s.count_r END,
+            count_gp = CASE WHEN counters IS NULL OR 'count_gp' = ANY(counters)
+            THEN (
+                  SELECT COUNT(*)
+                  FROM public.graduate_program gp
+                  WHERE gp.institution_id = s.institution_id)
+            ELSE s.count_gp END,
+            count_gpr = CASE WHEN counters IS NULL OR 'count_gpr' = ANY(counters)
+            THEN (
+                  SELECT COUNT(*)
+                  FROM public.graduate_program gp
+                        JOIN public.graduate_program_researcher gpr
+                              ON gpr.graduate_program_id = gp.graduate_program_id
+                  WHERE gp.institution_id = s.institution_id)
+            ELSE s.count_gpr END,
+            count_gps = CASE WHEN counters IS NULL OR 'count_gps' = ANY(counters)
+            THEN (
+                  SELECT COUNT(DISTINCT (gps.graduate_program_id, gps.researcher_id))
+                  FROM public.graduate_program gp
+                        JOIN public.graduate_program_student gps
+                              ON gps.graduate_program_id = gp.graduate_program_id
+                  WHERE gp.institution_id = s.institution_id)
+            ELSE s.count_gps END,
+            count_d = CASE WHEN counters IS NULL OR 'count_d' = ANY(counters)
+            THEN (
+                  SELECT COUNT(*)
+                  FROM ufmg.researcher ur
+                        JOIN public.researcher r
+                              ON r.researcher_id = ur.researcher_id
+                  WHERE r.institution_id = s.institution_id)
+            ELSE s.count_d END,
+            refreshed_at = CURRENT_TIMESTAMP,
+            sample_refreshed_at = CASE WHEN counters IS NULL
+                  THEN '-infinity' ELSE s.sample_refreshed_at END
+      WHERE s.institution_id = ANY(ids);
+
+      GET DIAGNOSTICS refreshed = ROW_COUNT;
+      RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Adds amounts to one counter of the given institutions. Institutions with
+-- no stats row yet are counted from scratch instead, as a delta needs a base.
+CREATE OR REPLACE FUNCTION public.add_institution_stats(
+      counter TEXT, ids uuid[], amounts INT[])
+RETURNS VOID AS $$
+DECLARE
+      missing uuid[];
+BEGIN
+      SELECT ARRAY_AGG(d.id) INTO missing
+      FROM UNNEST(ids) AS d (id)
+      WHERE NOT EXISTS (
+            SELECT 1
+            FROM public.institution_stats s
+            WHERE s.institution_id = d.id);
+
+      IF missing IS NOT NULL THEN
+            PERFORM public.refresh_institution_stats(missing);
+      END IF;
+
+      EXECUTE format(
+            'UPDATE public.institution_stats s '
+            'SET %1$I = s.%1$I + d.amount, refreshed_at = CURRENT_TIMESTAMP '
+            'FROM UNNEST($1, $2) AS d (institution_id, amount) '
+            'WHERE s.institution_id = d.institution_id '
+            'AND d.amount <> 0 '
+            'AND NOT d.institution_id = ANY($3)',
+            counter)
+      USING ids, amounts, COALESCE(missing, '{}');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement level triggers keeping institution_stats current from the
+-- transition tables. Every counter moves by +1/-1 deltas, and updates that
+-- leave the counted keys alone return at once.
+--
+-- Rows reached through a parent (program links, ufmg researchers) are added
+-- by their own table while the parent exists. Once a parent is deleted or
+-- its keys change, the rows it cascades to can no longer be traced back to
+-- an institution, so the parent's trigger counts just those counters again
+-- for the institutions involved, and the cascaded statements leave them be.
+CREATE OR REPLACE FUNCTION public.researcher_stats_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+      ids uuid[];
+      amounts INT[];
+      moved uuid[];
+BEGIN
+      IF TG_OP = 'INSERT' THEN
+            SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+            INTO ids, amounts
+            FROM (
+                  SELECT institution_id, COUNT(*)::INT AS amount
+                  FROM new_rows
+                  GROUP BY institution_id
+            ) d;
+            PERFORM public.add_institution_stats('count_r', ids, amounts);
+
+            -- Newcomers only need to reach samples that are not full yet.
+            UPDATE public.institution_stats
+            SET sample_refreshed_at = '-infinity'
+            WHERE institution_id = ANY(ids)
+                  AND cardinality(sample) < 200;
+            RETURN NULL;
+      END IF;
+
+      IF TG_OP = 'DELETE' THEN
+            SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+            INTO ids, amounts
+            FROM (
+                  SELECT institution_id, -COUNT(*)::INT AS amount
+                  FROM old_rows
+                  GROUP BY institution_id
+            ) d;
+            moved := ids;
+
+            -- Leavers only matter to samples they were drawn into.
+            UPDATE public.institution_stats s
+            SET sample_refreshed_at = '-infinity'
+            FROM old_rows o
+            WHERE o.institution_id = s.institution_id
+                  AND o.lattes_id = ANY(s.sample);
+      ELSE
+            IF NOT EXISTS (
+                  SELECT researcher_id, institution_id, lattes_id FROM new_rows
+                  EXCEPT ALL
+                  SELECT researcher_id, institution_id, lattes_id FROM old_rows
+            ) THEN
+                  RETURN NULL;
+            END IF;
+
+            SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+            INTO ids, amounts
+            FROM (
+                  SELECT institution_id, SUM(sign)::INT AS amount
+                  FROM (
+                        SELECT institution_id, 1 AS sign FROM new_rows
+                        UNION ALL
+                        SELECT institution_id, -1 FROM old_rows
+                  ) changed
+                  GROUP BY institution_id
+            ) d;
+
+            SELECT ARRAY_AGG(DISTINCT institution_id) INTO moved FROM (
+                  (SELECT researcher_id, institution_id FROM new_rows
+                  EXCEPT
+                  SELECT researcher_id, institution_id FROM old_rows)
+                  UNION ALL
+                  (SELECT researcher_id, institution_id FROM old_rows
+                  EXCEPT
+                  SELECT researcher_id, institution_id FROM new_rows)
+            ) changed;
+
+            UPDATE public.institution_stats s
+            SET sample_refreshed_at = '-infinity'
+            FROM (
+                  SELECT institution_id, lattes_id FROM old_rows
+                  EXCEPT
+                  SELECT institution_id, lattes_id FROM new_rows
+            ) o
+            WHERE o.institution_id = s.institution_id
+                  AND o.lattes_id = ANY(s.sample);
+
+            UPDATE public.institution_stats
+            SET sample_refreshed_at = '-infinity'
+            WHERE institution_id IN (SELECT institution_id FROM new_rows)
+                  AND cardinality(sample) < 200;
+      END IF;
+
+      PERFORM public.add_institution_stats('count_r', ids, amounts);
+      IF moved IS NOT NULL THEN
+            PERFORM public.refresh_institution_stats(moved, '{count_d}');
+      END IF;
+      RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.graduate_program_stats_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+      ids uuid[];
+      amounts INT[];
+      moved uuid[];
+BEGIN
+      IF TG_OP = 'INSERT' THEN
+            SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+            INTO ids, amounts
+            FROM (
+                  SELECT institution_id, COUNT(*)::INT AS amount
+                  FROM new_rows
+                  GROUP BY institution_id
+            ) d;
+            PERFORM public.add_institution_stats('count_gp', ids, amounts);
+            RETURN NULL;
+      END IF;
+
+      IF TG_OP = 'DELETE' THEN
+            SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+            INTO ids, amounts
+            FROM (
+                  SELECT institution_id, -COUNT(*)::INT AS amount
+                  FROM old_rows
+                  GROUP BY institution_id
+            ) d;
+            moved := ids;
+      ELSE
+            IF NOT EXISTS (
+                  SELECT graduate_program_id, institution_id FROM new_rows
+                  EXCEPT ALL
+                  SELECT graduate_program_id, institution_id FROM old_rows
+            ) THEN
+                  RETURN NULL;
+            END IF;
+
+            SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+            INTO ids, amounts
+            FROM (
+                  SELECT institution_id, SUM(sign)::INT AS amount
+                  FROM (
+                        SELECT institution_id, 1 AS sign FROM new_rows
+                        UNION ALL
+                        SELECT institution_id, -1 FROM old_rows
+                  ) changed
+                  GROUP BY institution_id
+            ) d;
+
+            SELECT ARRAY_AGG(DISTINCT institution_id) INTO moved FROM (
+                  (SELECT graduate_program_id, institution_id FROM new_rows
+                  EXCEPT
+                  SELECT graduate_program_id, institution_id FROM old_rows)
+                  UNION ALL
+                  (SELECT graduate_program_id, institution_id FROM old_rows
+                  EXCEPT
+                  SELECT graduate_program_id, institution_id FROM new_rows)
+            ) changed;
+      END IF;
+
+      PERFORM public.add_institution_stats('count_gp', ids, amounts);
+      IF moved IS NOT NULL THEN
+            PERFORM public.refresh_institution_stats(
+                  moved, '{count_gpr,count_gps}');
+      END IF;
+      RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rows linking to a program or a researcher, counted once each under the
+-- parent's institution. TG_ARGV[0] names the link column and TG_ARGV[1] the
+-- counter.
+CREATE OR REPLACE FUNCTION public.institution_link_stats_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+      keys uuid[];
+      signs INT[];
+      parents uuid[];
+      ids uuid[];
+      amounts INT[];
+BEGIN
+      IF TG_OP = 'INSERT' THEN
+            SELECT ARRAY_AGG((to_jsonb(n) ->> TG_ARGV[0])::uuid),
+                  ARRAY_AGG(1)
+            INTO keys, signs FROM new_rows n;
+      ELSIF TG_OP = 'DELETE' THEN
+            SELECT ARRAY_AGG((to_jsonb(o) ->> TG_ARGV[0])::uuid),
+                  ARRAY_AGG(-1)
+            INTO keys, signs FROM old_rows o;
+      ELSE
+            IF NOT EXISTS (
+                  SELECT to_jsonb(n) ->> TG_ARGV[0] FROM new_rows n
+                  EXCEPT ALL
+                  SELECT to_jsonb(o) ->> TG_ARGV[0] FROM old_rows o
+            ) THEN
+                  RETURN NULL;
+            END IF;
+            SELECT ARRAY_AGG(k), ARRAY_AGG(s) INTO keys, signs FROM (
+                  SELECT (to_jsonb(n) ->> TG_ARGV[0])::uuid AS k, 1 AS s
+                  FROM new_rows n
+                  UNION ALL
+                  SELECT (to_jsonb(o) ->> TG_ARGV[0])::uuid, -1
+                  FROM old_rows o
+            ) changed;
+      END IF;
+
+      IF TG_ARGV[0] = 'graduate_program_id' THEN
+            SELECT ARRAY_AGG(gp.institution_id ORDER BY c.n) INTO parents
+            FROM UNNEST(keys) WITH ORDINALITY AS c (key, n)
+                  LEFT JOIN public.graduate_program gp
+                        ON gp.graduate_program_id = c.key;
+      ELSE
+            SELECT ARRAY_AGG(r.institution_id ORDER BY c.n) INTO parents
+            FROM UNNEST(keys) WITH ORDINALITY AS c (key, n)
+                  LEFT JOIN public.researcher r
+                        ON r.researcher_id = c.key;
+      END IF;
+
+      -- An update whose old parent is gone was cascaded from a key change,
+      -- which the parent's trigger counts.
+      IF TG_OP = 'UPDATE'
+            AND EXISTS (SELECT 1 FROM UNNEST(parents) AS p WHERE p IS NULL)
+      THEN
+            RETURN NULL;
+      END IF;
+
+      SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+      INTO ids, amounts
+      FROM (
+            SELECT institution_id, SUM(sign)::INT AS amount
+            FROM UNNEST(parents, signs) AS c (institution_id, sign)
+            WHERE institution_id IS NOT NULL
+            GROUP BY institution_id
+      ) d;
+
+      IF ids IS NOT NULL THEN
+            PERFORM public.add_institution_stats(TG_ARGV[1], ids, amounts);
+      END IF;
+      RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Students are counted per distinct (program, researcher), so a pair only
+-- moves the counter when its first row arrives or its last one leaves.
+CREATE OR REPLACE FUNCTION public.graduate_program_student_stats_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+      programs uuid[];
+      researchers uuid[];
+      signs INT[];
+      ids uuid[];
+      amounts INT[];
+BEGIN
+      IF TG_OP = 'INSERT' THEN
+            SELECT ARRAY_AGG(graduate_program_id), ARRAY_AGG(researcher_id),
+                  ARRAY_AGG(1)
+            INTO programs, researchers, signs FROM new_rows;
+      ELSIF TG_OP = 'DELETE' THEN
+            SELECT ARRAY_AGG(graduate_program_id), ARRAY_AGG(researcher_id),
+                  ARRAY_AGG(-1)
+            INTO programs, researchers, signs FROM old_rows;
+      ELSE
+            IF NOT EXISTS (
+                  SELECT graduate_program_id, researcher_id FROM new_rows
+                  EXCEPT ALL
+                  SELECT graduate_program_id, researcher_id FROM old_rows
+            ) THEN
+                  RETURN NULL;
+            END IF;
+            IF EXISTS (
+                  SELECT 1
+                  FROM old_rows o
+                  WHERE NOT EXISTS (
+                        SELECT 1
+                        FROM public.graduate_program gp
+                        WHERE gp.graduate_program_id = o.graduate_program_id)
+            ) THEN
+                  RETURN NULL;
+            END IF;
+            SELECT ARRAY_AGG(p), ARRAY_AGG(r), ARRAY_AGG(s)
+            INTO programs, researchers, signs FROM (
+                  SELECT graduate_program_id AS p, researcher_id AS r, 1 AS s
+                  FROM new_rows
+                  UNION ALL
+                  SELECT graduate_program_id, researcher_id, -1
+                  FROM old_rows
+            ) changed;
+      END IF;
+
+      SELECT ARRAY_AGG(institution_id), ARRAY_AGG(amount)
+      INTO ids, amounts
+      FROM (
+            SELECT gp.institution_id,
+                  SUM((n.now > 0)::INT - (n.now - c.delta > 0)::INT)::INT
+                        AS amount
+            FROM (
+                  SELECT program, researcher, SUM(sign) AS delta
+                  FROM UNNEST(programs, researchers, signs)
+                        AS u (program, researcher, sign)
+                  GROUP BY program, researcher
+            ) c
+                  JOIN public.graduate_program gp
+                        ON gp.graduate_program_id = c.program
+                  CROSS JOIN LATERAL (
+                        SELECT COUNT(*) AS now
+                        FROM public.graduate_program_student gps
+                        WHERE gps.graduate_program_id = c.program
+                              AND gps.researcher_id = c.researcher
+                  ) n
+            GROUP BY gp.institution_id
+      ) d;
+
+      IF ids IS NOT NULL THEN
+            PERFORM public.add_institution_stats('count_gps', ids, amounts);
+      END IF;
+      RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+      source RECORD;
+BEGIN
+      FOR source IN SELECT * FROM (VALUES
+            ('public.researcher', 'researcher', 'researcher_stats_sync()'),
+            ('public.graduate_program', 'graduate_program', 'graduate_program_stats_sync()'),
+            ('public.graduate_program_researcher', 'graduate_program_researcher', 'institution_link_stats_sync(''graduate_program_id'', ''count_gpr'')'),
+            ('public.graduate_program_student', 'graduate_program_student', 'graduate_program_student_stats_sync()'),
+            ('ufmg.researcher', 'ufmg_researcher', 'institution_link_stats_sync(''researcher_id'', ''count_d'')')
+      ) AS t (relation, name, function)
+      LOOP
+            EXECUTE format(
+                  'CREATE OR REPLACE TRIGGER %I AFTER INSERT ON %s '
+                  'REFERENCING NEW TABLE AS new_rows '
+                  'FOR EACH STATEMENT '
+                  'EXECUTE FUNCTION public.%s',
+                  source.name || '_stats_insert', source.relation, source.function);
+            EXECUTE format(
+                  'CREATE OR REPLACE TRIGGER %I AFTER UPDATE ON %s '
+                  'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                  'FOR EACH STATEMENT '
+                  'EXECUTE FUNCTION public.%s',
+                  source.name || '_stats_update', source.relation, source.function);
+            EXECUTE format(
+                  'CREATE OR REPLACE TRIGGER %I AFTER DELETE ON %s '
+                  'REFERENCING OLD TABLE AS old_rows '
+                  'FOR EACH STATEMENT '
+                  'EXECUTE FUNCTION public.%s',
+                  source.name || '_stats_delete', source.relation, source.function);
+      END LOOP;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS public.institution_stats_sync();
+
+SELECT public.refresh_institution_stats(NULL);
+
+-- unaccent() is only STABLE because its dictionary can change, so it cannot
+-- back an index directly. Pinning the dictionary makes it safe to index.
+CREATE OR REPLACE FUNCTION public.immutable_unaccent(text)
+RETURNS TEXT AS $$
+      SELECT public.unaccent('public.unaccent'::regdictionary, $1);
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE INDEX IF NOT EXISTS researcher_name_trgm_idx
+      ON public.researcher
+      USING gin (public.immutable_unaccent(lower(name)) gin_trgm_ops);
+
+CREATE TABLE IF NOT EXISTS public.media (
+      entity_type VARCHAR(32) NOT NULL,
+      entity_id VARCHAR(64) NOT NULL,
+      kind VARCHAR(16) NOT NULL,
+      variant VARCHAR(16) NOT NULL DEFAULT 'original',
+      path TEXT NOT NULL,
+      content_type VARCHAR(100),
+      size BIGINT NOT NULL,
+      hash CHAR(64) NOT NULL,
+      blob CHAR(64),
+      mtime TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (entity_type, entity_id, kind, variant)
+);
+CREATE INDEX IF NOT EXISTS media_blob_idx ON public.media (blob);
+
+CREATE TABLE IF NOT EXISTS public.media_blob (
+      hash CHAR(64) PRIMARY KEY,
+      refcount INT NOT NULL,
+      created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS public.keys (
+      key_id uuid NOT NULL DEFAULT uuid_generate_v4(),
+      user_id uuid NOT NULL,
+      name VARCHAR(255) NOT NULL,
+      key TEXT,
+      prefix VARCHAR(16),
+      key_hash CHAR(64),
+      last_used TIMESTAMP,
+      request_count BIGINT NOT NULL DEFAULT 0,
+      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      deleted_at TIMESTAMP,
+      PRIMARY KEY (key_id),
+      FOREIGN KEY (user_id) REFERENCES public.users (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+ALTER TABLE public.keys ADD COLUMN IF NOT EXISTS prefix VARCHAR(16);
+ALTER TABLE public.keys ADD COLUMN IF NOT EXISTS key_hash CHAR(64);
+ALTER TABLE public.keys ADD COLUMN IF NOT EXISTS request_count BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE public.keys ALTER COLUMN key DROP NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS keys_prefix_idx ON public.keys (prefix);
+
 COMMIT;
 
 ROLLBACK;
\ No newline at end of file
@@ -1,15 +1,17 @@
-import os
-from contextlib import asynccontextmanager
-from http import HTTPStatus
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-import httpx
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from simcc.config import Settings
-from simcc.core.database import conn
+from simcc.core import api_keys, metrics, oauth, proxy
+from simcc.core.database import cache_conn, conn
+from simcc.core.storage import storage
+from simcc.core.uploads import UploadLimitMiddleware
+from simcc.core.workers import hash_pool, image_pool
 from simcc.routers import auth, keys, rbac, researcher
+from simcc.routers import metrics as metrics_router
 from simcc.routers.departament import uploads as d_uploads
 from simcc.routers.features import chat, notification, star
 from simcc.routers.features.collection import collection
@@ -26,7 +28,28 @@ from simcc.routers.users import user
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await conn.connect()
+    app.state.proxy_client = proxy.create_proxy_client(Settings())
+    interval = Settings().METRICS_FLUSH_INTERVAL
+    flush = asyncio.create_task(
+        metrics.flush_periodically(cache_conn.client, interval)
+    )
+    key_usage_flush = asyncio.create_task(
+        api_keys.flush_periodically(
+            conn, Settings().API_KEY_USAGE_FLUSH_INTERVAL
+        )
+    )
     yield
+    for task in (flush, key_usage_flush):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await metrics.registry.flush(cache_conn.client, ttl=int(interval * 3))
+    await api_keys.key_usage.flush(conn)
+    await app.state.proxy_client.aclose()
+    image_pool.close()
+    hash_pool.close()
+    await storage.close()
+    await oauth.close()
     await conn.disconnect()
 
 
@@ -36,14 +59,7 @@ app = FastAPI(
     docs_url='/swagger',
 )
 
-UPLOAD_DIR = 'simcc/storage/upload'
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-app.mount(
-    '/upload',
-    StaticFiles(directory='simcc/storage/upload'),
-    name='upload',
-)
+app.mount('/upload', storage.static_app(), name='upload')
 
 app.include_router(auth.router, tags=['Authentication'])
 app.include_router(user.router, tags=['User Management'])
@@ -65,6 +81,7 @@ app.include_router(star.router, tags=['Star'])
 app.include_router(rbac.router, tags=['Roles & Permissions'])
 app.include_router(notification.router, tags=['Notification'])
 app.include_router(chat.router, tags=['Chat'])
+app.include_router(metrics_router.router)
 
 
 app.add_middleware(
@@ -75,44 +92,9 @@ app.add_middleware(
     allow_credentials=True,
 )
 
-
-@app.middleware('http')
-async def reverse_proxy(request: Request, call_next):
-    response = await call_next(request)
-
-    if response.status_code == HTTPStatus.NOT_FOUND:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                k: v
-                for k, v in request.headers.items()
-                if k.lower() not in {'host', 'content-length'}
-            }
-            proxy_response = await client.request(
-                method=request.method,
-                url=f'{Settings().PROXY_URL}{request.url.path}',
-                params=dict(request.query_params),
-                headers=headers,
-                content=await request.body(),
-                timeout=None,
-            )
-            excluded_headers = [
-                'content-encoding',
-                'transfer-encoding',
-                'connection',
-            ]
-            response_headers = {
-                k: v
-                for k, v in proxy_response.headers.items()
-                if k.lower() not in excluded_headers
-            }
-
-            return Response(
-                content=proxy_response.content,
-                status_code=proxy_response.status_code,
-                headers=response_headers,
-            )
-
-    return response
+app.add_middleware(UploadLimitMiddleware, max_size=Settings().MEDIA_MAX_SIZE)
+app.add_middleware(proxy.LegacyProxyMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.get('/')
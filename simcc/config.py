@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import HttpUrl
 from pydantic_settings import BaseSettings
@@ -16,6 +16,12 @@ class Settings(BaseSettings):
     GOOGLE_REDIRECT_URI: Optional[str] = None
 
     PROXY_URL: HttpUrl = 'http://localhost:9999'
+    PROXY_MAX_CONNECTIONS: int = 100
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    PROXY_KEEPALIVE_EXPIRY: float = 30
+    PROXY_CONNECT_TIMEOUT: float = 5
+    PROXY_READ_TIMEOUT: float = 60
+    PROXY_HTTP2: bool = False
     URL: HttpUrl = 'http://localhost:8080'
     CACHE_URL: str = 'redis://localhost:6379/0'
 
@@ -23,6 +29,55 @@ class Settings(BaseSettings):
 
     SECRET_KEY: str = 'your-secret-key'
 
+    PRINCIPAL_CACHE_TTL: int = 300
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 5
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    AUTH_EMBEDDED_CLAIMS: bool = False
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 64 * 1024
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    API_KEY_SECRET: Optional[str] = None
+    API_KEY_CACHE_TTL: int = 60
+    API_KEY_CACHE_NEGATIVE_TTL: int = 10
+    API_KEY_CACHE_LOCAL_TTL: int = 5
+    API_KEY_CACHE_SIZE: int = 1024
+    API_KEY_USAGE_FLUSH_INTERVAL: float = 10
+
+    METRICS_FLUSH_INTERVAL: float = 5
+
+    RESEARCHER_SAMPLE_SIZE: int = 20
+    RESEARCHER_SAMPLE_TTL: int = 900
+    RESEARCHER_SAMPLE_SEED: Optional[int] = None
+
+    MEDIA_ROOT: str = 'simcc/storage/upload'
+    MEDIA_MAX_SIZE: int = 5 * 1024 * 1024
+    MEDIA_VARIANT_WORKERS: int = 2
+    MEDIA_URL: str = str()
+    MEDIA_CACHE_TTL: int = 300
+    MEDIA_CACHE_LOCAL_TTL: int = 5
+    MEDIA_CACHE_SIZE: int = 4096
+    MEDIA_BATCH_SIZE: int = 100
+    MEDIA_STORAGE: Literal['local', 's3'] = 'local'
+    MEDIA_OFFLOAD: Optional[Literal['x-accel-redirect', 'x-sendfile']] = None
+    MEDIA_ACCEL_PREFIX: str = '/protected-upload'
+    MEDIA_S3_ENDPOINT: str = 'http://localhost:9000'
+    MEDIA_S3_PUBLIC_ENDPOINT: Optional[str] = None
+    MEDIA_S3_BUCKET: str = 'simcc'
+    MEDIA_S3_REGION: str = 'us-east-1'
+    MEDIA_S3_ACCESS_KEY: str = str()
+    MEDIA_S3_SECRET_KEY: str = str()
+    MEDIA_S3_PART_SIZE: int = 8 * 1024 * 1024
+    MEDIA_S3_PRESIGN_TTL: int = 3600
+    MEDIA_INLINE_MAX_SIZE: int = 16 * 1024
+    MEDIA_INLINE_CONCURRENCY: int = 8
+
+    ENTITY_CACHE_TTL: int = 60
+    ENTITY_CACHE_NEGATIVE_TTL: int = 10
+    ENTITY_CACHE_LOCAL_TTL: int = 2
+    ENTITY_CACHE_SIZE: int = 8192
+
     class Config:
         env_file = '.env'
         env_file_encoding = 'utf-8'
@@ -0,0 +1,135 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+
+logger = logging.getLogger(__name__)
+
+
+class LayeredCache:
+    """In-process LRU with a short TTL in front of a shared Redis namespace.
+
+    Values must be JSON serializable. Redis failures are logged and treated
+    as cache misses so callers always fall back to the source of truth.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        namespace: str,
+        ttl: int,
+        local_ttl: float,
+        max_size: int,
+    ):
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_size = max_size
+        self._local: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    def _key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    def _generation_key(self, key: str) -> str:
+        return f'{self.namespace}:generation:{key}'
+
+    def _remember(self, key: str, value):
+        self._local[key] = (time.monotonic() + self.local_ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str):
+        entry = self._local.get(key)
+        if entry:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                return value
+            del self._local[key]
+
+        try:
+            raw = await self.redis.get(self._key(key))
+        except (RedisError, OSError) as e:
+            logger.warning('Cache read failed for %s: %s', key, e)
+            return None
+
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self._remember(key, value)
+        return value
+
+    async def set(self, key: str, value, ttl: int | None = None):
+        self._remember(key, value)
+        try:
+            await self.redis.set(
+                self._key(key), json.dumps(value), ex=ttl or self.ttl
+            )
+        except (RedisError, OSError) as e:
+            logger.warning('Cache write failed for %s: %s', key, e)
+
+    async def delete(self, *keys: str):
+        if not keys:
+            return
+        for key in keys:
+            self._local.pop(key, None)
+        try:
+            await self.redis.delete(*[self._key(k) for k in keys])
+        except (RedisError, OSError) as e:
+            logger.warning('Cache invalidation failed for %s: %s', keys, e)
+
+    async def generation(self, key: str) -> int | None:
+        """How many times key was invalidated, None when Redis is down.
+
+        Read it before loading a value, and store the value with
+        set_if_current, so a load racing an invalidation is not cached.
+        """
+        try:
+            return int(await self.redis.get(self._generation_key(key)) or 0)
+        except (RedisError, OSError) as e:
+            logger.warning('Cache read failed for %s: %s', key, e)
+            return None
+
+    async def set_if_current(self, key: str, value, generation: int | None):
+        """Like set, unless key was invalidated after generation was read."""
+        if generation is None:
+            return
+        generation_key = self._generation_key(key)
+        try:
+            async with self.redis.pipeline() as pipe:
+                await pipe.watch(generation_key)
+                if int(await pipe.get(generation_key) or 0) != generation:
+                    return
+                pipe.multi()
+                pipe.set(self._key(key), json.dumps(value), ex=self.ttl)
+                await pipe.execute()
+        except WatchError:
+            return
+        except (RedisError, OSError) as e:
+            logger.warning('Cache write failed for %s: %s', key, e)
+            return
+        self._remember(key, value)
+
+    async def invalidate(self, *keys: str):
+        """Delete keys and fail the set_if_current calls still pending."""
+        if not keys:
+            return
+        for key in keys:
+            self._local.pop(key, None)
+        try:
+            async with self.redis.pipeline() as pipe:
+                for key in keys:
+                    pipe.incr(self._generation_key(key))
+                    pipe.expire(self._generation_key(key), self.ttl)
+                pipe.delete(*[self._key(k) for k in keys])
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            logger.warning('Cache invalidation failed for %s: %s', keys, e)
+
+    def clear_local(self):
+        self._local.clear()
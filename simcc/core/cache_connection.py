@@ -10,5 +10,10 @@ class CacheConnection:
     async def connect(self):
         pass
 
+    def stats(self) -> dict:
+        in_use = len(self.pool._in_use_connections)
+        idle = len(self.pool._available_connections)
+        return {'size': in_use + idle, 'in_use': in_use}
+
     async def disconnect(self):
         await self.client.close()
@@ -1,3 +1,8 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable
+from uuid import uuid4
+
+from psycopg import AsyncConnection
 from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
 
@@ -17,6 +22,21 @@ class Connection:
     async def disconnect(self):
         await self.pool.close()
 
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator['UnitOfWork']:
+        """Pin one pooled connection until the block exits."""
+        async with self.pool.connection() as conn:
+            await conn.set_autocommit(True)
+            try:
+                yield UnitOfWork(conn)
+            finally:
+                await conn.set_autocommit(False)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator['UnitOfWork']:
+        async with self.unit_of_work() as uow, uow.transaction():
+            yield uow
+
     async def exec(self, query: str, params: dict | None = None) -> int:
         try:
             async with self.pool.connection() as conn:
@@ -53,3 +73,104 @@ class Connection:
             raise RuntimeError(
                 f'Error executing query: {query}\n{params}\n{e}'
             )
+
+    async def stream(
+        self, query: str, params: dict | None = None, fetch_size: int = 1000
+    ) -> AsyncIterator[dict]:
+        """Yield rows from a named server-side cursor, fetch_size at a time.
+
+        The pooled connection stays checked out until the generator is
+        exhausted or closed, so consume it promptly, and wrap it in
+        contextlib.aclosing where the consumer may stop early.
+        """
+        try:
+            async with self.pool.connection() as conn:
+                name = f'stream_{uuid4().hex}'
+                async with conn.cursor(name=name) as cur:
+                    await cur.execute(query, params)
+                    while rows := await cur.fetchmany(fetch_size):
+                        for row in rows:
+                            yield row
+        except Exception as e:
+            raise RuntimeError(
+                f'Error executing query: {query}\n{params}\n{e}'
+            )
+
+    async def copy_merge(
+        self,
+        staging: str,
+        copy: str,
+        rows: Iterable[tuple],
+        merge: str,
+        types: list[str] | None = None,
+    ) -> list[dict]:
+        """Bulk load rows with COPY into a staging table, then merge them.
+
+        The staging statement, the COPY and the merge run in one transaction
+        on the same connection, so temporary tables created with
+        ON COMMIT DROP are visible to the merge and cleaned up afterwards.
+        """
+        try:
+            async with self.pool.connection() as conn, conn.transaction():
+                async with conn.cursor() as cur:
+                    await cur.execute(staging)
+                    async with cur.copy(copy) as buffer:
+                        if types:
+                            buffer.set_types(types)
+                        for row in rows:
+                            await buffer.write_row(row)
+                    await cur.execute(merge)
+                    return await cur.fetchall()
+        except Exception as e:
+            raise RuntimeError(f'Error executing copy: {copy}\n{merge}\n{e}')
+
+
+class UnitOfWork:
+    """Run several statements on a single pinned connection.
+
+    Statements commit as they run, like on Connection, unless they are
+    issued inside transaction(), which commits when the block exits and
+    rolls back if it raises. Nested transaction() blocks use savepoints.
+    """
+
+    def __init__(self, conn: AsyncConnection):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator['UnitOfWork']:
+        async with self.conn.transaction():
+            yield self
+
+    async def exec(self, query: str, params: dict | None = None) -> int:
+        try:
+            async with self.conn.cursor() as cur:
+                await cur.execute(query, params)
+                return cur.rowcount
+        except Exception as e:
+            raise RuntimeError(
+                f'Error executing query: {query}\n{params}\n{e}'
+            )
+
+    async def executemany(self, query: str, params: dict | None = None) -> int:
+        try:
+            async with self.conn.cursor() as cur:
+                await cur.executemany(query, params)
+                return cur.rowcount
+        except Exception as e:
+            raise RuntimeError(
+                f'Error executing query: {query}\n{params}\n{e}'
+            )
+
+    async def select(
+        self, query: str, params: dict | None = None, one: bool = False
+    ):
+        try:
+            async with self.conn.cursor() as cur:
+                await cur.execute(query, params)
+                if one:
+                    return await cur.fetchone()
+                return await cur.fetchall()
+        except Exception as e:
+            raise RuntimeError(
+                f'Error executing query: {query}\n{params}\n{e}'
+            )
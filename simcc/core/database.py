@@ -1,6 +1,12 @@
+from typing import AsyncIterator
+
+from fastapi import Depends
+
 from simcc.config import Settings
+from simcc.core.cache import LayeredCache
 from simcc.core.cache_connection import CacheConnection
-from simcc.core.connection import Connection
+from simcc.core.connection import Connection, UnitOfWork
+from simcc.core.metrics import Registry, registry
 
 conn = Connection(
     Settings().DATABASE_URL,
@@ -12,6 +18,56 @@ cache_conn = CacheConnection(
     url=Settings().CACHE_URL,
 )
 
+principal_cache = LayeredCache(
+    cache_conn.client,
+    namespace='principal',
+    ttl=Settings().PRINCIPAL_CACHE_TTL,
+    local_ttl=Settings().PRINCIPAL_CACHE_LOCAL_TTL,
+    max_size=Settings().PRINCIPAL_CACHE_SIZE,
+)
+
+media_cache = LayeredCache(
+    cache_conn.client,
+    namespace='media',
+    ttl=Settings().MEDIA_CACHE_TTL,
+    local_ttl=Settings().MEDIA_CACHE_LOCAL_TTL,
+    max_size=Settings().MEDIA_CACHE_SIZE,
+)
+
+entity_cache = LayeredCache(
+    cache_conn.client,
+    namespace='entity',
+    ttl=Settings().ENTITY_CACHE_TTL,
+    local_ttl=Settings().ENTITY_CACHE_LOCAL_TTL,
+    max_size=Settings().ENTITY_CACHE_SIZE,
+)
+
+
+key_cache = LayeredCache(
+    cache_conn.client,
+    namespace='api_key',
+    ttl=Settings().API_KEY_CACHE_TTL,
+    local_ttl=Settings().API_KEY_CACHE_LOCAL_TTL,
+    max_size=Settings().API_KEY_CACHE_SIZE,
+)
+
+
+@registry.collector
+def pool_metrics(registry: Registry):
+    stats = conn.pool.pop_stats()
+    registry.gauge_set('db_pool_size', stats.get('pool_size', 0))
+    registry.gauge_set('db_pool_idle', stats.get('pool_available', 0))
+    registry.gauge_set('db_pool_waiting', stats.get('requests_waiting', 0))
+    registry.inc('db_pool_requests_total', stats.get('requests_num', 0))
+    registry.inc(
+        'db_pool_acquire_seconds_total',
+        stats.get('requests_wait_ms', 0) / 1000,
+    )
+
+    cache_stats = cache_conn.stats()
+    registry.gauge_set('redis_pool_size', cache_stats['size'])
+    registry.gauge_set('redis_pool_in_use', cache_stats['in_use'])
+
 
 async def get_cache_conn():
     return cache_conn.client
@@ -19,3 +75,10 @@ async def get_cache_conn():
 
 async def get_conn():
     yield conn
+
+
+async def get_uow(
+    conn: Connection = Depends(get_conn),
+) -> AsyncIterator[UnitOfWork]:
+    async with conn.unit_of_work() as uow:
+        yield uow
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+from simcc.schemas.media_model import VariantSize
+
+VARIANT_SIZES = tuple(VariantSize)
+WEBP_QUALITY = 80
+
+
+def _encode(image: Image.Image, image_format: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(source: str, directory: str) -> list[dict]:
+    """Resize an image to every VARIANT_SIZES box, as WebP and a fallback.
+
+    The fallback is PNG when the image has transparency and JPEG otherwise.
+    Runs in a worker process: each variant is written to a temporary file in
+    directory and described by a dict, so the caller only has to move it.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    alpha = image.mode in {'RGBA', 'LA', 'PA'} or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    image = image.convert('RGBA' if alpha else 'RGB')
+
+    encoded = []
+    for size in map(int, VARIANT_SIZES):
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if alpha:
+            fallback = ('image/png', '.png', _encode(variant, 'PNG'))
+        else:
+            fallback = (
+                'image/jpeg',
+                '.jpg',
+                _encode(variant, 'JPEG', quality=85, optimize=True),
+            )
+        webp = (
+            'image/webp',
+            '.webp',
+            _encode(variant, 'WEBP', quality=WEBP_QUALITY, method=4),
+        )
+        encoded.append((str(size), *fallback))
+        encoded.append((f'{size}.webp', *webp))
+
+    rendered = []
+    try:
+        for name, content_type, extension, data in encoded:
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            rendered.append({
+                'variant': name,
+                'tmp_path': tmp_path,
+                'content_type': content_type,
+                'extension': extension,
+                'size': len(data),
+                'hash': hashlib.sha256(data).hexdigest(),
+            })
+    except OSError:
+        for item in rendered:
+            os.remove(item['tmp_path'])
+        raise
+    return rendered
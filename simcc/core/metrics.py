@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import defaultdict
+from typing import Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_KEY = 'metrics:counters'
+GAUGES_KEY = 'metrics:gauges'
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)  # fmt: skip
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _series(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    pairs = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f'{name}{{{pairs}}}'
+
+
+def _sort_key(series: str):
+    prefix, _, bound = series.partition('le="')
+    return prefix, float(bound.rstrip('"}')) if bound else 0
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Registry:
+    """Process local metrics, merged across workers through Redis.
+
+    Counter and histogram increments are buffered and added to one shared
+    hash on flush, so they stay monotonic when workers come and go. Gauges
+    are a per-worker snapshot that expires with the worker and are summed
+    when rendered.
+    """
+
+    def __init__(self):
+        self.families: dict[str, tuple[str, str]] = {}
+        self.pending: dict[str, float] = defaultdict(float)
+        self.gauges: dict[str, float] = defaultdict(float)
+        self.collectors: list[Callable[['Registry'], None]] = []
+
+    def register(self, name: str, kind: str, documentation: str):
+        self.families[name] = (kind, documentation)
+
+    def collector(self, func: Callable[['Registry'], None]):
+        self.collectors.append(func)
+        return func
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        self.pending[_series(name, labels)] += amount
+
+    def observe(self, name: str, value: float, **labels):
+        for bound in LATENCY_BUCKETS:
+            if value <= bound:
+                self.inc(f'{name}_bucket', **labels, le=bound)
+        self.inc(f'{name}_bucket', **labels, le='+Inf')
+        self.inc(f'{name}_sum', value, **labels)
+        self.inc(f'{name}_count', **labels)
+
+    def gauge_add(self, name: str, amount: float = 1, **labels):
+        self.gauges[_series(name, labels)] += amount
+
+    def gauge_set(self, name: str, value: float, **labels):
+        self.gauges[_series(name, labels)] = value
+
+    def collect(self):
+        for func in self.collectors:
+            try:
+                func(self)
+            except Exception as e:  # noqa: BLE001
+                logger.warning('Metrics collector %s failed: %s', func, e)
+
+    async def flush(self, redis: Redis, ttl: int):
+        self.collect()
+        pending, self.pending = self.pending, defaultdict(float)
+        gauges = dict(self.gauges)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for series, amount in pending.items():
+                    pipe.hincrbyfloat(COUNTERS_KEY, series, amount)
+                worker_key = f'{GAUGES_KEY}:{WORKER_ID}'
+                pipe.delete(worker_key)
+                if gauges:
+                    pipe.hset(worker_key, mapping=gauges)
+                pipe.expire(worker_key, ttl)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            logger.warning('Metrics flush failed: %s', e)
+            for series, amount in pending.items():
+                self.pending[series] += amount
+
+    async def snapshot(self, redis: Redis) -> dict[str, float]:
+        values: dict[str, float] = defaultdict(float)
+        try:
+            for series, value in (await redis.hgetall(COUNTERS_KEY)).items():
+                values[_decode(series)] += float(value)
+            async for key in redis.scan_iter(match=f'{GAUGES_KEY}:*'):
+                for series, value in (await redis.hgetall(key)).items():
+                    values[_decode(series)] += float(value)
+        except (RedisError, OSError) as e:
+            logger.warning('Metrics read failed, serving this worker: %s', e)
+            self.collect()
+            values = defaultdict(float, self.gauges)
+            for series, amount in self.pending.items():
+                values[series] += amount
+        return values
+
+    def family(self, series: str) -> str:
+        name = series.split('{', 1)[0]
+        for suffix in ('_bucket', '_sum', '_count'):
+            base = name.removesuffix(suffix)
+            if base != name and base in self.families:
+                return base
+        return name
+
+    def render(self, values: dict[str, float]) -> str:
+        grouped: dict[str, list[str]] = defaultdict(list)
+        for series in sorted(values, key=_sort_key):
+            grouped[self.family(series)].append(
+                f'{series} {_format(values[series])}'
+            )
+
+        lines = []
+        for family, series in grouped.items():
+            if family in self.families:
+                kind, documentation = self.families[family]
+                lines.append(f'# HELP {family} {documentation}')
+                lines.append(f'# TYPE {family} {kind}')
+            lines.extend(series)
+        return '\n'.join(lines) + '\n'
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+registry = Registry()
+
+registry.register(
+    'http_requests_total', 'counter', 'HTTP requests by route and status.'
+)
+registry.register(
+    'http_request_duration_seconds',
+    'histogram',
+    'HTTP request latency by route.',
+)
+registry.register(
+    'http_requests_in_flight', 'gauge', 'HTTP requests being served.'
+)
+registry.register(
+    'proxy_requests_total',
+    'counter',
+    'Requests forwarded to the legacy backend by status.',
+)
+registry.register(
+    'proxy_upstream_duration_seconds',
+    'histogram',
+    'Time until the legacy backend sent response headers.',
+)
+registry.register('websocket_connections', 'gauge', 'Open websockets.')
+registry.register('db_pool_size', 'gauge', 'Open database connections.')
+registry.register(
+    'db_pool_idle', 'gauge', 'Database connections ready to be used.'
+)
+registry.register(
+    'db_pool_waiting', 'gauge', 'Requests waiting for a connection.'
+)
+registry.register(
+    'db_pool_requests_total', 'counter', 'Connections requested.'
+)
+registry.register(
+    'db_pool_acquire_seconds_total',
+    'counter',
+    'Time spent waiting to acquire a connection.',
+)
+registry.register(
+    'password_hash_duration_seconds',
+    'histogram',
+    'Time to hash or verify a password, queueing included.',
+)
+registry.register(
+    'password_hash_rejected_total',
+    'counter',
+    'Password operations refused because the hashing pool was full.',
+)
+registry.register(
+    'password_hash_pending', 'gauge', 'Password operations queued or running.'
+)
+registry.register('redis_pool_size', 'gauge', 'Open Redis connections.')
+registry.register(
+    'redis_pool_in_use', 'gauge', 'Redis connections checked out.'
+)
+
+
+class MetricsMiddleware:
+    """Count and time every HTTP request by its route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        registry.gauge_add('http_requests_in_flight')
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.gauge_add('http_requests_in_flight', -1)
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            method = scope['method']
+            registry.inc(
+                'http_requests_total', method=method, route=path, status=status
+            )
+            registry.observe(
+                'http_request_duration_seconds',
+                time.perf_counter() - start,
+                method=method,
+                route=path,
+            )
+
+
+async def flush_periodically(redis: Redis, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await registry.flush(redis, ttl=int(interval * 3))
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import re
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 3600
+MIN_MAX_AGE = 60
+KID_MISS_INTERVAL = 30
+
+client = httpx.AsyncClient(timeout=httpx.Timeout(10, connect=5))
+
+
+def max_age(cache_control: str | None) -> int:
+    """Seconds a response may be reused for, by its Cache-Control."""
+    directives = (cache_control or '').lower()
+    if 'no-cache' in directives or 'no-store' in directives:
+        return MIN_MAX_AGE
+    match = re.search(r'max-age=(\d+)', directives)
+    return max(int(match.group(1)), MIN_MAX_AGE) if match else DEFAULT_MAX_AGE
+
+
+class KeyCache:
+    """Signing keys of an identity provider, from its JWKS endpoint.
+
+    Keys are kept for as long as the endpoint's Cache-Control allows and
+    refreshed in the background during the last tenth of that time, so
+    logins do not wait on the provider. An unknown kid fetches the keys
+    again, at most once every KID_MISS_INTERVAL seconds, to pick up a
+    rotation early. When a fetch fails the keys already known are kept.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.keys: dict[str, dict] = {}
+        self.fetched_at = float('-inf')
+        self.expires_at = float('-inf')
+        self.lock = asyncio.Lock()
+        self.refreshing: asyncio.Task | None = None
+
+    async def get(self, kid: str | None) -> dict | None:
+        now = time.monotonic()
+        margin = (self.expires_at - self.fetched_at) / 10
+        if now >= self.expires_at:
+            await self.refresh()
+        elif now >= self.expires_at - margin:
+            self._refresh_in_background()
+
+        key = self.keys.get(kid)
+        since_fetch = time.monotonic() - self.fetched_at
+        if key is None and since_fetch >= KID_MISS_INTERVAL:
+            await self.refresh()
+            key = self.keys.get(kid)
+        return key
+
+    async def refresh(self):
+        requested_at = time.monotonic()
+        async with self.lock:
+            if self.fetched_at >= requested_at:
+                return
+            try:
+                response = await client.get(self.url)
+                response.raise_for_status()
+                keys = {key['kid']: key for key in response.json()['keys']}
+            except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+                logger.warning('Chaves de %s indisponíveis: %s', self.url, e)
+                self.fetched_at = time.monotonic()
+                self.expires_at = self.fetched_at + MIN_MAX_AGE
+                return
+            self.keys = keys
+            self.fetched_at = time.monotonic()
+            self.expires_at = self.fetched_at + max_age(
+                response.headers.get('cache-control')
+            )
+
+    def _refresh_in_background(self):
+        if self.refreshing is None or self.refreshing.done():
+            self.refreshing = asyncio.create_task(self.refresh())
+
+
+async def close():
+    await client.aclose()
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from simcc.config import Settings
+
+MIN_MEMORY_COST = 19 * 1024
+MAX_TIME_COST = 10
+
+
+def create_password_hash(settings: Settings) -> PasswordHash:
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+            memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+            parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+        ),
+    ))
+
+
+password_hash = create_password_hash(Settings())
+
+
+def hash_password(password: str) -> str:
+    return password_hash.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return password_hash.verify(password, hashed)
+
+
+def verify_and_update(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Check a password, and hash it again if hashed uses old parameters."""
+    return password_hash.verify_and_update(password, hashed)
+
+
+def _time_hash(time_cost: int, memory_cost: int, parallelism: int) -> float:
+    hasher = Argon2Hasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    start = time.perf_counter()
+    hasher.hash('calibration')
+    return time.perf_counter() - start
+
+
+def calibrate(
+    target: float, concurrency: int, memory_budget: int, parallelism: int
+) -> list[dict]:
+    """Argon2 parameters that hash within target seconds on this machine.
+
+    Hashes are timed concurrency at a time, as hash_pool runs them, so
+    they compete for cores and memory bandwidth like under a login burst.
+    Memory costs halve from the largest power of two that fits
+    memory_budget KiB across those hashes down to MIN_MEMORY_COST. Each
+    takes as many passes as stay within target. The best fit, with the
+    most memory, comes first.
+    """
+    results = []
+    memory_cost = 1 << ((memory_budget // concurrency).bit_length() - 1)
+    with ProcessPoolExecutor(
+        concurrency, mp_context=get_context('spawn')
+    ) as pool:
+        while memory_cost >= MIN_MEMORY_COST:
+            best = None
+            for time_cost in range(1, MAX_TIME_COST + 1):
+                futures = [
+                    pool.submit(
+                        _time_hash, time_cost, memory_cost, parallelism
+                    )
+                    for _ in range(concurrency)
+                ]
+                seconds = max(future.result() for future in futures)
+                if seconds > target:
+                    break
+                best = {
+                    'time_cost': time_cost,
+                    'memory_cost': memory_cost,
+                    'parallelism': parallelism,
+                    'seconds': seconds,
+                }
+            if best:
+                results.append(best)
+            memory_cost //= 2
+    return results
@@ -0,0 +1,160 @@
+import logging
+import time
+from http import HTTPStatus
+
+import httpx
+from fastapi import Request, Response
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from simcc.config import Settings
+from simcc.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+HOP_BY_HOP_HEADERS = {
+    'connection',
+    'keep-alive',
+    'proxy-authenticate',
+    'proxy-authorization',
+    'te',
+    'trailer',
+    'transfer-encoding',
+    'upgrade',
+}
+
+
+def create_proxy_client(settings: Settings) -> httpx.AsyncClient:
+    http2 = settings.PROXY_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401, PLC0415
+        except ImportError:
+            logger.warning('PROXY_HTTP2 requires httpx[http2], using HTTP/1')
+            http2 = False
+
+    return httpx.AsyncClient(
+        base_url=str(settings.PROXY_URL).rstrip('/'),
+        limits=httpx.Limits(
+            max_connections=settings.PROXY_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.PROXY_CONNECT_TIMEOUT,
+            read=settings.PROXY_READ_TIMEOUT,
+            write=settings.PROXY_READ_TIMEOUT,
+            pool=settings.PROXY_CONNECT_TIMEOUT,
+        ),
+        http2=http2,
+        follow_redirects=False,
+    )
+
+
+def _request_headers(request: Request) -> list[tuple[bytes, bytes]]:
+    return [
+        (k, v)
+        for k, v in request.headers.raw
+        if k.decode('latin-1').lower() not in {'host', *HOP_BY_HOP_HEADERS}
+    ]
+
+
+def _has_body(request: Request) -> bool:
+    return (
+        'content-length' in request.headers
+        or 'transfer-encoding' in request.headers
+    )
+
+
+async def forward(client: httpx.AsyncClient, request: Request) -> Response:
+    upstream_request = client.build_request(
+        method=request.method,
+        url=request.url.path,
+        params=request.query_params.multi_items(),
+        headers=_request_headers(request),
+        content=request.stream() if _has_body(request) else None,
+    )
+
+    start = time.perf_counter()
+    try:
+        upstream = await client.send(upstream_request, stream=True)
+    except httpx.TimeoutException as e:
+        logger.warning('Legacy backend timed out: %s', e)
+        registry.inc('proxy_requests_total', status=HTTPStatus.GATEWAY_TIMEOUT)
+        return Response(status_code=HTTPStatus.GATEWAY_TIMEOUT)
+    except httpx.TransportError as e:
+        logger.warning('Legacy backend unavailable: %s', e)
+        registry.inc('proxy_requests_total', status=HTTPStatus.BAD_GATEWAY)
+        return Response(status_code=HTTPStatus.BAD_GATEWAY)
+
+    registry.observe(
+        'proxy_upstream_duration_seconds', time.perf_counter() - start
+    )
+    registry.inc('proxy_requests_total', status=upstream.status_code)
+
+    response = StreamingResponse(
+        _stream(upstream),
+        status_code=upstream.status_code,
+        background=BackgroundTask(upstream.aclose),
+    )
+    response.raw_headers = [
+        (k, v)
+        for k, v in upstream.headers.raw
+        if k.decode('latin-1').lower() not in HOP_BY_HOP_HEADERS
+    ]
+    return response
+
+
+async def _stream(upstream: httpx.Response):
+    try:
+        async for chunk in upstream.aiter_raw():
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+
+class LegacyProxyMiddleware:
+    """Send requests that no local route can serve straight to PROXY_URL.
+
+    The route table is compiled once at startup, so unmatched paths skip the
+    FastAPI router and dependency stack entirely, and a 404 raised by a
+    matched local route is returned as is instead of being re-sent upstream.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.routes: tuple[BaseRoute, ...] | None = None
+
+    def compile(self, scope: Scope):
+        self.routes = tuple(scope['app'].router.routes)
+
+    def is_local(self, scope: Scope) -> bool:
+        path = scope['path']
+        alternative = path[:-1] if path.endswith('/') else path + '/'
+        for candidate in (path, alternative):
+            child_scope = {**scope, 'path': candidate}
+            for route in self.routes:
+                match, _ = route.matches(child_scope)
+                if match != Match.NONE:
+                    return True
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] == 'lifespan':
+            self.compile(scope)
+            return await self.app(scope, receive, send)
+
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        if self.routes is None:
+            self.compile(scope)
+
+        if self.is_local(scope):
+            return await self.app(scope, receive, send)
+
+        request = Request(scope, receive)
+        response = await forward(scope['app'].state.proxy_client, request)
+        await response(scope, receive, send)
@@ -0,0 +1,384 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import FileResponse, RedirectResponse, Response
+from starlette.routing import Route, Router
+from starlette.types import ASGIApp
+
+from simcc.config import Settings
+from simcc.core.uploads import IMMUTABLE, ImmutableStaticFiles
+
+CHUNK_SIZE = 1024 * 1024
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+
+
+class StorageError(OSError):
+    """The storage backend refused or failed a request."""
+
+
+class Storage(ABC):
+    """Where uploaded media lives, addressed by its path under MEDIA_ROOT.
+
+    Files are prepared in a local temporary file and handed over with put(),
+    which takes ownership of it. Failures are raised as OSError.
+    """
+
+    @abstractmethod
+    async def put(self, source: str, key: str, content_type: str | None): ...
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    def response(
+        self, key: str, content_type: str | None, headers: dict
+    ) -> Response: ...
+
+    @abstractmethod
+    def static_app(self) -> ASGIApp:
+        """ASGI app mounted at /upload to serve versioned media URLs."""
+
+    async def close(self):
+        pass
+
+
+def _move(source: str, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(source, path)
+
+
+def _read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class LocalStorage(Storage):
+    """Files under a directory shared by every worker of the node.
+
+    With an offload mode, responses carry no body but an X-Accel-Redirect
+    (nginx) or X-Sendfile (Apache, lighttpd) header, and the front proxy
+    sends the file itself. For nginx, accel_prefix must be an internal
+    location aliased to root:
+
+        location /protected-upload/ { internal; alias /path/to/root/; }
+    """
+
+    def __init__(
+        self,
+        root: str,
+        offload: str | None = None,
+        accel_prefix: str = '/protected-upload',
+    ):
+        self.root = root
+        self.offload = offload
+        self.accel_prefix = accel_prefix.rstrip('/')
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def put(self, source: str, key: str, content_type: str | None):
+        await run_in_threadpool(_move, source, self.path(key))
+
+    async def read(self, key: str) -> bytes:
+        return await run_in_threadpool(_read, self.path(key))
+
+    async def delete(self, key: str):
+        await run_in_threadpool(os.remove, self.path(key))
+
+    def response(
+        self, key: str, content_type: str | None, headers: dict
+    ) -> Response:
+        if self.offload == 'x-accel-redirect':
+            location = f'{self.accel_prefix}/{quote(key)}'
+            headers = {**headers, 'X-Accel-Redirect': location}
+        elif self.offload == 'x-sendfile':
+            headers = {
+                **headers,
+                'X-Sendfile': os.path.abspath(self.path(key)),
+            }
+        else:
+            return FileResponse(
+                path=self.path(key), media_type=content_type, headers=headers
+            )
+        return Response(media_type=content_type, headers=headers)
+
+    def static_app(self) -> ASGIApp:
+        os.makedirs(self.root, exist_ok=True)
+        if not self.offload:
+            return ImmutableStaticFiles(directory=self.root)
+
+        async def offload(request: Request) -> Response:
+            key = os.path.normpath(request.path_params['key'])
+            if key == '.' or key.startswith(('..', '/')):
+                return Response(status_code=httpx.codes.NOT_FOUND)
+            return self.response(
+                key, mimetypes.guess_type(key)[0], {'Cache-Control': IMMUTABLE}
+            )
+
+        return Router(
+            routes=[Route('/{key:path}', offload, methods=['GET', 'HEAD'])]
+        )
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _query(params: dict[str, str]) -> str:
+    return '&'.join(
+        f'{quote(k, safe="-_.~")}={quote(v, safe="-_.~")}'
+        for k, v in sorted(params.items())
+    )
+
+
+def _read_range(path: str, offset: int, size: int) -> bytes:
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+async def _chunks(path: str):
+    with open(path, 'rb') as f:
+        while chunk := await run_in_threadpool(f.read, CHUNK_SIZE):
+            yield chunk
+
+
+def _xml(content: bytes, tag: str) -> str | None:
+    return ET.fromstring(content).findtext(f'{{*}}{tag}')
+
+
+class S3Storage(Storage):
+    """Objects in an S3 compatible bucket, signed with AWS Signature V4.
+
+    Objects are addressed path style, as {endpoint}/{bucket}/{key}; with an
+    empty bucket the endpoint is taken to name the bucket itself. Reads by
+    clients never go through the workers: they are redirected to presigned
+    URLs of MEDIA_S3_PUBLIC_ENDPOINT, or of the endpoint when it is unset.
+    """
+
+    def __init__(self, settings: Settings):
+        self.endpoint = settings.MEDIA_S3_ENDPOINT.rstrip('/')
+        self.public_endpoint = (
+            settings.MEDIA_S3_PUBLIC_ENDPOINT or self.endpoint
+        ).rstrip('/')
+        self.bucket = settings.MEDIA_S3_BUCKET
+        self.region = settings.MEDIA_S3_REGION
+        self.access_key = settings.MEDIA_S3_ACCESS_KEY
+        self.secret_key = settings.MEDIA_S3_SECRET_KEY
+        self.part_size = settings.MEDIA_S3_PART_SIZE
+        self.presign_ttl = settings.MEDIA_S3_PRESIGN_TTL
+        self.client = httpx.AsyncClient(timeout=httpx.Timeout(60, connect=5))
+
+    def _path(self, key: str) -> str:
+        path = f'/{self.bucket}/{key}' if self.bucket else f'/{key}'
+        return quote(path, safe='/-_.~')
+
+    def _scope(self, amz_date: str) -> str:
+        return f'{amz_date[:8]}/{self.region}/s3/aws4_request'
+
+    def _canonical(
+        self,
+        method: str,
+        key: str,
+        query: dict[str, str],
+        headers: dict[str, str],
+    ) -> str:
+        return '\n'.join([
+            method,
+            self._path(key),
+            _query(query),
+            ''.join(f'{k}:{v}\n' for k, v in sorted(headers.items())),
+            ';'.join(sorted(headers)),
+            UNSIGNED_PAYLOAD,
+        ])
+
+    def _signature(self, canonical: str, amz_date: str) -> str:
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            amz_date,
+            self._scope(amz_date),
+            hashlib.sha256(canonical.encode()).hexdigest(),
+        ])
+        signing_key = f'AWS4{self.secret_key}'.encode()
+        for part in (amz_date[:8], self.region, 's3', 'aws4_request'):
+            signing_key = _hmac(signing_key, part)
+        return hmac.new(
+            signing_key, string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        query: dict[str, str] | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        query = query or {}
+        amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        headers = {
+            'host': urlsplit(self.endpoint).netloc,
+            'x-amz-content-sha256': UNSIGNED_PAYLOAD,
+            'x-amz-date': amz_date,
+        }
+        canonical = self._canonical(method, key, query, headers)
+        signed_headers = ';'.join(sorted(headers))
+        headers['authorization'] = (
+            f'AWS4-HMAC-SHA256 '
+            f'Credential={self.access_key}/{self._scope(amz_date)}, '
+            f'SignedHeaders={signed_headers}, '
+            f'Signature={self._signature(canonical, amz_date)}'
+        )
+        headers.update(kwargs.pop('headers', {}))
+        url = f'{self.endpoint}{self._path(key)}'
+        if query:
+            url = f'{url}?{_query(query)}'
+        try:
+            response = await self.client.request(
+                method, url, headers=headers, **kwargs
+            )
+        except httpx.HTTPError as e:
+            raise StorageError(f'{method} {key}: {e}') from e
+        if response.status_code == httpx.codes.NOT_FOUND:
+            raise FileNotFoundError(key)
+        if response.is_error:
+            raise StorageError(
+                f'{method} {key}: {response.status_code} {response.text}'
+            )
+        return response
+
+    async def put(self, source: str, key: str, content_type: str | None):
+        headers = {'content-type': content_type or 'application/octet-stream'}
+        size = await run_in_threadpool(os.path.getsize, source)
+        try:
+            if size > self.part_size:
+                await self._put_multipart(source, key, headers)
+            else:
+                headers['content-length'] = str(size)
+                await self._request(
+                    'PUT', key, content=_chunks(source), headers=headers
+                )
+        finally:
+            await run_in_threadpool(os.remove, source)
+
+    async def _put_multipart(self, source: str, key: str, headers: dict):
+        response = await self._request(
+            'POST', key, {'uploads': ''}, headers=headers
+        )
+        upload_id = _xml(response.content, 'UploadId')
+        try:
+            parts = []
+            offset = 0
+            while part := await run_in_threadpool(
+                _read_range, source, offset, self.part_size
+            ):
+                number = str(len(parts) + 1)
+                response = await self._request(
+                    'PUT',
+                    key,
+                    {'partNumber': number, 'uploadId': upload_id},
+                    content=part,
+                )
+                parts.append((number, response.headers['etag']))
+                offset += len(part)
+
+            body = ''.join(
+                f'<Part><PartNumber>{n}</PartNumber><ETag>{e}</ETag></Part>'
+                for n, e in parts
+            )
+            response = await self._request(
+                'POST',
+                key,
+                {'uploadId': upload_id},
+                content=f'<CompleteMultipartUpload>{body}'
+                '</CompleteMultipartUpload>',
+            )
+            # Completion can fail after the 200 has been sent.
+            if _xml(response.content, 'Code'):
+                raise StorageError(f'POST {key}: {response.text}')
+        except BaseException:
+            with suppress(OSError):
+                await self._request('DELETE', key, {'uploadId': upload_id})
+            raise
+
+    async def read(self, key: str) -> bytes:
+        return (await self._request('GET', key)).content
+
+    async def delete(self, key: str):
+        await self._request('DELETE', key)
+
+    def presign(self, key: str, now: float | None = None) -> str:
+        """GET URL of an object, valid for MEDIA_S3_PRESIGN_TTL seconds.
+
+        The signing time is rounded down to half the TTL, so the same URL is
+        handed out for a while and browsers can cache the object behind it.
+        """
+        now = time.time() if now is None else now
+        signed_at = now - now % max(self.presign_ttl // 2, 1)
+        amz_date = datetime.fromtimestamp(signed_at, timezone.utc).strftime(
+            '%Y%m%dT%H%M%SZ'
+        )
+        query = {
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f'{self.access_key}/{self._scope(amz_date)}',
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(self.presign_ttl),
+            'X-Amz-SignedHeaders': 'host',
+        }
+        headers = {'host': urlsplit(self.public_endpoint).netloc}
+        canonical = self._canonical('GET', key, query, headers)
+        query['X-Amz-Signature'] = self._signature(canonical, amz_date)
+        return f'{self.public_endpoint}{self._path(key)}?{_query(query)}'
+
+    def response(
+        self, key: str, content_type: str | None, headers: dict
+    ) -> Response:
+        return RedirectResponse(
+            self.presign(key),
+            status_code=httpx.codes.TEMPORARY_REDIRECT,
+            headers=headers,
+        )
+
+    def static_app(self) -> ASGIApp:
+        window = max(self.presign_ttl // 2, 1)
+
+        async def redirect(request: Request) -> Response:
+            max_age = window - int(time.time()) % window
+            return self.response(
+                request.path_params['key'],
+                None,
+                {'Cache-Control': f'private, max-age={max_age}'},
+            )
+
+        return Router(
+            routes=[Route('/{key:path}', redirect, methods=['GET', 'HEAD'])]
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_storage(settings: Settings) -> Storage:
+    if settings.MEDIA_STORAGE == 's3':
+        return S3Storage(settings)
+    return LocalStorage(
+        settings.MEDIA_ROOT,
+        offload=settings.MEDIA_OFFLOAD,
+        accel_prefix=settings.MEDIA_ACCEL_PREFIX,
+    )
+
+
+storage = create_storage(Settings())
@@ -0,0 +1,52 @@
+from contextlib import aclosing
+from typing import AsyncIterator
+
+from fastapi import Request
+from pydantic import TypeAdapter
+from starlette.responses import StreamingResponse
+
+NDJSON = 'application/x-ndjson'
+FLUSH_SIZE = 64 * 1024
+
+
+def stream_rows(
+    request: Request, rows: AsyncIterator[dict], model: type
+) -> StreamingResponse:
+    """Serialize rows through model as they arrive from the database.
+
+    Clients asking for application/x-ndjson get one object per line,
+    everyone else gets a regular JSON array. rows is closed as soon as the
+    body ends, also when the client goes away, so its pooled connection is
+    not held until garbage collection.
+    """
+    adapter = TypeAdapter(model)
+    ndjson = NDJSON in request.headers.get('accept', '')
+
+    def dump(row: dict) -> bytes:
+        return adapter.dump_json(adapter.validate_python(row))
+
+    async def ndjson_body():
+        buffer = bytearray()
+        async with aclosing(rows):
+            async for row in rows:
+                buffer += dump(row) + b'\n'
+                if len(buffer) >= FLUSH_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+        yield bytes(buffer)
+
+    async def array_body():
+        buffer = bytearray(b'[')
+        separator = b''
+        async with aclosing(rows):
+            async for row in rows:
+                buffer += separator + dump(row)
+                separator = b','
+                if len(buffer) >= FLUSH_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+        yield bytes(buffer + b']')
+
+    if ndjson:
+        return StreamingResponse(ndjson_body(), media_type=NDJSON)
+    return StreamingResponse(array_body(), media_type='application/json')
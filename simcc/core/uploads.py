@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+FORM_OVERHEAD = 64 * 1024
+TOO_LARGE = 'Arquivo maior que o permitido.'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class UploadLimitMiddleware:
+    """Refuse multipart bodies larger than max_size while they arrive.
+
+    A declared Content-Length over the limit is answered before the body is
+    read, and chunked bodies are counted as they stream in, so the form
+    parser never spools more than the limit to disk.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.limit = max_size + FORM_OVERHEAD
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        if not headers.get('content-type', '').startswith('multipart/'):
+            return await self.app(scope, receive, send)
+
+        if int(headers.get('content-length') or 0) > self.limit:
+            response = JSONResponse(
+                {'detail': TOO_LARGE},
+                status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            )
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.limit:
+                    raise HTTPException(
+                        status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        detail=TOO_LARGE,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Serve stored media, whose names change with their content."""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
@@ -0,0 +1,56 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from simcc.config import Settings
+
+
+class PoolSaturated(Exception):
+    """Raised by ProcessPool.run when its queue is full."""
+
+
+class ProcessPool:
+    """CPU bound work in worker processes, started on first use.
+
+    Workers are spawned rather than forked, so they do not inherit the
+    event loop, sockets or pool connections of the server process. With
+    max_queued, calls beyond the busy workers and that many waiting ones
+    fail at once with PoolSaturated instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_queued: int | None = None):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.pending = 0
+        self.executor: ProcessPoolExecutor | None = None
+
+    async def run(self, func: Callable, *args):
+        if (
+            self.max_queued is not None
+            and self.pending >= self.max_workers + self.max_queued
+        ):
+            raise PoolSaturated
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+image_pool = ProcessPool(max_workers=Settings().MEDIA_VARIANT_WORKERS)
+hash_pool = ProcessPool(
+    max_workers=Settings().PASSWORD_HASH_WORKERS,
+    max_queued=Settings().PASSWORD_HASH_QUEUE,
+)
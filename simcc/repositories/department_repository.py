@@ -0,0 +1,57 @@
+from typing import AsyncIterator
+
+from simcc.core.connection import Connection
+
+
+async def get_image(conn: Connection, dep_id: str, head_size: int):
+    """Size, SHA-256 and first bytes of img_data, without sending the rest.
+
+    The hash is the one the media table keeps, so ETags stay valid once the
+    image is migrated.
+    """
+    params = {'dep_id': dep_id, 'head_size': head_size}
+    SCRIPT_SQL = """
+        SELECT length(img_data) AS size,
+            encode(sha256(img_data), 'hex') AS hash,
+            substring(img_data FROM 1 FOR %(head_size)s) AS head
+        FROM ufmg.departament
+        WHERE dep_id = %(dep_id)s
+            AND img_data IS NOT NULL;
+        """
+    return await conn.select(SCRIPT_SQL, params, one=True)
+
+
+def stream_image(
+    conn: Connection, dep_id: str, chunk_size: int
+) -> AsyncIterator[dict]:
+    """img_data in chunk_size slices, one row each, in order."""
+    params = {'dep_id': dep_id, 'chunk_size': chunk_size}
+    SCRIPT_SQL = """
+        SELECT substring(img_data FROM start FOR %(chunk_size)s) AS chunk
+        FROM ufmg.departament,
+            generate_series(1, length(img_data), %(chunk_size)s) AS start
+        WHERE dep_id = %(dep_id)s
+        ORDER BY start;
+        """
+    return conn.stream(SCRIPT_SQL, params, fetch_size=1)
+
+
+async def list_images(conn: Connection):
+    SCRIPT_SQL = """
+        SELECT dep_id
+        FROM ufmg.departament
+        WHERE img_data IS NOT NULL
+        ORDER BY dep_id;
+        """
+    return await conn.select(SCRIPT_SQL)
+
+
+async def clear_image(conn: Connection, dep_id: str) -> bool:
+    SCRIPT_SQL = """
+        UPDATE ufmg.departament
+        SET img_data = NULL
+        WHERE dep_id = %(dep_id)s
+            AND img_data IS NOT NULL
+        RETURNING dep_id;
+        """
+    return bool(await conn.select(SCRIPT_SQL, {'dep_id': dep_id}, one=True))
@@ -1,3 +1,13 @@
+async def lock_private_chat(conn, chat):
+    user_ids = sorted(chat.users)
+    params = {'cp1': user_ids[0], 'cp2': user_ids[1]}
+    SCRIPT_SQL = """
+        SELECT pg_advisory_xact_lock(
+            hashtext(%(cp1)s::text || ':' || %(cp2)s::text));
+        """
+    await conn.select(SCRIPT_SQL, params, True)
+
+
 async def get_private_chat(conn, chat):
     user_ids = sorted(chat.users)
     params = {'cp1': user_ids[0], 'cp2': user_ids[1]}
@@ -55,7 +65,7 @@ async def save_message(conn, message):
     return await conn.exec(SCRIPT_SQL, params)
 
 
-async def get_chats(conn, current_user):
+async def get_chats(conn, current_user, stream=False):
     SCRIPT_SQL = """
         WITH last_messages AS (
             SELECT DISTINCT ON (cm.chat_id)
@@ -95,4 +105,7 @@ async def get_chats(conn, current_user):
         WHERE c.deleted_at IS NULL
         ORDER BY c.updated_at DESC;
         """
-    return await conn.select(SCRIPT_SQL, {'user_id': current_user.user_id})
+    params = {'user_id': current_user.user_id}
+    if stream:
+        return conn.stream(SCRIPT_SQL, params)
+    return await conn.select(SCRIPT_SQL, params)
@@ -32,14 +32,18 @@ async def get_collection(conn: Connection, current_user: user_model.User):
 
 
 async def get_collection_by_id(
-    conn: Connection, collection_id: UUID, current_user: user_model.User
+    conn: Connection,
+    collection_id: UUID,
+    current_user: user_model.User,
+    lock: bool = False,
 ):
     params = {'collection_id': collection_id, 'user_id': current_user.user_id}
-    SCRIPT_SQL = """
+    SCRIPT_SQL = f"""
         SELECT collection_id, name, description, visible
         FROM feature.collection
         WHERE collection_id = %(collection_id)s
           AND user_id = %(user_id)s
+        {'FOR SHARE' if lock else ''}
     """
     return await conn.select(SCRIPT_SQL, params, one=True)
 
@@ -17,7 +17,7 @@ async def create_group(conn, group):
     await conn.exec(SCRIPT_SQL, group)
 
 
-async def list_groups(conn, group_id=None):
+async def list_groups(conn, group_id=None, stream=False):
     FILTERS = str()
     params = {}
     one = False
@@ -36,6 +36,8 @@ async def list_groups(conn, group_id=None):
             {FILTERS}
         ORDER BY created_at DESC
         """
+    if stream and not one:
+        return conn.stream(SCRIPT_SQL, params)
     return await conn.select(SCRIPT_SQL, params, one)
 
 
@@ -11,8 +11,65 @@ async def post_institution(institutions, conn: Connection):
     return await conn.executemany(SCRIPT_SQL, params)
 
 
-async def get_institution(institution_id, conn: Connection):
-    params = {}
+async def post_institution_bulk(rows, conn: Connection):
+    STAGING_SQL = """
+        CREATE TEMP TABLE institution_staging (
+            n INT,
+            name TEXT,
+            acronym TEXT
+        ) ON COMMIT DROP;
+        """
+    COPY_SQL = """
+        COPY institution_staging (n, name, acronym)
+        FROM STDIN (FORMAT BINARY)
+        """
+    MERGE_SQL = """
+        WITH ranked AS (
+            SELECT s.n, s.name, s.acronym,
+                ROW_NUMBER() OVER (
+                    PARTITION BY s.acronym ORDER BY s.n DESC) AS rank
+            FROM institution_staging s
+        ), checked AS (
+            SELECT r.*, CASE
+                WHEN r.rank > 1 THEN 'duplicate row'
+                WHEN LENGTH(r.name) > 255 THEN 'name too long'
+                WHEN LENGTH(r.acronym) > 50 THEN 'acronym too long'
+            END AS reason
+            FROM ranked r
+        ), merged AS (
+            INSERT INTO public.institution (name, acronym)
+            SELECT name, acronym
+            FROM checked
+            WHERE reason IS NULL
+            ON CONFLICT (acronym) DO UPDATE
+                SET name = EXCLUDED.name,
+                    deleted_at = NULL,
+                    updated_at = NOW()
+            RETURNING institution_id, acronym, (xmax = 0) AS inserted
+        )
+        SELECT c.n, m.institution_id AS id, c.reason,
+            CASE
+                WHEN m.inserted THEN 'inserted'
+                WHEN m.institution_id IS NOT NULL THEN 'updated'
+                ELSE 'rejected'
+            END AS status
+        FROM checked c
+            LEFT JOIN merged m
+                ON c.reason IS NULL
+                AND m.acronym = c.acronym
+        ORDER BY c.n;
+        """
+    return await conn.copy_merge(
+        STAGING_SQL,
+        COPY_SQL,
+        rows,
+        MERGE_SQL,
+        types=['int4', 'text', 'text'],
+    )
+
+
+async def get_institution(institution_id, conn: Connection, sample_ttl=0):
+    params = {'sample_ttl': sample_ttl}
     filters = str()
 
     if institution_id:
@@ -20,82 +77,23 @@ async def get_institution(institution_id, conn: Connection):
         filters += 'AND i.institution_id = %(institution_id)s'
 
     SCRIPT_SQL = f"""
-        WITH researcher_count AS (
-            SELECT institution_id, COUNT(DISTINCT researcher_id)
-                AS count_r
-            FROM researcher
-            GROUP BY institution_id
-        ),
-        graduate_program_count AS (
-            SELECT institution_id, COUNT(DISTINCT graduate_program_id)
-                AS count_gp
-            FROM graduate_program
-            GROUP BY institution_id
-        ),
-        graduate_program_researcher_count AS (
-            SELECT gp.institution_id, SUM(gpr.count_r) AS count_gpr
-            FROM graduate_program gp
-            LEFT JOIN (
-                SELECT graduate_program_id, COUNT(DISTINCT researcher_id)
-                    AS count_r
-                FROM graduate_program_researcher
-                GROUP BY graduate_program_id
-            ) gpr ON gpr.graduate_program_id = gp.graduate_program_id
-            GROUP BY gp.institution_id
-        ),
-        graduate_program_student_count AS (
-            SELECT gp.institution_id, SUM(gps.count_s) AS count_gps
-            FROM graduate_program gp
-            LEFT JOIN (
-                SELECT graduate_program_id, COUNT(DISTINCT researcher_id)
-                    AS count_s
-                FROM graduate_program_student
-                GROUP BY graduate_program_id
-            ) gps ON gps.graduate_program_id = gp.graduate_program_id
-            GROUP BY gp.institution_id
-        ),
-        ufmg_researcher_count AS (
-            SELECT r.institution_id, COUNT(ur.researcher_id) AS count_d
-            FROM ufmg.researcher ur
-            LEFT JOIN researcher r ON r.researcher_id = ur.researcher_id
-            GROUP BY r.institution_id
-        ),
-        technician_count AS (
-            SELECT COUNT(*) AS count_t FROM ufmg.technician
-        ),
-        researchers AS (
-            WITH ranked AS (
-            SELECT lattes_id, institution_id, ROW_NUMBER() OVER (PARTITION BY institution_id ORDER BY random()) AS rn
-            FROM researcher
-            )
-            SELECT institution_id, ARRAY_AGG(lattes_id) AS researchers_list
-            FROM ranked
-            WHERE rn <= 20
-            GROUP BY institution_id
-        )
-        SELECT i.name, i.institution_id, COALESCE(r.count_r, 0) AS count_r,
-            COALESCE(gp.count_gp, 0) AS count_gp, COALESCE(gpr.count_gpr, 0)
-            AS count_gpr, COALESCE(gps.count_gps, 0) AS count_gps,
-            COALESCE(d.count_d, 0) AS count_d, COALESCE(t.count_t, 0)
-            AS count_t, i.acronym, COALESCE(rl.researchers_list, ARRAY[]::TEXT[])
-            AS researchers
+        SELECT i.name, i.institution_id, i.acronym,
+            COALESCE(s.count_r, 0) AS count_r,
+            COALESCE(s.count_gp, 0) AS count_gp,
+            COALESCE(s.count_gpr, 0) AS count_gpr,
+            COALESCE(s.count_gps, 0) AS count_gps,
+            COALESCE(s.count_d, 0) AS count_d,
+            (SELECT COUNT(*) FROM ufmg.technician) AS count_t,
+            COALESCE(s.sample, ARRAY[]::TEXT[]) AS sample,
+            s.sample_refreshed_at < NOW()
+                - make_interval(secs => %(sample_ttl)s) AS sample_stale,
+            s.refreshed_at
         FROM institution i
-            LEFT JOIN researcher_count r
-                ON r.institution_id = i.institution_id
-            LEFT JOIN graduate_program_count gp
-                ON gp.institution_id = i.institution_id
-            LEFT JOIN graduate_program_researcher_count gpr
-                ON gpr.institution_id = i.institution_id
-            LEFT JOIN graduate_program_student_count gps
-                ON gps.institution_id = i.institution_id
-            LEFT JOIN ufmg_researcher_count d
-                ON d.institution_id = i.institution_id
-            LEFT JOIN researchers rl
-                ON rl.institution_id = i.institution_id
-            CROSS JOIN technician_count t
+            LEFT JOIN institution_stats s
+                ON s.institution_id = i.institution_id
         WHERE 1 = 1
             {filters}
-            AND deleted_at IS NULL;
+            AND i.deleted_at IS NULL;
     """
     return await conn.select(SCRIPT_SQL, params, one=True)
 
@@ -121,3 +119,33 @@ async def delete_institution(institution_id, conn: Connection):
         AND deleted_at IS NULL;
         """
     return await conn.exec(SCRIPT_SQL, params)
+
+
+async def rotate_researcher_sample(conn: Connection, institution_id, ttl):
+    params = {'institution_id': institution_id, 'ttl': ttl}
+    SCRIPT_SQL = """
+        WITH stale AS (
+            SELECT institution_id
+            FROM institution_stats
+            WHERE institution_id = %(institution_id)s
+                AND sample_refreshed_at < NOW()
+                    - make_interval(secs => %(ttl)s)
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE institution_stats s
+        SET sample = public.researcher_sample(s.institution_id),
+            sample_refreshed_at = NOW()
+        FROM stale
+        WHERE s.institution_id = stale.institution_id
+        RETURNING s.sample;
+        """
+    return await conn.select(SCRIPT_SQL, params, one=True)
+
+
+async def refresh_institution_stats(conn: Connection, institution_id=None):
+    params = {'ids': [institution_id] if institution_id else None}
+    SCRIPT_SQL = """
+        SELECT public.refresh_institution_stats(%(ids)s::uuid[]) AS refreshed;
+        """
+    result = await conn.select(SCRIPT_SQL, params, one=True)
+    return result['refreshed']
@@ -0,0 +1,184 @@
+from simcc.core.connection import Connection
+from simcc.schemas.media_model import Media
+
+ENTITY_SQL = {
+    'user': 'SELECT 1 FROM public.users WHERE user_id = %(id)s',
+    'institution': """
+        SELECT 1 FROM public.institution
+        WHERE institution_id = %(id)s AND deleted_at IS NULL
+        """,
+    'group': """
+        SELECT 1 FROM public.research_group
+        WHERE id = %(id)s AND deleted_at IS NULL
+        """,
+    'program': """
+        SELECT 1 FROM public.graduate_program
+        WHERE graduate_program_id = %(id)s
+        """,
+    'department': 'SELECT 1 FROM ufmg.departament WHERE dep_id = %(id)s',
+    'collection': """
+        SELECT 1 FROM feature.collection
+        WHERE collection_id = %(id)s AND deleted_at IS NULL
+        """,
+}
+
+
+async def entity_exists(conn: Connection, entity_type: str, entity_id: str):
+    result = await conn.select(
+        ENTITY_SQL[entity_type], {'id': entity_id}, one=True
+    )
+    return bool(result)
+
+
+async def get_media(
+    conn: Connection,
+    entity_type: str,
+    entity_id: str,
+    kind: str,
+    variant: str = 'original',
+):
+    params = {
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'kind': kind,
+        'variant': variant,
+    }
+    SCRIPT_SQL = """
+        SELECT entity_type, entity_id, kind, variant, path, content_type,
+            size, hash, mtime
+        FROM public.media
+        WHERE entity_type = %(entity_type)s
+            AND entity_id = %(entity_id)s
+            AND kind = %(kind)s
+            AND variant = %(variant)s;
+        """
+    return await conn.select(SCRIPT_SQL, params, one=True)
+
+
+async def get_media_batch(
+    conn: Connection,
+    entity_type: str,
+    entity_ids: list[str],
+    kind: str,
+    variant: str,
+):
+    params = {
+        'entity_type': entity_type,
+        'entity_ids': entity_ids,
+        'kind': kind,
+        'variant': variant,
+    }
+    SCRIPT_SQL = """
+        SELECT DISTINCT ON (entity_id) entity_id, path, content_type, size
+        FROM public.media
+        WHERE entity_type = %(entity_type)s
+            AND entity_id = ANY(%(entity_ids)s)
+            AND kind = %(kind)s
+            AND variant IN (%(variant)s, 'original')
+        ORDER BY entity_id, variant = 'original';
+        """
+    return await conn.select(SCRIPT_SQL, params)
+
+
+async def put_media(conn: Connection, media: Media, blob: str):
+    SCRIPT_SQL = """
+        INSERT INTO public.media (entity_type, entity_id, kind, variant,
+            path, content_type, size, hash, blob, mtime)
+        VALUES (%(entity_type)s, %(entity_id)s, %(kind)s, %(variant)s,
+            %(path)s, %(content_type)s, %(size)s, %(hash)s, %(blob)s,
+            %(mtime)s)
+        ON CONFLICT (entity_type, entity_id, kind, variant) DO UPDATE
+            SET path = EXCLUDED.path,
+                content_type = EXCLUDED.content_type,
+                size = EXCLUDED.size,
+                hash = EXCLUDED.hash,
+                blob = EXCLUDED.blob,
+                mtime = EXCLUDED.mtime;
+        """
+    await conn.exec(SCRIPT_SQL, {**media.model_dump(), 'blob': blob})
+
+
+async def delete_media(
+    conn: Connection, entity_type: str, entity_id: str, kind: str
+):
+    params = {'entity_type': entity_type, 'entity_id': entity_id, 'kind': kind}
+    SCRIPT_SQL = """
+        DELETE FROM public.media
+        WHERE entity_type = %(entity_type)s
+            AND entity_id = %(entity_id)s
+            AND kind = %(kind)s
+        RETURNING path, blob;
+        """
+    return await conn.select(SCRIPT_SQL, params)
+
+
+async def delete_entity_media(
+    conn: Connection, entity_type: str, entity_id: str
+):
+    params = {'entity_type': entity_type, 'entity_id': entity_id}
+    SCRIPT_SQL = """
+        DELETE FROM public.media
+        WHERE entity_type = %(entity_type)s
+            AND entity_id = %(entity_id)s
+        RETURNING path, blob;
+        """
+    return await conn.select(SCRIPT_SQL, params)
+
+
+async def get_blob_media(conn: Connection, blob: str):
+    SCRIPT_SQL = """
+        SELECT DISTINCT ON (variant) variant, path, content_type, size, hash
+        FROM public.media
+        WHERE blob = %(blob)s
+        ORDER BY variant, mtime;
+        """
+    return await conn.select(SCRIPT_SQL, {'blob': blob})
+
+
+async def acquire_blob(conn: Connection, blob: str) -> bool:
+    SCRIPT_SQL = """
+        UPDATE public.media_blob
+        SET refcount = refcount + 1
+        WHERE hash = %(blob)s
+        RETURNING hash;
+        """
+    return bool(await conn.select(SCRIPT_SQL, {'blob': blob}, one=True))
+
+
+async def create_blob(conn: Connection, blob: str) -> bool:
+    SCRIPT_SQL = """
+        INSERT INTO public.media_blob (hash, refcount)
+        VALUES (%(blob)s, 1)
+        ON CONFLICT (hash) DO NOTHING
+        RETURNING hash;
+        """
+    return bool(await conn.select(SCRIPT_SQL, {'blob': blob}, one=True))
+
+
+async def release_blob(conn: Connection, blob: str) -> bool:
+    """Drop one reference, and the blob with its last one."""
+    params = {'blob': blob}
+    SCRIPT_SQL = """
+        UPDATE public.media_blob
+        SET refcount = refcount - 1
+        WHERE hash = %(blob)s
+        RETURNING refcount;
+        """
+    result = await conn.select(SCRIPT_SQL, params, one=True)
+    if not result or result['refcount'] > 0:
+        return False
+    DELETE_SQL = 'DELETE FROM public.media_blob WHERE hash = %(blob)s;'
+    await conn.exec(DELETE_SQL, params)
+    return True
+
+
+async def set_user_url(
+    conn: Connection, user_id: str, kind: str, url: str | None
+):
+    column = {'icon': 'icon_url', 'cover': 'cover_url'}[kind]
+    SCRIPT_SQL = f"""
+        UPDATE public.users
+        SET {column} = %(url)s
+        WHERE user_id = %(user_id)s;
+        """
+    await conn.exec(SCRIPT_SQL, {'user_id': user_id, 'url': url})
@@ -8,7 +8,73 @@ async def researcher_post(conn, researchers: list):
     await conn.executemany(SCRIPT_SQL, params)
 
 
-async def researcher_get(conn, institution_id, name):
+async def researcher_bulk_post(conn, rows):
+    STAGING_SQL = """
+        CREATE TEMP TABLE researcher_staging (
+            n INT,
+            name TEXT,
+            lattes_id TEXT,
+            institution_id UUID
+        ) ON COMMIT DROP;
+        """
+    COPY_SQL = """
+        COPY researcher_staging (n, name, lattes_id, institution_id)
+        FROM STDIN (FORMAT BINARY)
+        """
+    MERGE_SQL = """
+        WITH ranked AS (
+            SELECT s.n, s.name, s.lattes_id, s.institution_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY s.lattes_id, s.institution_id
+                    ORDER BY s.n DESC) AS rank,
+                EXISTS (
+                    SELECT 1 FROM public.institution i
+                    WHERE i.institution_id = s.institution_id
+                ) AS known_institution
+            FROM researcher_staging s
+        ), checked AS (
+            SELECT r.*, CASE
+                WHEN r.rank > 1 THEN 'duplicate row'
+                WHEN NOT r.known_institution THEN 'unknown institution'
+                WHEN LENGTH(r.name) > 150 THEN 'name too long'
+                WHEN LENGTH(r.lattes_id) > 20 THEN 'lattes_id too long'
+            END AS reason
+            FROM ranked r
+        ), merged AS (
+            INSERT INTO public.researcher (name, lattes_id, institution_id)
+            SELECT name, lattes_id, institution_id
+            FROM checked
+            WHERE reason IS NULL
+            ON CONFLICT (lattes_id, institution_id) DO UPDATE
+                SET name = EXCLUDED.name,
+                    deleted_at = NULL,
+                    updated_at = NOW()
+            RETURNING researcher_id, lattes_id, institution_id,
+                (xmax = 0) AS inserted
+        )
+        SELECT c.n, m.researcher_id AS id, c.reason,
+            CASE
+                WHEN m.inserted THEN 'inserted'
+                WHEN m.researcher_id IS NOT NULL THEN 'updated'
+                ELSE 'rejected'
+            END AS status
+        FROM checked c
+            LEFT JOIN merged m
+                ON c.reason IS NULL
+                AND m.lattes_id = c.lattes_id
+                AND m.institution_id = c.institution_id
+        ORDER BY c.n;
+        """
+    return await conn.copy_merge(
+        STAGING_SQL,
+        COPY_SQL,
+        rows,
+        MERGE_SQL,
+        types=['int4', 'text', 'text', 'uuid'],
+    )
+
+
+async def researcher_get(conn, institution_id, name, stream=False):
     params = {}
     filters = str()
     if institution_id:
@@ -29,6 +95,35 @@ async def researcher_get(conn, institution_id, name):
         ORDER BY
             r.created_at DESC
         """
+    if stream:
+        return conn.stream(SCRIPT_SQL, params)
+    return await conn.select(SCRIPT_SQL, params)
+
+
+async def researcher_search(conn, q, institution_id=None, limit=20):
+    params = {'q': q, 'limit': limit}
+    filters = str()
+    if institution_id:
+        params['institution_id'] = institution_id
+        filters += 'AND r.institution_id = %(institution_id)s'
+
+    SCRIPT_SQL = f"""
+        WITH query AS (
+            SELECT public.immutable_unaccent(lower(%(q)s)) AS term
+        )
+        SELECT r.researcher_id, r.name, r.lattes_id, r.institution_id,
+            r.status, r.created_at, r.updated_at, r.deleted_at,
+            word_similarity(q.term, public.immutable_unaccent(lower(r.name)))
+                AS score
+        FROM public.researcher r, query q
+        WHERE q.term <%% public.immutable_unaccent(lower(r.name))
+            AND r.deleted_at IS NULL
+            {filters}
+        ORDER BY
+            score DESC,
+            similarity(q.term, public.immutable_unaccent(lower(r.name))) DESC
+        LIMIT %(limit)s
+        """
     return await conn.select(SCRIPT_SQL, params)
 
 
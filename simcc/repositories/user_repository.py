@@ -22,6 +22,7 @@ async def get_user(
     user_id: UUID = None,
     email: EmailStr = None,
     username: str = None,
+    stream: bool = False,
 ):
     one = False
     params = {}
@@ -70,9 +71,21 @@ async def get_user(
         WHERE 1 = 1
             {filters}
         """
+    if stream and not one:
+        return conn.stream(SCRIPT_SQL, params)
     return await conn.select(SCRIPT_SQL, params, one)
 
 
+async def get_password(conn: Connection, user_id: UUID):
+    params = {'user_id': user_id}
+    SCRIPT_SQL = """
+        SELECT password
+        FROM public.users
+        WHERE user_id = %(user_id)s;
+        """
+    return await conn.select(SCRIPT_SQL, params, one=True)
+
+
 async def put_user(conn: Connection, user: user_model.User):
     params = user.model_dump()
     SCRIPT_SQL = """
@@ -86,6 +99,16 @@ async def put_user(conn: Connection, user: user_model.User):
     return await conn.exec(SCRIPT_SQL, params)
 
 
+async def update_password(conn: Connection, user_id: UUID, password: str):
+    params = {'user_id': user_id, 'password': password}
+    SCRIPT_SQL = """
+        UPDATE public.users
+        SET password = %(password)s
+        WHERE user_id = %(user_id)s;
+        """
+    await conn.exec(SCRIPT_SQL, params)
+
+
 async def delete_user(conn: Connection, user_id: UUID):
     params = {'user_id': user_id}
     SCRIPT_SQL = """
@@ -95,19 +118,73 @@ async def delete_user(conn: Connection, user_id: UUID):
     await conn.exec(SCRIPT_SQL, params)
 
 
-async def key_post(conn: Connection, key):
-    params = key.model_dump()
+async def key_post(conn: Connection, key, prefix: str, key_hash: str):
+    params = key.model_dump(exclude={'key'})
+    params |= {'prefix': prefix, 'key_hash': key_hash}
     SCRIPT_SQL = """
-        INSERT INTO keys (key_id, user_id, name, key, created_at)
-        VALUES (%(key_id)s, %(user_id)s, %(name)s, %(key)s, %(created_at)s);
+        INSERT INTO keys (key_id, user_id, name, prefix, key_hash,
+            created_at)
+        VALUES (%(key_id)s, %(user_id)s, %(name)s, %(prefix)s, %(key_hash)s,
+            %(created_at)s);
         """
     return await conn.exec(SCRIPT_SQL, params)
 
 
-async def key_delete(conn, key_id):
-    params = {'key_id': key_id}
+async def key_delete(conn, user_id, key_id):
+    params = {'user_id': user_id, 'key_id': key_id}
     SCRIPT_SQL = """
         UPDATE keys SET deleted_at = NOW()
+        WHERE key_id = %(key_id)s
+            AND user_id = %(user_id)s
+            AND deleted_at IS NULL
+        RETURNING prefix;
+        """
+    return await conn.select(SCRIPT_SQL, params, one=True)
+
+
+async def key_by_prefix(conn: Connection, prefix: str):
+    params = {'prefix': prefix}
+    SCRIPT_SQL = """
+        SELECT k.key_id, k.key_hash, u.email
+        FROM public.keys AS k
+        JOIN public.users AS u ON k.user_id = u.user_id
+        WHERE k.prefix = %(prefix)s
+        AND k.deleted_at IS NULL;
+        """
+    return await conn.select(SCRIPT_SQL, params, one=True)
+
+
+async def key_usage(conn: Connection, usage: dict):
+    params = {
+        'key_ids': list(usage),
+        'counts': [count for count, _ in usage.values()],
+        'last_used': [last_used for _, last_used in usage.values()],
+    }
+    SCRIPT_SQL = """
+        UPDATE public.keys AS k
+        SET request_count = k.request_count + u.count,
+            last_used = GREATEST(k.last_used, u.last_used)
+        FROM UNNEST(%(key_ids)s::uuid[], %(counts)s::bigint[],
+            %(last_used)s::timestamp[]) AS u(key_id, count, last_used)
+        WHERE k.key_id = u.key_id;
+        """
+    return await conn.exec(SCRIPT_SQL, params)
+
+
+async def unhashed_keys(conn: Connection):
+    SCRIPT_SQL = """
+        SELECT key_id, key
+        FROM public.keys
+        WHERE key IS NOT NULL;
+        """
+    return await conn.select(SCRIPT_SQL)
+
+
+async def key_hash_set(conn: Connection, key_id, prefix: str, key_hash: str):
+    params = {'key_id': key_id, 'prefix': prefix, 'key_hash': key_hash}
+    SCRIPT_SQL = """
+        UPDATE public.keys
+        SET prefix = %(prefix)s, key_hash = %(key_hash)s, key = NULL
         WHERE key_id = %(key_id)s;
         """
     return await conn.exec(SCRIPT_SQL, params)
@@ -135,9 +212,10 @@ async def key_get(conn, user):
         SELECT
             k.key_id,
             row_to_json(u) AS "user",
-            LEFT(k.key, 10) || '...' AS key ,
+            COALESCE(k.prefix, LEFT(k.key, 12)) || '...' AS key,
             k.name,
             k.last_used,
+            k.request_count,
             k.created_at
         FROM public.keys AS k
         JOIN users AS u ON k.user_id = u.user_id 
@@ -11,8 +11,9 @@ from simcc.core.connection import Connection
 from simcc.core.database import get_conn
 from simcc.schemas import user_model
 from simcc.security import (
-    create_access_token,
     get_current_user,
+    get_token_user,
+    issue_access_token,
     validate_google_token,
     validate_orcid_code,
 )
@@ -68,7 +69,7 @@ async def orcid_login():
 async def orcid_callback(code: str, conn: Conn):
     orcid_claims = await validate_orcid_code(code)
     user = await user_service.get_or_create_user_by_orcid(conn, orcid_claims)
-    app_token = create_access_token(data={'sub': user.email})
+    app_token = await issue_access_token(conn, user.email)
 
     URL = f'{Settings().URL}authentication?token={app_token}'
     response = RedirectResponse(url=URL, status_code=302)
@@ -108,7 +109,7 @@ async def shibboleth_login(
     user = await user_service.get_or_create_user_by_shibboleth(
         conn, shib_user_data
     )
-    app_token = create_access_token(data={'sub': user.email})
+    app_token = await issue_access_token(conn, user.email)
     URL = f'{Settings().URL}authentication?token={app_token}'
     response = RedirectResponse(url=URL, status_code=302)
 
@@ -141,7 +142,7 @@ async def google_callback(code: str, conn: Conn):
     user = await user_service.get_or_create_user_by_google(
         conn=conn, google_payload=google_payload
     )
-    access_token = create_access_token(data={'sub': user.email})
+    access_token = await issue_access_token(conn, user.email)
 
     response = RedirectResponse(url=Settings().URL, status_code=302)
 
@@ -163,7 +164,7 @@ async def google_callback(code: str, conn: Conn):
 )
 async def key_post(
     key: user_model.CreateKey,
-    current_user: user_model.User = Depends(get_current_user),
+    current_user: user_model.User = Depends(get_token_user),
     conn: Connection = Depends(get_conn),
 ):
     return await user_service.key_post(conn, current_user, key)
@@ -2,11 +2,12 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, WebSocket
+from fastapi import APIRouter, Depends, Request, WebSocket
 from redis.asyncio.client import Redis
 
-from simcc.core.connection import Connection
-from simcc.core.database import get_cache_conn, get_conn
+from simcc.core.connection import Connection, UnitOfWork
+from simcc.core.database import get_cache_conn, get_conn, get_uow
+from simcc.core.streaming import stream_rows
 from simcc.schemas import user_model
 from simcc.schemas.features import chat_schema
 from simcc.security import get_current_user, get_current_user_from_websocket
@@ -15,6 +16,7 @@ from simcc.services.features import chat_service
 router = APIRouter()
 
 Conn = Annotated[Connection, Depends(get_conn)]
+UoW = Annotated[UnitOfWork, Depends(get_uow)]
 Cache = Annotated[Redis, Depends(get_cache_conn)]
 CurrentUser = Annotated[user_model.User, Depends(get_current_user)]
 CurrentUserWS = Annotated[
@@ -28,14 +30,15 @@ CurrentUserWS = Annotated[
     status_code=HTTPStatus.CREATED,
 )
 async def create_chat(
-    conn: Conn, current_user: CurrentUser, chat: chat_schema.ChatSchema
+    uow: UoW, current_user: CurrentUser, chat: chat_schema.ChatSchema
 ):
-    return await chat_service.create_private_chat(conn, current_user, chat)
+    return await chat_service.create_private_chat(uow, current_user, chat)
 
 
 @router.get('/chat/', response_model=list[chat_schema.ChatPubic])
-async def get_chats(conn: Conn, current_user: CurrentUser):
-    return await chat_service.get_chats(conn, current_user)
+async def get_chats(request: Request, conn: Conn, current_user: CurrentUser):
+    rows = await chat_service.get_chats(conn, current_user, stream=True)
+    return stream_rows(request, rows, chat_schema.ChatPubic)
 
 
 @router.websocket('/ws/chat/{chat_id}')
@@ -4,8 +4,8 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from simcc.core.connection import Connection
-from simcc.core.database import get_conn
+from simcc.core.connection import Connection, UnitOfWork
+from simcc.core.database import get_conn, get_uow
 from simcc.schemas import user_model
 from simcc.schemas.features import collection_models
 from simcc.security import get_current_user
@@ -14,6 +14,7 @@ from simcc.services.features import collection_service
 router = APIRouter(prefix='/collection')
 
 Conn = Annotated[Connection, Depends(get_conn)]
+UoW = Annotated[UnitOfWork, Depends(get_uow)]
 CurrentUser = Annotated[user_model.User, Depends(get_current_user)]
 
 
@@ -107,10 +108,10 @@ async def collection_entries_post(
     collection_id: UUID,
     entry: collection_models.CreateCollectionEntry,
     current_user: CurrentUser,
-    conn: Conn,
+    uow: UoW,
 ):
     return await collection_service.post_entries(
-        conn,
+        uow,
         collection_id=collection_id,
         entry=entry,
         user=current_user,
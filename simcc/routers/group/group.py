@@ -2,10 +2,11 @@ from http import HTTPStatus
 from typing import Annotated, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from simcc.core.connection import Connection
 from simcc.core.database import get_conn
+from simcc.core.streaming import stream_rows
 from simcc.schemas import user_model
 from simcc.schemas.group_schemas import GroupPublic, GroupSchema, GroupUpdate
 from simcc.security import get_current_user
@@ -36,10 +37,12 @@ async def create_group(
 )
 @router.get('/', response_model=List[GroupPublic])
 async def list_groups(
+    request: Request,
     conn: Conn,
     current_user: CurrentUser,
 ):
-    return await group_service.list_groups(conn)
+    rows = await group_service.list_groups(conn, stream=True)
+    return stream_rows(request, rows, GroupPublic)
 
 
 @router.get('/{group_id}', response_model=GroupPublic)
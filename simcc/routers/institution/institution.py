@@ -5,7 +5,8 @@ from fastapi import APIRouter, Body, Depends, HTTPException
 
 from simcc.core.connection import Connection
 from simcc.core.database import get_conn
-from simcc.schemas import institution_model, user_model
+from simcc.routers.rbac import admin_required
+from simcc.schemas import bulk_model, institution_model, user_model
 from simcc.security import get_current_user
 from simcc.services import institution_service
 
@@ -30,6 +31,19 @@ async def post_institution(
     return await institution_service.post_institution(institution, conn)
 
 
+@router.post(
+    '/institution/bulk/',
+    response_model=bulk_model.BulkResult,
+    status_code=HTTPStatus.CREATED,
+)
+async def post_institution_bulk(
+    institutions: list[institution_model.CreateInstitution],
+    conn: Connection = Depends(get_conn),
+    current_user: user_model.User = Depends(get_current_user),
+):
+    return await institution_service.post_institution_bulk(institutions, conn)
+
+
 @router.get(
     '/Query/Count',
     deprecated=True,
@@ -54,6 +68,20 @@ async def get_institution(
     return institution
 
 
+@router.post(
+    '/institution/stats/rebuild/',
+    response_model=institution_model.InstitutionStatsRefresh,
+)
+async def rebuild_institution_stats(
+    institution_id: UUID = None,
+    conn: Connection = Depends(get_conn),
+    current_user: user_model.User = Depends(admin_required),
+):
+    return await institution_service.refresh_institution_stats(
+        conn, institution_id
+    )
+
+
 @router.put(
     '/InstitutionRest/Update',
     deprecated=True,
@@ -8,12 +8,12 @@ from simcc.core.connection import Connection
 from simcc.core.database import get_conn
 from simcc.schemas import user_model
 from simcc.security import (
-    get_current_user,
+    get_token_user,
 )
 from simcc.services import user_service
 
 Conn = Annotated[Connection, Depends(get_conn)]
-CurrentUser = Annotated[user_model.User, Depends(get_current_user)]
+CurrentUser = Annotated[user_model.User, Depends(get_token_user)]
 
 router = APIRouter()
 
@@ -25,7 +25,7 @@ router = APIRouter()
 )
 async def key_post(
     key: user_model.CreateKey,
-    current_user: user_model.User = Depends(get_current_user),
+    current_user: user_model.User = Depends(get_token_user),
     conn: Connection = Depends(get_conn),
 ):
     return await user_service.key_post(conn, current_user, key)
@@ -36,7 +36,7 @@ async def key_post(
     response_model=list[user_model.KeyPublic],
 )
 async def key_get(
-    current_user: user_model.User = Depends(get_current_user),
+    current_user: user_model.User = Depends(get_token_user),
     conn: Connection = Depends(get_conn),
 ):
     return await user_service.key_get(conn, current_user)
@@ -48,7 +48,7 @@ async def key_get(
 )
 async def key_delete(
     key_id: UUID,
-    current_user: user_model.User = Depends(get_current_user),
+    current_user: user_model.User = Depends(get_token_user),
     conn: Connection = Depends(get_conn),
 ):
-    await user_service.key_delete(conn, key_id)
+    await user_service.key_delete(conn, current_user.user_id, key_id)
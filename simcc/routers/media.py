@@ -0,0 +1,157 @@
+from http import HTTPStatus
+from typing import Annotated, Awaitable, Callable, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    UploadFile,
+)
+from fastapi.responses import FileResponse, Response
+
+from simcc.config import Settings
+from simcc.core.connection import Connection
+from simcc.core.database import get_conn
+from simcc.schemas.media_model import EntityType, Media, VariantSize
+from simcc.services import media_service
+
+Conn = Annotated[Connection, Depends(get_conn)]
+ImageFormat = Annotated[Optional[Literal['webp']], Query(alias='format')]
+
+
+def get_variant(
+    size: Optional[VariantSize] = None, image_format: ImageFormat = None
+) -> Optional[str]:
+    return media_service.variant_name(size, image_format)
+
+
+Variant = Annotated[Optional[str], Depends(get_variant)]
+IfNoneMatch = Annotated[Optional[str], Header()]
+BatchIds = Annotated[
+    list[str], Query(min_length=1, max_length=Settings().MEDIA_BATCH_SIZE)
+]
+Fallback = Callable[[Connection, str, Optional[str]], Awaitable[Response]]
+Remover = Callable[[Connection, str], Awaitable[bool]]
+
+
+def add_batch_route(router: APIRouter, entity_type: EntityType, kind: str):
+    """GET /{kind}?ids=...: URLs, or inline data URIs, of many entities."""
+
+    async def get_media_batch(
+        conn: Conn, ids: BatchIds, variant: Variant, inline: bool = False
+    ):
+        found = await media_service.find_media_batch(
+            conn, entity_type, ids, kind, variant
+        )
+        if inline:
+            return await media_service.data_uris(found)
+        return media_service.media_urls(found)
+
+    router.add_api_route(
+        f'/{kind}',
+        get_media_batch,
+        methods=['GET'],
+        response_model=dict[str, Optional[str]],
+        name=f'get_{entity_type}_{kind}_batch',
+    )
+
+
+def _add_routes(
+    router: APIRouter,
+    entity_type: EntityType,
+    kind: str,
+    fallback: Optional[Fallback] = None,
+    remover: Optional[Remover] = None,
+):
+    async def get_media(
+        entity_id: str,
+        conn: Conn,
+        variant: Variant,
+        if_none_match: IfNoneMatch = None,
+    ):
+        try:
+            media = await media_service.find_media(
+                conn, entity_type, entity_id, kind, variant
+            )
+        except HTTPException as e:
+            if (
+                not fallback
+                or variant
+                or e.status_code != HTTPStatus.NOT_FOUND
+            ):
+                raise
+            await media_service.ensure_entity(conn, entity_type, entity_id)
+            return await fallback(conn, entity_id, if_none_match)
+        return media_service.file_response(media, if_none_match)
+
+    async def upload_media(
+        entity_id: str, conn: Conn, file: UploadFile = File(...)
+    ):
+        await media_service.ensure_entity(conn, entity_type, entity_id)
+        return await media_service.save_file(
+            conn, entity_type, entity_id, kind, file
+        )
+
+    async def delete_media(entity_id: str, conn: Conn):
+        await media_service.ensure_entity(conn, entity_type, entity_id)
+        removed = remover and await remover(conn, entity_id)
+        try:
+            return await media_service.delete_file(
+                conn, entity_type, entity_id, kind
+            )
+        except HTTPException as e:
+            if not removed or e.status_code != HTTPStatus.NOT_FOUND:
+                raise
+        return {'message': media_service.DELETED[kind]}
+
+    add_batch_route(router, entity_type, kind)
+
+    path = f'/{{entity_id}}/{kind}'
+    router.add_api_route(
+        path,
+        get_media,
+        methods=['GET'],
+        response_class=FileResponse,
+        name=f'get_{entity_type}_{kind}',
+    )
+    router.add_api_route(
+        path,
+        upload_media,
+        methods=['POST'],
+        status_code=HTTPStatus.CREATED,
+        response_model=Media,
+        name=f'upload_{entity_type}_{kind}',
+    )
+    router.add_api_route(
+        path,
+        delete_media,
+        methods=['DELETE'],
+        status_code=HTTPStatus.OK,
+        name=f'delete_{entity_type}_{kind}',
+    )
+
+
+def entity_media_router(
+    prefix: str,
+    entity_type: EntityType,
+    fallbacks: Optional[dict[str, Fallback]] = None,
+    removers: Optional[dict[str, Remover]] = None,
+) -> APIRouter:
+    """Icon and cover endpoints of an entity, backed by media_service.
+
+    A fallback serves a kind the media table has nothing for, typically
+    from where the entity kept its images before. It only has originals,
+    so variant requests on that path are answered 404. A remover empties
+    that old place on delete, so a deleted image is not served from it.
+    """
+    fallbacks = fallbacks or {}
+    removers = removers or {}
+    router = APIRouter(prefix=prefix)
+    for kind in ('icon', 'cover'):
+        _add_routes(
+            router, entity_type, kind, fallbacks.get(kind), removers.get(kind)
+        )
+    return router
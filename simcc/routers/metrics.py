@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from redis.asyncio import Redis
+
+from simcc.config import Settings
+from simcc.core.database import get_cache_conn
+from simcc.core.metrics import registry
+
+router = APIRouter()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics(redis: Redis = Depends(get_cache_conn)):
+    interval = Settings().METRICS_FLUSH_INTERVAL
+    await registry.flush(redis, ttl=int(interval * 3))
+    values = await registry.snapshot(redis)
+    return PlainTextResponse(registry.render(values), media_type=CONTENT_TYPE)
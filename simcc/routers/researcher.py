@@ -1,11 +1,12 @@
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 
 from simcc.core.connection import Connection
 from simcc.core.database import get_conn
-from simcc.schemas import researcher_model
+from simcc.core.streaming import stream_rows
+from simcc.schemas import bulk_model, researcher_model
 from simcc.services import researcher_service
 
 router = APIRouter()
@@ -26,16 +27,47 @@ async def researcher_post(
     return await researcher_service.researcher_post(conn, researcher)
 
 
+@router.post(
+    '/researcher/bulk/',
+    status_code=HTTPStatus.CREATED,
+    response_model=bulk_model.BulkResult,
+)
+async def researcher_bulk_post(
+    researchers: list[researcher_model.CreateResearcher],
+    conn: Connection = Depends(get_conn),
+):
+    return await researcher_service.researcher_bulk_post(conn, researchers)
+
+
 @router.get(
     '/researcher/',
     response_model=list[researcher_model.ResearcherResponse],
 )
 async def researcher_get(
+    request: Request,
     institution_id: UUID = None,
     name: str = None,
     conn: Connection = Depends(get_conn),
 ):
-    return await researcher_service.researcher_get(conn, institution_id, name)
+    rows = await researcher_service.researcher_get(
+        conn, institution_id, name, stream=True
+    )
+    return stream_rows(request, rows, researcher_model.ResearcherResponse)
+
+
+@router.get(
+    '/researcher/search/',
+    response_model=list[researcher_model.ResearcherSearchResult],
+)
+async def researcher_search(
+    q: str = Query(min_length=3),
+    institution_id: UUID = None,
+    limit: int = Query(20, ge=1, le=100),
+    conn: Connection = Depends(get_conn),
+):
+    return await researcher_service.researcher_search(
+        conn, q, institution_id, limit
+    )
 
 
 @router.put(
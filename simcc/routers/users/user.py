@@ -2,13 +2,14 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
 from simcc.core.connection import Connection
 from simcc.core.database import get_conn
+from simcc.core.streaming import stream_rows
 from simcc.exceptions import ForbiddenException
 from simcc.schemas import rbac_model, user_model
-from simcc.security import get_current_user
+from simcc.security import get_current_profile, get_current_user
 from simcc.services import rbac_service, user_service
 
 router = APIRouter()
@@ -17,6 +18,7 @@ ALLOWED = ['ADMIN']
 
 Conn = Annotated[Connection, Depends(get_conn)]
 CurrentUser = Annotated[user_model.User, Depends(get_current_user)]
+CurrentProfile = Annotated[user_model.User, Depends(get_current_profile)]
 
 
 @router.post(
@@ -29,21 +31,23 @@ async def post_user(user: user_model.UserSchema, conn: Conn):
 
 
 @router.get('/user/', response_model=list[user_model.UserPublicAdmin])
-async def get_user(current_user: CurrentUser, conn: Conn):
+async def get_user(request: Request, current_user: CurrentUser, conn: Conn):
     if not set(current_user.permissions) & set(ALLOWED):
         raise ForbiddenException
-    return await user_service.get_user(conn)
+    rows = await user_service.get_user(conn, stream=True)
+    return stream_rows(request, rows, user_model.UserPublicAdmin)
 
 
 @router.get('/s/user', include_in_schema=False)
 @router.get('/user/my-self/', response_model=user_model.UserPublicAdmin)
-async def get_me(current_user: CurrentUser):
+async def get_me(current_user: CurrentProfile):
     return current_user
 
 
 @router.get('/user/public/', response_model=list[user_model.UserPublic])
-async def get_public_users(conn: Conn, username: str = None):
-    return await user_service.get_user(conn, None, None, username)
+async def get_public_users(request: Request, conn: Conn, username: str = None):
+    rows = await user_service.get_user(conn, None, None, username, stream=True)
+    return stream_rows(request, rows, user_model.UserPublic)
 
 
 @router.get('/user/{id}/', response_model=user_model.UserPublicAdmin)
@@ -57,7 +61,7 @@ async def get_single_user(id: UUID, current_user: CurrentUser, conn: Conn):
 
 @router.put('/user/', response_model=user_model.User)
 async def put_user(
-    user: user_model.User, current_user: CurrentUser, conn: Conn
+    user: user_model.UserUpdate, current_user: CurrentUser, conn: Conn
 ):
     has_permission = any(p in current_user.permissions for p in ALLOWED)
     is_self = current_user.user_id == user.user_id
@@ -0,0 +1,18 @@
+from typing import Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class BulkRow(BaseModel):
+    n: int
+    id: Optional[UUID] = None
+    status: Literal['inserted', 'updated', 'rejected']
+    reason: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    rows: list[BulkRow] = []
@@ -36,6 +36,11 @@ class InstitutionStats(BaseModel):
 
     researchers: list[str]
 
+    refreshed_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
     deleted_at: Optional[datetime] = None
+
+
+class InstitutionStatsRefresh(BaseModel):
+    refreshed: int
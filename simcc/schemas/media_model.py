@@ -0,0 +1,29 @@
+from datetime import datetime
+from enum import IntEnum
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+EntityType = Literal[
+    'user', 'institution', 'group', 'program', 'department', 'collection'
+]
+MediaKind = Literal['icon', 'cover']
+
+
+class VariantSize(IntEnum):
+    SMALL = 64
+    MEDIUM = 256
+    LARGE = 1024
+
+
+class Media(BaseModel):
+    entity_type: EntityType
+    entity_id: str
+    kind: MediaKind
+    variant: str = 'original'
+    path: str
+    content_type: Optional[str] = None
+    size: int
+    hash: str
+    mtime: datetime = Field(default_factory=datetime.now)
+    url: Optional[str] = None
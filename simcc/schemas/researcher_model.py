@@ -32,3 +32,7 @@ class ResearcherResponse(BaseModel):
     deleted_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ResearcherSearchResult(ResearcherResponse):
+    score: float
@@ -42,8 +42,29 @@ class User(BaseModel):
     updated_at: datetime | None = None
 
 
+class UserUpdate(User):
+    """A user as sent to PUT /user/; no password keeps the current one."""
+
+    password: Optional[str] = None
+
+
+class AuthenticatedUser(User):
+    """A user as resolved from credentials, without the password hash."""
+
+    password: Optional[str] = None
+
+
+class Principal(BaseModel):
+    """Who is calling and what they may do, as carried by an access token."""
+
+    user_id: UUID
+    email: EmailStr
+    permissions: list = []
+    roles: list = []
+
+
 class UserPublicAdmin(User):
-    password: str = Field(exclude=True)
+    password: Optional[str] = Field(default=None, exclude=True)
     created_at: datetime = Field(exclude=True)
     updated_at: datetime | None = Field(exclude=True)
 
@@ -88,4 +109,6 @@ class KeyPublic(BaseModel):
     user: dict
     key: str = Field(default_factory=lambda: token_urlsafe(32))
     created_at: datetime = Field(default_factory=datetime.now)
+    last_used: Optional[datetime] = None
+    request_count: int = 0
     deleted_at: Optional[datetime] = None
@@ -0,0 +1,56 @@
+"""Find the argon2 parameters this machine can afford for passwords.
+
+python -m simcc.scripts.calibrate_passwords [--target-ms 250]
+    [--memory-mib 256] [--concurrency N] [--parallelism N]
+
+Hashes run --concurrency at a time, PASSWORD_HASH_WORKERS by default,
+and together may use at most --memory-mib. The parameters printed go to
+the environment; hashes made with older ones are upgraded at login.
+"""
+
+import argparse
+
+from simcc.config import Settings
+from simcc.core import passwords
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target-ms', type=float, default=250)
+    parser.add_argument('--memory-mib', type=int, default=256)
+    parser.add_argument(
+        '--concurrency', type=int, default=settings.PASSWORD_HASH_WORKERS
+    )
+    parser.add_argument(
+        '--parallelism',
+        type=int,
+        default=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+    args = parser.parse_args()
+
+    results = passwords.calibrate(
+        args.target_ms / 1000,
+        args.concurrency,
+        args.memory_mib * 1024,
+        args.parallelism,
+    )
+    for result in results:
+        print(
+            f'time_cost={result["time_cost"]} '
+            f'memory_cost={result["memory_cost"]} KiB '
+            f'parallelism={result["parallelism"]}: '
+            f'{result["seconds"] * 1000:.0f} ms'
+        )
+    if not results:
+        print('Nenhum parâmetro atende ao tempo alvo.')
+        return
+    best = results[0]
+    print()
+    print(f'PASSWORD_ARGON2_TIME_COST={best["time_cost"]}')
+    print(f'PASSWORD_ARGON2_MEMORY_COST={best["memory_cost"]}')
+    print(f'PASSWORD_ARGON2_PARALLELISM={best["parallelism"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""Hash API keys created before keys were stored as prefix and HMAC.
+
+python -m simcc.scripts.hash_api_keys
+
+Until this runs, those keys are listed but not accepted.
+"""
+
+import asyncio
+
+from simcc.core.database import conn
+from simcc.services import user_service
+
+
+async def main():
+    await conn.connect()
+    try:
+        hashed = await user_service.hash_legacy_keys(conn)
+        print(f'{hashed} chaves protegidas.')
+    finally:
+        await conn.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
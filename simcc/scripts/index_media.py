@@ -0,0 +1,22 @@
+"""Index the uploads saved before the media table existed.
+
+python -m simcc.scripts.index_media
+"""
+
+import asyncio
+
+from simcc.core.database import conn
+from simcc.services import media_service
+
+
+async def main():
+    await conn.connect()
+    try:
+        indexed = await media_service.index_legacy_files(conn)
+        print(f'{indexed} arquivos indexados.')
+    finally:
+        await conn.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+"""Move department images from ufmg.departament.img_data to the media table.
+
+python -m simcc.scripts.migrate_department_images [--keep]
+
+With --keep, img_data is left in place for readers that still use it.
+"""
+
+import asyncio
+import sys
+
+from simcc.core.database import conn
+from simcc.services import department_service
+
+
+async def main(keep: bool):
+    await conn.connect()
+    try:
+        migrated = await department_service.migrate_images(conn, keep)
+        print(f'{migrated} imagens migradas.')
+    finally:
+        await conn.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main('--keep' in sys.argv[1:]))
@@ -1,9 +1,10 @@
+import logging
+import time
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from typing import List, Optional
 from zoneinfo import ZoneInfo
 
-import httpx
 from fastapi import (
     Depends,
     HTTPException,
@@ -13,46 +14,73 @@ from fastapi import (
     WebSocketException,
     status,
 )
-from fastapi.security import OAuth2PasswordBearer
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError
 from jose import jwt as jwtJose
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
-from pwdlib import PasswordHash
+from redis.exceptions import RedisError
 
 from simcc.config import Settings
+from simcc.core import api_keys, oauth, passwords
 from simcc.core.connection import Connection
-from simcc.core.database import get_conn
+from simcc.core.database import get_conn, key_cache, principal_cache
+from simcc.core.metrics import Registry, registry
+from simcc.core.oauth import KeyCache
+from simcc.core.workers import PoolSaturated, hash_pool
+from simcc.repositories import user_repository
 from simcc.schemas import user_model
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = Settings().SECRET_KEY
 ALGORITHM = 'HS256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 10080
-pwd_context = PasswordHash.recommended()
+EMBEDDED_CLAIMS = Settings().AUTH_EMBEDDED_CLAIMS
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=Settings().ROOT_PATH_ADMIN + '/login', auto_error=False
 )
+api_key_scheme = APIKeyHeader(name='X-API-Key', auto_error=False)
+KEY_NEGATIVE_TTL = Settings().API_KEY_CACHE_NEGATIVE_TTL
 
 
 ORCID_TOKEN_URL = 'https://orcid.org/oauth/token'
 ORCID_JWKS_URL = 'https://orcid.org/oauth/jwks'
 
 GOOGLE_TOKEN_URL = 'https://oauth2.googleapis.com/token'
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v3/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+orcid_keys = KeyCache(ORCID_JWKS_URL)
+google_keys = KeyCache(GOOGLE_CERTS_URL)
 
 
 async def get_current_user(
+    request: Request,
+    token: Optional[str] = Security(oauth2_scheme),
+    api_key: Optional[str] = Security(api_key_scheme),
+    conn: Connection = Depends(get_conn),
+):
+    if not token and api_key:
+        return await _api_key_principal(api_key, conn)
+    return await get_token_user(request, token, conn)
+
+
+async def get_token_user(
     request: Request,
     token: Optional[str] = Security(oauth2_scheme),
     conn: Connection = Depends(get_conn),
 ):
+    """User behind a bearer token or the session cookie, never an API key.
+
+    For endpoints a leaked key must not reach, like the ones managing keys.
+    """
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
     if not token:
-        token = request.cookies.get('Authorization')
+        token = request.cookies.get('Authorization') or str()
         token = token.replace('Bearer ', '', 1)
         if not token:
             raise credentials_exception
@@ -65,7 +93,31 @@ async def get_current_user(
     except (DecodeError, ExpiredSignatureError):
         raise credentials_exception
 
-    return await _get_user_by_email(subject_email, conn)
+    return await _resolve_principal(payload, conn)
+
+
+async def get_api_key_user(
+    api_key: Optional[str] = Security(api_key_scheme),
+    conn: Connection = Depends(get_conn),
+):
+    """User behind the X-API-Key header, for integrations."""
+    if not api_key:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Could not validate credentials',
+            headers={'WWW-Authenticate': 'APIKey'},
+        )
+    return await _api_key_principal(api_key, conn)
+
+
+async def get_current_profile(
+    current_user: user_model.User = Depends(get_current_user),
+    conn: Connection = Depends(get_conn),
+) -> user_model.User:
+    """The whole user behind the token, for endpoints that return it."""
+    if isinstance(current_user, user_model.Principal):
+        return await _get_principal(current_user.email, conn)
+    return current_user
 
 
 async def get_current_user_from_websocket(
@@ -91,14 +143,14 @@ async def get_current_user_from_websocket(
             reason='Invalid or expired token',
         )
 
-    return await _get_user_by_email(subject_email, conn)
+    return await _resolve_principal(payload, conn)
 
 
 def authorize_user(allowed_roles: List[str]):
     async def role_checker(
         current_user: user_model.UserPublicAdmin = Depends(get_current_user),
     ):
-        user_roles = {role.name for role in current_user.roles}
+        user_roles = {role['role_id'] for role in current_user.roles}
 
         if not user_roles.intersection(allowed_roles):
             raise HTTPException(
@@ -120,12 +172,92 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
+async def issue_access_token(conn: Connection, email: str) -> str:
+    """Access token for email, carrying its roles and permissions when
+    AUTH_EMBEDDED_CLAIMS is set.
+
+    Such tokens also carry the user's authz version, and are only trusted
+    while it matches the one kept in Redis; see _claims_principal. Roles
+    are read from the database after the version, never from the principal
+    cache, whose local layer may still hold roles that version revoked.
+    """
+    data = {'sub': email}
+    if EMBEDDED_CLAIMS and (version := await _authz_version(email)):
+        user = (await _get_user_by_email(email, conn)).model_dump(mode='json')
+        data.update(
+            uid=user['user_id'],
+            roles=user['roles'],
+            permissions=user['permissions'],
+            ver=version,
+        )
+    return create_access_token(data)
+
+
+async def _run_hasher(operation: str, func, *args):
+    """Run argon2 in hash_pool, answering 429 while the pool is full."""
+    start = time.perf_counter()
+    try:
+        result = await hash_pool.run(func, *args)
+    except PoolSaturated:
+        registry.inc('password_hash_rejected_total', operation=operation)
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Muitas autenticações simultâneas, tente novamente.',
+            headers={'Retry-After': '1'},
+        )
+    registry.observe(
+        'password_hash_duration_seconds',
+        time.perf_counter() - start,
+        operation=operation,
+    )
+    return result
 
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+@registry.collector
+def hash_pool_metrics(registry: Registry):
+    registry.gauge_set('password_hash_pending', hash_pool.pending)
+
+
+async def get_password_hash(password: str) -> str:
+    return await _run_hasher('hash', passwords.hash_password, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hasher(
+        'verify', passwords.verify_password, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Like verify_password, plus a new hash when the parameters changed."""
+    return await _run_hasher(
+        'verify', passwords.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def _signing_key(token: str, keys: KeyCache, provider: str) -> dict:
+    """Key an ID token was signed with, from the provider's cached keys."""
+    try:
+        kid = jwtJose.get_unverified_header(token).get('kid')
+    except JWTError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail=f'Erro na validação do token {provider}: {e}',
+        )
+    key = await keys.get(kid)
+    if key is None and not keys.keys:
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail=f'Não foi possível obter as chaves de validação do {provider}.',  # noqa: E501
+        )
+    if key is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail=f'Erro na validação do token {provider}: chave desconhecida.',  # noqa: E501
+        )
+    return key
 
 
 async def validate_orcid_code(code: str) -> dict:
@@ -137,39 +269,31 @@ async def validate_orcid_code(code: str) -> dict:
         'redirect_uri': Settings().ORCID_REDIRECT_URI,
     }
 
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            ORCID_TOKEN_URL,
-            data=token_request_payload,
+    token_response = await oauth.client.post(
+        ORCID_TOKEN_URL,
+        data=token_request_payload,
+    )
+    if token_response.status_code != HTTPStatus.OK:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Falha ao trocar o código de autorização com o ORCID.',
         )
-        if token_response.status_code != HTTPStatus.OK:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Falha ao trocar o código de autorização com o ORCID.',
-            )
 
-        token_data = token_response.json()
-        id_token = token_data.get('id_token')
-        access_token = token_data.get('access_token')
-
-        if not id_token or not access_token:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Token de ID ou de Acesso não encontrado na resposta do ORCID.',  # noqa: E501
-            )
+    token_data = token_response.json()
+    id_token = token_data.get('id_token')
+    access_token = token_data.get('access_token')
 
-        jwks_response = await client.get(ORCID_JWKS_URL)
-        if jwks_response.status_code != HTTPStatus.OK:
-            raise HTTPException(
-                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-                detail='Não foi possível obter as chaves de validação do ORCID.',  # noqa: E501
-            )
-        jwks = jwks_response.json()
+    if not id_token or not access_token:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Token de ID ou de Acesso não encontrado na resposta do ORCID.',  # noqa: E501
+        )
 
+    key = await _signing_key(id_token, orcid_keys, 'ORCID')
     try:
         payload = jwtJose.decode(
             id_token,
-            jwks,
+            key,
             algorithms=['RS256'],
             audience=Settings().ORCID_CLIENT_ID,
             issuer='https://orcid.org',
@@ -198,47 +322,185 @@ async def validate_google_token(code: str) -> dict:
         'grant_type': 'authorization_code',
     }
 
-    try:
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                GOOGLE_TOKEN_URL,
-                data=token_request_payload,
-            )
-            if token_response.status_code != HTTPStatus.OK:
-                raise HTTPException(
-                    status_code=HTTPStatus.BAD_REQUEST,
-                    detail='Falha ao trocar o código de autorização com o GOOGLE.',  # noqa: E501
-                )
-            token_data = token_response.json()
-
-        id_token_str = token_data.get('id_token')
-        if not id_token_str:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Token de ID ou de Acesso não encontrado na resposta do GOOGLE.',  # noqa: E501
-            )
-
-        request = google_requests.Request()
-        id_info = id_token.verify_oauth2_token(
-            id_token_str, request, Settings().GOOGLE_CLIENT_ID
+    token_response = await oauth.client.post(
+        GOOGLE_TOKEN_URL,
+        data=token_request_payload,
+    )
+    if token_response.status_code != HTTPStatus.OK:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Falha ao trocar o código de autorização com o GOOGLE.',
+        )
+    token_data = token_response.json()
+    id_token = token_data.get('id_token')
+    access_token = token_data.get('access_token')
+    if not id_token or not access_token:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Token de ID ou de Acesso não encontrado na resposta do GOOGLE.',  # noqa: E501
         )
-        return id_info
 
-    except httpx.HTTPStatusError as e:
+    key = await _signing_key(id_token, google_keys, 'GOOGLE')
+    try:
+        return jwtJose.decode(
+            id_token,
+            key,
+            algorithms=['RS256'],
+            audience=Settings().GOOGLE_CLIENT_ID,
+            issuer=GOOGLE_ISSUERS,
+            access_token=access_token,
+            options={'require_aud': True, 'require_exp': True},
+        )
+    except JWTError as e:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail=f'Erro na validação do token GOOGLE: {e}',
         )
-    except ValueError as e:
+
+
+async def get_principal_emails(
+    conn: Connection, user_id=None, role_id=None
+) -> list[str]:
+    params = {}
+    filters = str()
+
+    if user_id:
+        params['user_id'] = user_id
+        filters += ' AND u.user_id = %(user_id)s'
+
+    if role_id:
+        params['role_id'] = role_id
+        filters += ' AND ur.role_id = %(role_id)s'
+
+    SCRIPT_SQL = f"""
+        SELECT DISTINCT u.email
+        FROM public.users u
+            LEFT JOIN public.user_roles ur
+                ON ur.user_id = u.user_id
+        WHERE 1 = 1
+            {filters}
+        """
+    rows = await conn.select(SCRIPT_SQL, params)
+    return [row['email'] for row in rows]
+
+
+async def invalidate_principals(emails: list[str], claims: bool = True):
+    """Forget cached users, and with claims, the roles in their tokens."""
+    emails = {e for e in emails if e}
+    await principal_cache.invalidate(*emails)
+    if claims and emails:
+        await _revoke_claims(emails)
+
+
+def _authz_key(email: str) -> str:
+    return f'authz:{email}'
+
+
+async def _authz_version(email: str) -> int | None:
+    """Version to embed in a new token, created when the user has none."""
+    key = _authz_key(email)
+    try:
+        async with principal_cache.redis.pipeline() as pipe:
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.expire(key, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+            pipe.get(key)
+            *_, version = await pipe.execute()
+    except (RedisError, OSError) as e:
+        logger.warning('Authz version unavailable for %s: %s', email, e)
+        return None
+    return int(version)
+
+
+async def _revoke_claims(emails: set[str]):
+    """Move existing authz versions on, so older claims stop matching."""
+    version = time.time_ns()
+    try:
+        async with principal_cache.redis.pipeline() as pipe:
+            for email in emails:
+                pipe.set(_authz_key(email), version, xx=True, keepttl=True)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        logger.error('Authz versions not revoked for %s: %s', emails, e)
+
+
+async def _claims_principal(payload: dict) -> user_model.Principal | None:
+    """Principal embedded in the token, None when it may be outdated.
+
+    Tokens without a version, a version Redis does not know or that roles
+    changed since are all left to the regular lookup.
+    """
+    if not EMBEDDED_CLAIMS or 'ver' not in payload:
+        return None
+    try:
+        version = await principal_cache.redis.get(_authz_key(payload['sub']))
+    except (RedisError, OSError) as e:
+        logger.warning('Authz version check failed: %s', e)
+        return None
+    if version is None or int(version) != payload['ver']:
+        return None
+    return user_model.Principal(
+        user_id=payload['uid'],
+        email=payload['sub'],
+        roles=payload['roles'],
+        permissions=payload['permissions'],
+    )
+
+
+async def _resolve_principal(payload: dict, conn: Connection):
+    if principal := await _claims_principal(payload):
+        return principal
+    return await _get_principal(payload['sub'], conn)
+
+
+async def _find_api_key(prefix: str, conn: Connection) -> dict | None:
+    """Id, hash and owner of the live key with prefix, cached briefly.
+
+    Unknown prefixes are cached as False for KEY_NEGATIVE_TTL so guessing
+    does not reach the database on every request.
+    """
+    key = await key_cache.get(prefix)
+    if key is None:
+        key = await user_repository.key_by_prefix(conn, prefix) or False
+        if key:
+            key = {**key, 'key_id': str(key['key_id'])}
+        await key_cache.set(prefix, key, None if key else KEY_NEGATIVE_TTL)
+    return key or None
+
+
+async def forget_api_keys(*prefixes: str):
+    """Drop cached keys after they are created or revoked."""
+    await key_cache.delete(*[p for p in prefixes if p])
+
+
+async def _api_key_principal(api_key: str, conn: Connection):
+    key = await _find_api_key(api_keys.key_prefix(api_key), conn)
+    if not key or not api_keys.verify_key(api_key, key['key_hash']):
         raise HTTPException(
-            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-            detail=f'Erro inesperado no processamento do token: {e}',
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Could not validate credentials',
+            headers={'WWW-Authenticate': 'APIKey'},
         )
+    api_keys.key_usage.record(key['key_id'])
+    return await _get_principal(key['email'], conn)
+
+
+async def _get_principal(
+    email: str, conn: Connection
+) -> user_model.AuthenticatedUser:
+    if cached := await principal_cache.get(email):
+        return user_model.AuthenticatedUser(**cached)
+
+    generation = await principal_cache.generation(email)
+    user = await _get_user_by_email(email, conn)
+    await principal_cache.set_if_current(
+        email, user.model_dump(mode='json', exclude={'password'}), generation
+    )
+    return user
 
 
 async def _get_user_by_email(
     email: str, conn: Connection
-) -> user_model.UserPublicAdmin:
+) -> user_model.AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -248,9 +510,11 @@ async def _get_user_by_email(
     SCRIPT_SQL = """
         WITH roles_ AS (
             SELECT ur.user_id, json_agg(row_to_json(r_)) AS roles
-            FROM public.user_roles ur
-            JOIN (SELECT r.role_id AS id, r.name AS role_id
-                FROM public.roles r) r_ ON ur.role_id = r_.id
+            FROM public.users u
+                JOIN public.user_roles ur ON ur.user_id = u.user_id
+                JOIN (SELECT r.role_id AS id, r.name AS role_id
+                    FROM public.roles r) r_ ON ur.role_id = r_.id
+            WHERE u.email = %(email)s
             GROUP BY ur.user_id
         ), permissions_ AS (
             SELECT u.user_id, ARRAY_REMOVE(ARRAY_AGG(DISTINCT p.name), NULL) AS
@@ -261,7 +525,7 @@ async def _get_user_by_email(
                 LEFT JOIN permissions p ON p.permission_id = rp.permission_id
             WHERE email = %(email)s
             GROUP BY u.user_id
-        ) SELECT u.user_id, u.username, u.email, u.password,
+        ) SELECT u.user_id, u.username, u.email,
             u.created_at, u.updated_at,
             COALESCE(r.roles, '[]'::json) AS roles,
             COALESCE(p.permissions, '{}') AS permissions,
@@ -279,4 +543,4 @@ async def _get_user_by_email(
     if not user_data:
         raise credentials_exception
 
-    return user_model.User(**user_data)
+    return user_model.AuthenticatedUser(**user_data)
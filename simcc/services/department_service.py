@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+import secrets
+import tempfile
+from contextlib import aclosing
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from starlette.responses import StreamingResponse
+
+from simcc.core.connection import Connection
+from simcc.core.database import media_cache
+from simcc.repositories import department_repository, media_repository
+from simcc.schemas.media_model import Media
+from simcc.services import media_service
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CHUNK_SIZE = 256 * 1024
+HEAD_SIZE = 16
+IMAGE_NOT_FOUND = 'Ícone não encontrado.'
+
+
+def _image_key(dep_id: str) -> str:
+    return f'department:{dep_id}:img_data'
+
+
+async def find_image(conn: Connection, dep_id: str) -> dict:
+    """Size, hash and type of a department's img_data, cached.
+
+    Only this summary is read here; the bytes themselves are streamed by
+    image_response.
+    """
+    key = _image_key(dep_id)
+    if cached := await media_cache.get(key):
+        return cached
+
+    image = await department_repository.get_image(conn, dep_id, HEAD_SIZE)
+    if not image:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail=IMAGE_NOT_FOUND
+        )
+    sniffed = media_service.sniff(bytes(image['head']))
+    cached = {
+        'size': image['size'],
+        'hash': image['hash'],
+        'content_type': sniffed[0] if sniffed else 'application/octet-stream',
+    }
+    await media_cache.set(key, cached)
+    return cached
+
+
+async def image_response(
+    conn: Connection, dep_id: str, if_none_match: str | None
+) -> Response:
+    """Stream img_data of a department not migrated to the media table."""
+    image = await find_image(conn, dep_id)
+    etag = f'"{image["hash"]}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if media_service.etag_matches(etag, if_none_match):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    async def body():
+        rows = department_repository.stream_image(
+            conn, dep_id, IMAGE_CHUNK_SIZE
+        )
+        async with aclosing(rows):
+            async for row in rows:
+                yield bytes(row['chunk'])
+
+    headers['Content-Length'] = str(image['size'])
+    return StreamingResponse(
+        body(), media_type=image['content_type'], headers=headers
+    )
+
+
+async def delete_image(conn: Connection, dep_id: str) -> bool:
+    """Empty img_data, so a deleted icon is not served from it again."""
+    cleared = await department_repository.clear_image(conn, dep_id)
+    await media_cache.delete(_image_key(dep_id))
+    return cleared
+
+
+async def _spool_image(conn: Connection, dep_id: str):
+    await run_in_threadpool(os.makedirs, media_service.TMP_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=media_service.TMP_DIR)
+    digest = hashlib.sha256()
+    head = b''
+    size = 0
+    with os.fdopen(fd, 'wb') as f:
+        rows = department_repository.stream_image(
+            conn, dep_id, IMAGE_CHUNK_SIZE
+        )
+        async with aclosing(rows):
+            async for row in rows:
+                chunk = bytes(row['chunk'])
+                head = head or chunk[:HEAD_SIZE]
+                size += len(chunk)
+                digest.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+    return tmp_path, head, size, digest.hexdigest()
+
+
+async def migrate_images(conn: Connection, keep: bool = False) -> int:
+    """Move img_data of every department into the media table as its icon.
+
+    The column is emptied once the icon is stored, unless keep is set.
+    Departments that already have an icon are left alone.
+    """
+    migrated = 0
+    for row in await department_repository.list_images(conn):
+        dep_id = row['dep_id']
+        if await media_repository.get_media(
+            conn, 'department', dep_id, 'icon'
+        ):
+            logger.warning('Departamento %s já tem ícone', dep_id)
+            continue
+
+        tmp_path, head, size, digest = await _spool_image(conn, dep_id)
+        sniffed = media_service.sniff(head)
+        if not sniffed:
+            logger.warning('img_data de %s não é uma imagem', dep_id)
+            os.remove(tmp_path)
+            continue
+        content_type, extension = sniffed
+        token = secrets.token_hex(4)
+        path = media_service.media_path(digest, token, extension)
+        media = Media(
+            entity_type='department',
+            entity_id=dep_id,
+            kind='icon',
+            path=path,
+            content_type=content_type,
+            size=size,
+            hash=digest,
+            url=media_service.media_url(path),
+        )
+        await media_service.import_file(conn, media, token, tmp_path)
+        if not keep:
+            await department_repository.clear_image(conn, dep_id)
+        await media_cache.delete(_image_key(dep_id))
+        migrated += 1
+    return migrated
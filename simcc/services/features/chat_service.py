@@ -1,5 +1,6 @@
 import asyncio
 import json
+import logging
 from http import HTTPStatus
 from uuid import UUID
 
@@ -7,11 +8,14 @@ from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
 from redis.asyncio.client import Redis
 
 from simcc.core.connection import Connection
+from simcc.core.metrics import registry
 from simcc.repositories.features import chat_repository
 from simcc.schemas import user_model
 from simcc.schemas.features import chat_schema
 from simcc.schemas.user_model import User
 
+logger = logging.getLogger(__name__)
+
 
 async def create_private_chat(
     conn,
@@ -21,19 +25,21 @@ async def create_private_chat(
     if current_user.user_id not in chat.users:
         HTTPException(status_code=HTTPStatus.FORBIDDEN)
 
-    if chat_id := await chat_repository.get_private_chat(conn, chat):
-        chat = chat_schema.Chat(
-            **chat.model_dump(), chat_id=chat_id.get('chat_id')
-        )
-        return chat
+    async with conn.transaction() as tx:
+        await chat_repository.lock_private_chat(tx, chat)
+        if chat_id := await chat_repository.get_private_chat(tx, chat):
+            chat = chat_schema.Chat(
+                **chat.model_dump(), chat_id=chat_id.get('chat_id')
+            )
+            return chat
 
-    if not chat.chat_name:
-        chat.chat_name = ' & '.join(chat.users)
+        if not chat.chat_name:
+            chat.chat_name = ' & '.join(chat.users)
 
-    chat = chat_schema.Chat(**chat.model_dump())
+        chat = chat_schema.Chat(**chat.model_dump())
 
-    await chat_repository.create_chat_record(conn, chat)
-    await chat_repository.add_chat_participants(conn, chat)
+        await chat_repository.create_chat_record(tx, chat)
+        await chat_repository.add_chat_participants(tx, chat)
     return chat
 
 
@@ -60,6 +66,7 @@ async def link(
 
     channel_name = f'chat:{chat_id}'
 
+    registry.gauge_add('websocket_connections', route='/ws/chat/{chat_id}')
     try:
         async with redis.pubsub() as pubsub:
             await pubsub.subscribe(channel_name)
@@ -95,14 +102,17 @@ async def link(
             await asyncio.gather(listen_task, handle_task)
 
     except WebSocketDisconnect:
-        print(f'Client disconnected from chat {chat_id}')
+        logger.info('Client disconnected from chat %s', chat_id)
 
     finally:
+        registry.gauge_add(
+            'websocket_connections', -1, route='/ws/chat/{chat_id}'
+        )
         if listen_task and not listen_task.done():
             listen_task.cancel()
         if handle_task and not handle_task.done():
             handle_task.cancel()
 
 
-async def get_chats(conn, current_user):
-    return await chat_repository.get_chats(conn, current_user)
+async def get_chats(conn, current_user, stream=False):
+    return await chat_repository.get_chats(conn, current_user, stream)
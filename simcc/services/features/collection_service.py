@@ -8,6 +8,7 @@ from simcc.core.connection import Connection
 from simcc.repositories.features import collection_repositoy
 from simcc.schemas import user_model
 from simcc.schemas.features import collection_models
+from simcc.services import media_service
 
 
 async def post_collection(
@@ -17,6 +18,7 @@ async def post_collection(
 ):
     collection = collection_models.Collection(**collection.model_dump())
     await collection_repositoy.post_collection(conn, collection, current_user)
+    await media_service.forget_entities('collection', collection.collection_id)
     return collection
 
 
@@ -66,6 +68,8 @@ async def delete_collection(
             status_code=HTTPStatus.NOT_FOUND, detail='Collection not found'
         )
     await collection_repositoy.delete_collection(conn, collection_id)
+    await media_service.release_entity(conn, 'collection', collection_id)
+    await media_service.forget_entities('collection', collection_id)
 
 
 async def post_entries(
@@ -74,19 +78,20 @@ async def post_entries(
     entry: collection_models.CreateCollectionEntry,
     user: user_model.User,
 ):
-    owner_collection = await collection_repositoy.get_collection_by_id(
-        conn, collection_id, user
-    )
-    if not owner_collection:
-        raise HTTPException(
-            status_code=HTTPStatus.FORBIDDEN,
-            detail='Collection not found or permission denied',
+    async with conn.transaction() as tx:
+        owner_collection = await collection_repositoy.get_collection_by_id(
+            tx, collection_id, user, lock=True
         )
-
-    entry = collection_models.CollectionEntry(
-        collection_id=collection_id, **entry.model_dump()
-    )
-    await collection_repositoy.post_entries(conn, entry)
+        if not owner_collection:
+            raise HTTPException(
+                status_code=HTTPStatus.FORBIDDEN,
+                detail='Collection not found or permission denied',
+            )
+
+        entry = collection_models.CollectionEntry(
+            collection_id=collection_id, **entry.model_dump()
+        )
+        await collection_repositoy.post_entries(tx, entry)
     return entry
 
 
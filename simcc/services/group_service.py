@@ -2,6 +2,7 @@ from datetime import datetime
 from uuid import uuid4
 
 from simcc.repositories import group_repository
+from simcc.services import media_service
 
 
 async def create_group(conn, group):
@@ -12,11 +13,12 @@ async def create_group(conn, group):
     group['id'] = uuid4()
 
     await group_repository.create_group(conn, group)
+    await media_service.forget_entities('group', group['id'])
     return group
 
 
-async def list_groups(conn, group_id=None):
-    return await group_repository.list_groups(conn, group_id)
+async def list_groups(conn, group_id=None, stream=False):
+    return await group_repository.list_groups(conn, group_id, stream)
 
 
 async def update_group(conn, group_update):
@@ -27,4 +29,6 @@ async def update_group(conn, group_update):
 
 
 async def delete_group(conn, group_id):
-    return await group_repository.delete_group(conn, group_id, datetime.now())
+    await group_repository.delete_group(conn, group_id, datetime.now())
+    await media_service.release_entity(conn, 'group', group_id)
+    await media_service.forget_entities('group', group_id)
@@ -1,8 +1,12 @@
+import random
+from collections import Counter
 from datetime import datetime
 
+from simcc.config import Settings
 from simcc.core.connection import Connection
 from simcc.repositories import institution_repository
-from simcc.schemas import institution_model
+from simcc.schemas import bulk_model, institution_model
+from simcc.services import media_service
 
 
 async def post_institution(institution, conn: Connection):
@@ -11,13 +15,59 @@ async def post_institution(institution, conn: Connection):
         institution = [institution.model_dump()]
     institution = [institution_model.Institution(**i) for i in institution]
     await institution_repository.post_institution(institution, conn)
+    await media_service.forget_entities(
+        'institution', *[i.institution_id for i in institution]
+    )
     if len(institution) == ONE:
         return institution[0]
     return institution
 
 
+async def post_institution_bulk(institutions: list, conn: Connection):
+    rows = ((n, i.name, i.acronym) for n, i in enumerate(institutions))
+    result = await institution_repository.post_institution_bulk(rows, conn)
+    await media_service.forget_entities(
+        'institution', *[row['id'] for row in result if row['id']]
+    )
+    return bulk_model.BulkResult(
+        **Counter(row['status'] for row in result), rows=result
+    )
+
+
+SAMPLE_SIZE = Settings().RESEARCHER_SAMPLE_SIZE
+SAMPLE_TTL = Settings().RESEARCHER_SAMPLE_TTL
+sample_random = random.Random(Settings().RESEARCHER_SAMPLE_SEED)
+
+
+def pick_researchers(pool: list[str], size: int = SAMPLE_SIZE) -> list[str]:
+    pool = sorted(pool)
+    return sample_random.sample(pool, min(size, len(pool)))
+
+
 async def get_institution(conn: Connection, institution_id):
-    return await institution_repository.get_institution(institution_id, conn)
+    institution = await institution_repository.get_institution(
+        institution_id, conn, SAMPLE_TTL
+    )
+    if not institution:
+        return None
+
+    pool = institution.pop('sample')
+    if institution.pop('sample_stale'):
+        rotated = await institution_repository.rotate_researcher_sample(
+            conn, institution['institution_id'], SAMPLE_TTL
+        )
+        if rotated:
+            pool = rotated['sample']
+
+    institution['researchers'] = pick_researchers(pool)
+    return institution
+
+
+async def refresh_institution_stats(conn: Connection, institution_id=None):
+    refreshed = await institution_repository.refresh_institution_stats(
+        conn, institution_id
+    )
+    return institution_model.InstitutionStatsRefresh(refreshed=refreshed)
 
 
 async def put_institution(
@@ -29,6 +79,9 @@ async def put_institution(
 
 
 async def delete_institution(conn: Connection, institution_id):
-    return await institution_repository.delete_institution(
+    result = await institution_repository.delete_institution(
         institution_id, conn
     )
+    await media_service.release_entity(conn, 'institution', institution_id)
+    await media_service.forget_entities('institution', institution_id)
+    return result
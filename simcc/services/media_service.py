@@ -0,0 +1,591 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import secrets
+import tempfile
+from contextlib import suppress
+from http import HTTPStatus
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from PIL import Image
+
+from simcc.config import Settings
+from simcc.core import images
+from simcc.core.connection import Connection
+from simcc.core.database import entity_cache, media_cache
+from simcc.core.storage import storage
+from simcc.core.uploads import TOO_LARGE
+from simcc.core.workers import image_pool
+from simcc.repositories import media_repository
+from simcc.schemas.media_model import Media, VariantSize
+from simcc.security import get_principal_emails, invalidate_principals
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = Settings().MEDIA_ROOT
+MEDIA_URL = Settings().MEDIA_URL or f'{Settings().ROOT_PATH_ADMIN}/upload'
+MAX_SIZE = Settings().MEDIA_MAX_SIZE
+# Beside MEDIA_ROOT rather than in it, so files being written are never
+# served, while moving them into place stays a rename.
+TMP_DIR = os.path.normpath(MEDIA_ROOT) + '.tmp'
+CHUNK_SIZE = 1024 * 1024
+INLINE_MAX_SIZE = Settings().MEDIA_INLINE_MAX_SIZE
+INLINE_CONCURRENCY = Settings().MEDIA_INLINE_CONCURRENCY
+NEGATIVE_TTL = Settings().ENTITY_CACHE_NEGATIVE_TTL
+
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png', '.png'),
+    (b'\xff\xd8\xff', 'image/jpeg', '.jpg'),
+    (b'GIF87a', 'image/gif', '.gif'),
+    (b'GIF89a', 'image/gif', '.gif'),
+)
+
+ENTITY_NOT_FOUND = {
+    'user': 'Usuário não encontrado.',
+    'institution': 'Instituição não encontrada.',
+    'group': 'Grupo de pesquisa não encontrado.',
+    'program': 'Programa de pós-graduação não encontrado.',
+    'department': 'Departamento não encontrado.',
+    'collection': 'Coleção não encontrada.',
+}
+NOT_AN_IMAGE = 'O arquivo enviado não é uma imagem suportada.'
+FRIENDLY_NAME = {'icon': 'Ícone', 'cover': 'Capa'}
+NOTHING_TO_DELETE = {
+    'icon': 'Nenhum ícone para excluir.',
+    'cover': 'Nenhuma imagem de capa para excluir.',
+}
+DELETED = {
+    'icon': 'Ícone excluído com sucesso.',
+    'cover': 'Imagem de capa excluída com sucesso.',
+}
+
+
+def media_path(digest: str, name: str, extension: str) -> str:
+    """Storage key of a file of the blob of an upload hashing to digest.
+
+    Keys look like `blob/ab/cd/{digest[:32]}_{name}{extension}`, where ab and
+    cd are the first two bytes of the digest in hex, spreading files over two
+    levels of 256 directories. The name is a token drawn for every new blob,
+    followed by the variant for rendered files, so the keys of a blob being
+    released are never written again while their removal is pending.
+    """
+    filename = f'{digest[:32]}_{name}{extension}'
+    return os.path.join('blob', digest[:2], digest[2:4], filename)
+
+
+def _extension(filename: str | None) -> str:
+    extension = os.path.splitext(filename or '')[1].lower()
+    return extension if re.fullmatch(r'\.[a-z0-9]{1,10}', extension) else ''
+
+
+async def _remove(path: str):
+    try:
+        await storage.delete(path)
+    except OSError as e:
+        logger.warning('Erro ao deletar o arquivo antigo %s: %s', path, e)
+
+
+async def entity_exists(conn: Connection, entity_type: str, entity_id: str):
+    key = f'{entity_type}:{entity_id}'
+    exists = await entity_cache.get(key)
+    if exists is None:
+        exists = await media_repository.entity_exists(
+            conn, entity_type, entity_id
+        )
+        await entity_cache.set(key, exists, None if exists else NEGATIVE_TTL)
+    return exists
+
+
+async def forget_entities(entity_type: str, *entity_ids):
+    """Drop cached existence after an entity is created or deleted.
+
+    Cached media entries go too, as find_media serves them without checking
+    that their entity still exists.
+    """
+    await entity_cache.delete(*[f'{entity_type}:{i}' for i in entity_ids])
+    await media_cache.delete(*[
+        key
+        for entity_id in entity_ids
+        for kind in FRIENDLY_NAME
+        for key in _cache_keys(entity_type, entity_id, kind)
+    ])
+
+
+async def ensure_entity(conn: Connection, entity_type: str, entity_id: str):
+    if not await entity_exists(conn, entity_type, entity_id):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ENTITY_NOT_FOUND[entity_type],
+        )
+
+
+def variant_name(size: int | None, image_format: str | None) -> str | None:
+    if not size:
+        return None
+    size = int(size)
+    return f'{size}.{image_format}' if image_format else str(size)
+
+
+def media_url(path: str) -> str:
+    """Public URL of a stored file; it changes whenever the content does."""
+    return f'{MEDIA_URL}/{path}'
+
+
+def _cache_key(entity_type: str, entity_id: str, kind: str, variant: str):
+    return f'{entity_type}:{entity_id}:{kind}:{variant}'
+
+
+def _cache_keys(entity_type: str, entity_id: str, kind: str) -> list[str]:
+    variants = ['original']
+    for size in map(int, VariantSize):
+        variants += [str(size), f'{size}.webp']
+    return [
+        _cache_key(entity_type, entity_id, kind, variant)
+        for variant in variants
+    ]
+
+
+async def _invalidate(entity_type: str, entity_id: str, kind: str):
+    await media_cache.delete(*_cache_keys(entity_type, entity_id, kind))
+
+
+async def find_media(
+    conn: Connection,
+    entity_type: str,
+    entity_id: str,
+    kind: str,
+    variant: str | None = None,
+) -> dict:
+    """Index entry of the original, or of a pre-rendered variant of it.
+
+    Entries are cached, so a warm lookup needs neither the entity check nor
+    the media table. Files indexed before variants existed have none, and
+    resolve to the original.
+    """
+    variant = variant or 'original'
+    key = _cache_key(entity_type, entity_id, kind, variant)
+    if cached := await media_cache.get(key):
+        return cached
+
+    await ensure_entity(conn, entity_type, entity_id)
+    media = await media_repository.get_media(
+        conn, entity_type, entity_id, kind, variant
+    )
+    if not media and variant != 'original':
+        media = await media_repository.get_media(
+            conn, entity_type, entity_id, kind
+        )
+    if not media:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=f'{FRIENDLY_NAME[kind]} não encontrado.',
+        )
+
+    cached = {
+        'path': media['path'],
+        'content_type': media['content_type'],
+        'hash': media['hash'],
+    }
+    await media_cache.set(key, cached)
+    return cached
+
+
+async def find_media_batch(
+    conn: Connection,
+    entity_type: str,
+    entity_ids: list[str],
+    kind: str,
+    variant: str | None = None,
+) -> dict[str, dict | None]:
+    """Index entries of many entities in one query, None where missing.
+
+    Unknown entities are reported like entities without media, so list
+    views can fall back to a placeholder without telling them apart.
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    rows = await media_repository.get_media_batch(
+        conn, entity_type, entity_ids, kind, variant or 'original'
+    )
+    found = {row['entity_id']: row for row in rows}
+    return {entity_id: found.get(entity_id) for entity_id in entity_ids}
+
+
+def media_urls(found: dict[str, dict | None]) -> dict[str, str | None]:
+    return {
+        entity_id: media and media_url(media['path'])
+        for entity_id, media in found.items()
+    }
+
+
+async def _data_uri(media: dict) -> str:
+    data = base64.b64encode(await storage.read(media['path'])).decode()
+    return f'data:{media["content_type"]};base64,{data}'
+
+
+async def data_uris(found: dict[str, dict | None]) -> dict[str, str | None]:
+    """Embed files up to INLINE_MAX_SIZE, and link to the larger ones.
+
+    Files are read concurrently, at most INLINE_CONCURRENCY at a time.
+    """
+    urls = media_urls(found)
+    semaphore = asyncio.Semaphore(INLINE_CONCURRENCY)
+
+    async def embed(entity_id: str, media: dict):
+        async with semaphore:
+            with suppress(OSError):
+                urls[entity_id] = await _data_uri(media)
+
+    await asyncio.gather(
+        *(
+            embed(entity_id, media)
+            for entity_id, media in found.items()
+            if media and media['size'] <= INLINE_MAX_SIZE
+        )
+    )
+    return urls
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag in tags or '*' in tags
+
+
+def file_response(media: dict, if_none_match: str | None) -> Response:
+    """Serve a file with its content hash as ETag, or 304 when it matches.
+
+    These URLs keep pointing at the latest upload, so clients revalidate on
+    every use; the versioned media_url() is the one cached for good.
+    """
+    etag = f'"{media["hash"]}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return storage.response(media['path'], media['content_type'], headers)
+
+
+def sniff(head: bytes) -> tuple[str, str] | None:
+    """Content type and extension of an image, told by its first bytes."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp', '.webp'
+    for signature, content_type, extension in SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    return None
+
+
+def _write(f, digest, chunk: bytes):
+    digest.update(chunk)
+    f.write(chunk)
+
+
+def _discard(tmp_path: str):
+    with suppress(FileNotFoundError):
+        os.remove(tmp_path)
+
+
+async def _spool(file: UploadFile, head: bytes) -> tuple[str, int, str]:
+    """Copy the upload to a temporary file next to its final place."""
+    await run_in_threadpool(os.makedirs, TMP_DIR, exist_ok=True)
+    fd, tmp_path = await run_in_threadpool(tempfile.mkstemp, dir=TMP_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > MAX_SIZE:
+                    raise HTTPException(
+                        status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        detail=TOO_LARGE,
+                    )
+                await run_in_threadpool(_write, f, digest, chunk)
+                chunk = await file.read(CHUNK_SIZE)
+    except BaseException:
+        await run_in_threadpool(_discard, tmp_path)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+
+async def _render(source: str) -> list[dict]:
+    await run_in_threadpool(os.makedirs, TMP_DIR, exist_ok=True)
+    return await image_pool.run(images.render_variants, source, TMP_DIR)
+
+
+async def _store(
+    original: Media, token: str, source: str, rendered: list[dict]
+) -> list[Media]:
+    """Hand an original and its rendered variants over to storage."""
+    media = [original]
+    try:
+        await storage.put(source, original.path, original.content_type)
+        for item in rendered:
+            path = media_path(
+                original.hash,
+                f'{token}_{item["variant"].split(".")[0]}',
+                item['extension'],
+            )
+            await storage.put(item['tmp_path'], path, item['content_type'])
+            media.append(
+                Media(
+                    entity_type=original.entity_type,
+                    entity_id=original.entity_id,
+                    kind=original.kind,
+                    variant=item['variant'],
+                    path=path,
+                    content_type=item['content_type'],
+                    size=item['size'],
+                    hash=item['hash'],
+                )
+            )
+    finally:
+        for tmp_path in [source, *(item['tmp_path'] for item in rendered)]:
+            await run_in_threadpool(_discard, tmp_path)
+    return media
+
+
+async def _release(conn: Connection, previous: list[dict]) -> list[str]:
+    """Paths of unlinked files that no other media refers to anymore."""
+    removable = [row['path'] for row in previous if not row['blob']]
+    for blob in {row['blob'] for row in previous if row['blob']}:
+        if await media_repository.release_blob(conn, blob):
+            removable += [r['path'] for r in previous if r['blob'] == blob]
+    return removable
+
+
+async def _changed(
+    conn: Connection, entity_type: str, entity_id: str, kind: str
+):
+    await _invalidate(entity_type, entity_id, kind)
+    if entity_type == 'user':
+        emails = await get_principal_emails(conn, user_id=entity_id)
+        await invalidate_principals(emails, claims=False)
+
+
+async def _link(
+    conn: Connection, original: Media, stored: list[Media] | None = None
+) -> Media | None:
+    """Point an entity's icon or cover at the blob holding its content.
+
+    Blobs are shared by every entity that uploaded the same bytes and
+    counted by reference. An existing blob is reused, and files stored for
+    this upload are dropped again; otherwise the stored files become the
+    blob. With neither, nothing changes and None is returned.
+    """
+    blob = original.hash
+    owner = (original.entity_type, original.entity_id, original.kind)
+    async with conn.transaction() as tx:
+        created = False
+        if not await media_repository.acquire_blob(tx, blob):
+            if not stored:
+                return None
+            created = await media_repository.create_blob(tx, blob)
+            if not created:
+                await media_repository.acquire_blob(tx, blob)
+
+        if created:
+            media = stored
+        else:
+            rows = await media_repository.get_blob_media(tx, blob)
+            media = sorted(
+                (
+                    original.model_copy(update={**row, 'url': None})
+                    for row in rows
+                ),
+                key=lambda item: item.variant != 'original',
+            )
+            media[0].url = media_url(media[0].path)
+
+        previous = await media_repository.delete_media(tx, *owner)
+        for item in media:
+            await media_repository.put_media(tx, item, blob)
+        removable = await _release(tx, previous)
+        if original.entity_type == 'user':
+            await media_repository.set_user_url(
+                tx, original.entity_id, original.kind, media[0].url
+            )
+
+    await _changed(conn, *owner)
+    if not created:
+        removable += [item.path for item in stored or []]
+    for path in removable:
+        await _remove(path)
+    return media[0]
+
+
+async def save_file(
+    conn: Connection,
+    entity_type: str,
+    entity_id: str,
+    kind: str,
+    file: UploadFile,
+) -> Media:
+    head = await file.read(CHUNK_SIZE)
+    sniffed = sniff(head)
+    if not sniffed:
+        raise HTTPException(
+            status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            detail=NOT_AN_IMAGE,
+        )
+    content_type, extension = sniffed
+
+    try:
+        tmp_path, size, digest = await _spool(file, head)
+    except IOError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail=f'Não foi possível salvar o arquivo: {e}',
+        )
+
+    current = await media_repository.get_media(
+        conn, entity_type, entity_id, kind
+    )
+    if current and current['hash'] == digest:
+        await run_in_threadpool(_discard, tmp_path)
+        return Media(**current, url=media_url(current['path']))
+
+    token = secrets.token_hex(4)
+    path = media_path(digest, token, extension)
+    original = Media(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        kind=kind,
+        path=path,
+        content_type=content_type,
+        size=size,
+        hash=digest,
+        url=media_url(path),
+    )
+    if linked := await _link(conn, original):
+        await run_in_threadpool(_discard, tmp_path)
+        return linked
+
+    try:
+        rendered = await _render(tmp_path)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        await run_in_threadpool(_discard, tmp_path)
+        raise HTTPException(
+            status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            detail=NOT_AN_IMAGE,
+        )
+    try:
+        stored = await _store(original, token, tmp_path, rendered)
+    except IOError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail=f'Não foi possível salvar o arquivo: {e}',
+        )
+    return await _link(conn, original, stored)
+
+
+async def delete_file(
+    conn: Connection, entity_type: str, entity_id: str, kind: str
+):
+    async with conn.transaction() as tx:
+        removed = await media_repository.delete_media(
+            tx, entity_type, entity_id, kind
+        )
+        removable = await _release(tx, removed)
+        if removed and entity_type == 'user':
+            await media_repository.set_user_url(tx, entity_id, kind, None)
+    if not removed:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=NOTHING_TO_DELETE[kind],
+        )
+    await _changed(conn, entity_type, entity_id, kind)
+    for path in removable:
+        await _remove(path)
+    return {'message': DELETED[kind]}
+
+
+async def release_entity(conn: Connection, entity_type: str, entity_id: str):
+    """Drop every file of a deleted entity, and the blobs left unused."""
+    async with conn.transaction() as tx:
+        removed = await media_repository.delete_entity_media(
+            tx, entity_type, entity_id
+        )
+        removable = await _release(tx, removed)
+    for path in removable:
+        await _remove(path)
+
+
+async def import_file(
+    conn: Connection, original: Media, token: str, source: str
+) -> Media:
+    """Store a file that did not come through an upload, like save_file.
+
+    The temporary file at source is taken over. Files that cannot be
+    rendered are kept without variants instead of being refused.
+    """
+    if linked := await _link(conn, original):
+        await run_in_threadpool(_discard, source)
+        return linked
+    try:
+        rendered = await _render(source)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning('Sem variantes para %s: %s', original.path, e)
+        rendered = []
+    stored = await _store(original, token, source, rendered)
+    return await _link(conn, original, stored)
+
+
+LEGACY_NAME = re.compile(r'(icon|cover)_([^./]+)(?:\.[^/]*)?')
+
+
+async def index_legacy_files(conn: Connection) -> int:
+    """Move files of the old flat `{kind}_{id}.*` layout into storage.
+
+    The old names carry no entity type, so each id is looked up in every
+    entity table and the first match wins.
+    """
+    indexed = 0
+    os.makedirs(TMP_DIR, exist_ok=True)
+    for entry in os.scandir(MEDIA_ROOT):
+        match = LEGACY_NAME.fullmatch(entry.name)
+        if not entry.is_file() or not match:
+            continue
+        kind, entity_id = match.groups()
+
+        for entity_type in media_repository.ENTITY_SQL:
+            try:
+                if await media_repository.entity_exists(
+                    conn, entity_type, entity_id
+                ):
+                    break
+            except RuntimeError:
+                continue
+        else:
+            logger.warning('Nenhuma entidade para %s', entry.name)
+            continue
+
+        with open(entry.path, 'rb') as f:
+            content = f.read()
+        fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        digest = hashlib.sha256(content).hexdigest()
+        token = secrets.token_hex(4)
+        path = media_path(digest, token, _extension(entry.name))
+        media = Media(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            kind=kind,
+            path=path,
+            content_type=mimetypes.guess_type(entry.name)[0],
+            size=len(content),
+            hash=digest,
+            url=media_url(path),
+        )
+        await import_file(conn, media, token, tmp_path)
+        os.remove(entry.path)
+        indexed += 1
+    return indexed
@@ -4,6 +4,7 @@ from uuid import UUID
 from simcc.core.connection import Connection
 from simcc.repositories import rbac_repository
 from simcc.schemas import rbac_model
+from simcc.security import get_principal_emails, invalidate_principals
 
 
 async def post_role(conn: Connection, role: rbac_model.CreateRole):
@@ -19,11 +20,15 @@ async def get_role(conn: Connection, id: UUID):
 async def put_role(conn: Connection, role: rbac_model.Role):
     role.updated_at = datetime.now()
     await rbac_repository.put_role(conn, role)
+    emails = await get_principal_emails(conn, role_id=role.role_id)
+    await invalidate_principals(emails)
     return role
 
 
 async def delete_role(conn: Connection, role_id: UUID):
+    emails = await get_principal_emails(conn, role_id=role_id)
     await rbac_repository.delete_role(conn, role_id)
+    await invalidate_principals(emails)
 
 
 async def get_permissions(conn, role_id):
@@ -31,11 +36,17 @@ async def get_permissions(conn, role_id):
 
 
 async def post_user_role(conn, user_role):
-    return await rbac_repository.post_user_role(conn, user_role)
+    result = await rbac_repository.post_user_role(conn, user_role)
+    emails = await get_principal_emails(conn, user_id=user_role.user_id)
+    await invalidate_principals(emails)
+    return result
 
 
 async def post_role_permissions(conn, role_permission):
-    return await rbac_repository.post_role_permissions(conn, role_permission)
+    result = await rbac_repository.post_role_permissions(conn, role_permission)
+    emails = await get_principal_emails(conn, role_id=role_permission.role_id)
+    await invalidate_principals(emails)
+    return result
 
 
 async def role_permissions_get(conn, role_id):
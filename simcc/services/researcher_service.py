@@ -1,7 +1,8 @@
+from collections import Counter
 from datetime import datetime
 
 from simcc.repositories import researcher_repository
-from simcc.schemas import researcher_model
+from simcc.schemas import bulk_model, researcher_model
 
 
 async def researcher_post(conn, researcher):
@@ -15,9 +16,26 @@ async def researcher_post(conn, researcher):
     return researcher
 
 
-async def researcher_get(conn, institution_id, name):
+async def researcher_bulk_post(conn, researchers: list):
+    rows = (
+        (n, r.name, r.lattes_id, r.institution_id)
+        for n, r in enumerate(researchers)
+    )
+    result = await researcher_repository.researcher_bulk_post(conn, rows)
+    return bulk_model.BulkResult(
+        **Counter(row['status'] for row in result), rows=result
+    )
+
+
+async def researcher_search(conn, q, institution_id=None, limit=20):
+    return await researcher_repository.researcher_search(
+        conn, q, institution_id, limit
+    )
+
+
+async def researcher_get(conn, institution_id, name, stream=False):
     return await researcher_repository.researcher_get(
-        conn, institution_id, name
+        conn, institution_id, name, stream
     )
 
 
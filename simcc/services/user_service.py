@@ -6,20 +6,26 @@ from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import EmailStr
 
+from simcc.core import api_keys
 from simcc.core.connection import Connection
 from simcc.repositories import user_repository
 from simcc.schemas import user_model
 from simcc.security import (
-    create_access_token,
+    forget_api_keys,
     get_password_hash,
-    verify_password,
+    get_principal_emails,
+    invalidate_principals,
+    issue_access_token,
+    verify_and_update_password,
 )
+from simcc.services import media_service
 
 
 async def post_user(conn: Connection, user_data: user_model.UserSchema):
-    user_data.password = get_password_hash(user_data.password)
+    user_data.password = await get_password_hash(user_data.password)
     new_user = user_model.User(**user_data.model_dump())
     await user_repository.post_user(conn, new_user)
+    await media_service.forget_entities('user', new_user.user_id)
     return new_user
 
 
@@ -28,20 +34,32 @@ async def get_user(
     id: UUID = None,
     email: EmailStr = None,
     username: str = None,
+    stream: bool = False,
 ):
-    users = await user_repository.get_user(conn, id, email, username)
+    users = await user_repository.get_user(conn, id, email, username, stream)
     return users
 
 
-async def put_user(conn: Connection, user: user_model.User):
+async def put_user(conn: Connection, user: user_model.UserUpdate):
+    """Update a user, hashing the password only when a new one is sent."""
     user.updated_at = datetime.now()
-    user.password = get_password_hash(user.password)
+    current = await user_repository.get_password(conn, user.user_id)
+    if current and user.password in {None, current['password']}:
+        user.password = current['password']
+    elif user.password is not None:
+        user.password = await get_password_hash(user.password)
+    emails = await get_principal_emails(conn, user_id=user.user_id)
     await user_repository.put_user(conn, user)
+    await invalidate_principals([*emails, user.email])
     return user
 
 
 async def delete_user(conn: Connection, id: UUID = None):
+    emails = await get_principal_emails(conn, user_id=id)
     await user_repository.delete_user(conn, id)
+    await invalidate_principals(emails)
+    await media_service.release_entity(conn, 'user', id)
+    await media_service.forget_entities('user', id)
 
 
 async def login_for_access_token(
@@ -54,12 +72,20 @@ async def login_for_access_token(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect email or password',
         )
-    if not verify_password(form_data.password, user['password']):
+    valid, updated_hash = await verify_and_update_password(
+        form_data.password, user['password']
+    )
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect email or password',
         )
-    access_token = create_access_token(data={'sub': user['email']})
+    if updated_hash:
+        await user_repository.update_password(
+            conn, user['user_id'], updated_hash
+        )
+        await invalidate_principals([user['email']], claims=False)
+    access_token = await issue_access_token(conn, user['email'])
     return {
         'access_token': access_token,
         'token_type': 'bearer',
@@ -143,7 +169,11 @@ async def get_or_create_user_by_google(conn: Connection, google_payload: dict):
 
 async def key_post(conn, user, key):
     key = user_model.Key(**user.model_dump(), **key.model_dump())
-    await user_repository.key_post(conn, key)
+    prefix = api_keys.key_prefix(key.key)
+    await user_repository.key_post(
+        conn, key, prefix, api_keys.hash_key(key.key)
+    )
+    await forget_api_keys(prefix)
     return key
 
 
@@ -151,5 +181,24 @@ async def key_get(conn, user):
     return await user_repository.key_get(conn, user)
 
 
-async def key_delete(conn, key_id):
-    return await user_repository.key_delete(conn, key_id)
+async def key_delete(conn, user_id, key_id):
+    deleted = await user_repository.key_delete(conn, user_id, key_id)
+    if not deleted:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail='Chave não encontrada.',
+        )
+    await forget_api_keys(deleted['prefix'])
+
+
+async def hash_legacy_keys(conn: Connection) -> int:
+    """Replace keys stored in clear by their prefix and hash."""
+    keys = await user_repository.unhashed_keys(conn)
+    for key in keys:
+        await user_repository.key_hash_set(
+            conn,
+            key['key_id'],
+            api_keys.key_prefix(key['key']),
+            api_keys.hash_key(key['key']),
+        )
+    return len(keys)
@@ -8,7 +8,14 @@ from testcontainers.redis import AsyncRedisContainer
 
 from simcc.app import app
 from simcc.core.connection import Connection
-from simcc.core.database import get_cache_conn, get_conn
+from simcc.core.database import (
+    entity_cache,
+    get_cache_conn,
+    get_conn,
+    key_cache,
+    media_cache,
+    principal_cache,
+)
 from simcc.schemas import rbac_model
 from simcc.schemas.features import chat_schema, collection_models
 from simcc.services import (
@@ -82,6 +89,15 @@ def client(conn, redis):
     app.dependency_overrides[get_conn] = get_conn_override
     app.dependency_overrides[get_cache_conn] = get_cache_conn_override
 
+    principal_cache.redis = redis
+    principal_cache.clear_local()
+    media_cache.redis = redis
+    media_cache.clear_local()
+    entity_cache.redis = redis
+    entity_cache.clear_local()
+    key_cache.redis = redis
+    key_cache.clear_local()
+
     return TestClient(app)
 
 
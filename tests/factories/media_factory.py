@@ -0,0 +1,12 @@
+import io
+
+from PIL import Image
+
+
+def image(size=(1, 1), image_format='PNG', mode='RGB') -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'white').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+PNG = image()
@@ -0,0 +1,97 @@
+import hashlib
+from http import HTTPStatus
+
+import pytest
+
+from simcc.services import department_service
+from tests.factories.media_factory import PNG
+
+INSERT_DEPARTMENT_SQL = """
+    INSERT INTO ufmg.departament (dep_id, dep_nom, img_data)
+    VALUES (%(dep_id)s, %(dep_nom)s, %(img_data)s);
+    """
+
+
+@pytest.fixture
+def create_department(conn):
+    async def _create_department(dep_id='DCC', img_data=PNG):
+        await conn.exec(
+            INSERT_DEPARTMENT_SQL,
+            {'dep_id': dep_id, 'dep_nom': dep_id, 'img_data': img_data},
+        )
+        return dep_id
+
+    return _create_department
+
+
+@pytest.mark.asyncio
+async def test_get_department_icon_from_img_data(create_department, client):
+    dep_id = await create_department()
+
+    response = client.get(f'/department/upload/{dep_id}/icon')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == PNG
+    assert response.headers['content-type'] == 'image/png'
+    assert response.headers['content-length'] == str(len(PNG))
+    etag = f'"{hashlib.sha256(PNG).hexdigest()}"'
+    assert response.headers['etag'] == etag
+
+    response = client.get(
+        f'/department/upload/{dep_id}/icon',
+        headers={'If-None-Match': response.headers['etag']},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_department_icon_variant_from_img_data(
+    create_department, client
+):
+    dep_id = await create_department()
+
+    response = client.get(
+        f'/department/upload/{dep_id}/icon',
+        params={'size': 64, 'format': 'webp'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_delete_department_icon_from_img_data(create_department, client):
+    dep_id = await create_department()
+
+    response = client.delete(f'/department/upload/{dep_id}/icon')
+
+    assert response.status_code == HTTPStatus.OK
+    response = client.get(f'/department/upload/{dep_id}/icon')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_get_department_icon_without_image(create_department, client):
+    dep_id = await create_department(img_data=None)
+
+    response = client.get(f'/department/upload/{dep_id}/icon')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Ícone não encontrado.'}
+
+
+@pytest.mark.asyncio
+async def test_migrate_department_images(conn, create_department, client):
+    dep_id = await create_department()
+
+    assert await department_service.migrate_images(conn) == 1
+
+    image = await conn.select(
+        'SELECT img_data FROM ufmg.departament WHERE dep_id = %(dep_id)s',
+        {'dep_id': dep_id},
+        one=True,
+    )
+    assert image['img_data'] is None
+    response = client.get(f'/department/upload/{dep_id}/icon')
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == PNG
+    assert len(response.headers['etag']) == len('""') + 64
@@ -19,6 +19,26 @@ async def test_create_chat(conn, login_and_set_cookie, create_user):
     assert count.get('count') == EXPECTED_COUNT
 
 
+@pytest.mark.asyncio
+async def test_create_chat_reuses_private_chat(
+    conn, login_and_set_cookie, create_user
+):
+    user1 = await create_user()
+    user2 = await create_user()
+
+    client = login_and_set_cookie(user1)
+
+    users_id = [str(user1.user_id), str(user2.user_id)]
+    payload = {'chat_name': 'XPTO', 'is_group': False, 'users': users_id}
+    first = client.post('/chat/', json=payload)
+    second = client.post('/chat/', json=payload)
+    assert first.json()['chat_id'] == second.json()['chat_id']
+    count = await conn.select(
+        'SELECT COUNT(*) FROM feature.chat_participants', one=True
+    )
+    assert count.get('count') == len(users_id)
+
+
 @pytest.mark.asyncio
 async def test_websocket_link_valid_user(
     login_and_set_cookie, create_user, create_private_chat
@@ -7,6 +7,7 @@ import pytest
 
 from simcc.schemas.features import collection_models
 from tests.factories.features import collection_factory
+from tests.factories.media_factory import PNG
 
 
 @pytest.mark.asyncio
@@ -226,7 +227,7 @@ async def test_upload_collection_cover(
     user = await create_user()
     client = login_and_set_cookie(user)
     collection = await create_collection(user=user)
-    file_content = b'fake cover content'
+    file_content = PNG + b'fake cover content'
     file_name = 'test_collection_cover.jpg'
 
     # Endpoint para upload de capa da coleção
@@ -237,7 +238,7 @@ async def test_upload_collection_cover(
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     upload_dir = Path('simcc/storage/upload')
     final_path = upload_dir / file_name_from_response
     assert final_path.is_file()
@@ -255,23 +256,25 @@ async def test_upload_collection_cover_replaces_old_one(
     # Faz o upload da primeira imagem de capa
     first_response = client.post(
         f'/collection/upload/{collection.collection_id}/cover',
-        files={'file': ('first.png', io.BytesIO(b'first'), 'image/png')},
+        files={'file': ('first.png', io.BytesIO(PNG + b'first'), 'image/png')},
     )
     assert first_response.status_code == HTTPStatus.CREATED
     old_path = Path(first_response.json()['path'])
-    old_physical_path = Path('simcc/storage/upload') / old_path.name
+    old_physical_path = Path('simcc/storage/upload') / old_path
     assert old_physical_path.exists()
 
     # Faz o upload da segunda imagem de capa
     second_response = client.post(
         f'/collection/upload/{collection.collection_id}/cover',
-        files={'file': ('second.png', io.BytesIO(b'second'), 'image/png')},
+        files={
+            'file': ('second.png', io.BytesIO(PNG + b'second'), 'image/png')
+        },
     )
 
     # Verifica se a nova imagem existe e a antiga foi removida
     assert second_response.status_code == HTTPStatus.CREATED
     new_path = Path(second_response.json()['path'])
-    new_physical_path = Path('simcc/storage/upload') / new_path.name
+    new_physical_path = Path('simcc/storage/upload') / new_path
     assert new_physical_path.exists()
     assert not old_physical_path.exists()
 
@@ -291,7 +294,7 @@ async def test_delete_collection_cover(
         files={
             'file': (
                 'cover_to_delete.png',
-                io.BytesIO(b'content'),
+                io.BytesIO(PNG + b'content'),
                 'image/png',
             )
         },
@@ -299,7 +302,7 @@ async def test_delete_collection_cover(
     assert upload_response.status_code == HTTPStatus.CREATED
 
     data = upload_response.json()
-    physical_file_path = Path('simcc/storage/upload') / Path(data['path']).name
+    physical_file_path = Path('simcc/storage/upload') / Path(data['path'])
     assert physical_file_path.exists()
 
     # Endpoint para exclusão de capa da coleção
@@ -330,3 +333,24 @@ async def test_delete_collection_cover_not_found(
     )
 
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_delete_collection_releases_cover(
+    create_user, login_and_set_cookie, create_collection
+):
+    user = await create_user()
+    client = login_and_set_cookie(user)
+    collection = await create_collection(user=user)
+    upload_response = client.post(
+        f'/collection/upload/{collection.collection_id}/cover',
+        files={'file': ('cover.png', io.BytesIO(PNG + b'gone'), 'image/png')},
+    )
+    physical_file_path = (
+        Path('simcc/storage/upload') / upload_response.json()['path']
+    )
+    assert physical_file_path.exists()
+
+    client.delete(f'/collection/{collection.collection_id}/')
+
+    assert not physical_file_path.exists()
@@ -4,6 +4,7 @@ import pytest
 
 from simcc.schemas import group_schemas
 from tests.factories import group_factory
+from tests.factories.media_factory import PNG
 
 pytestmark = pytest.mark.asyncio
 
@@ -117,7 +118,7 @@ UPLOAD_DIR = 'simcc/storage/upload'
 async def test_upload_icon_for_group(create_group, client):
     """Testa o upload de um ícone para um grupo de pesquisa."""
     group = await create_group()
-    file_content = b'fake icon content'
+    file_content = PNG + b'fake icon content'
     file_name = 'test_icon.png'
 
     response = client.post(
@@ -127,7 +128,7 @@ async def test_upload_icon_for_group(create_group, client):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     final_path = Path(UPLOAD_DIR) / file_name_from_response
     assert final_path.is_file()
     os.remove(final_path)
@@ -142,7 +143,7 @@ async def test_delete_icon_for_group(create_group, client):
         files={
             'file': (
                 'icon_to_delete.png',
-                io.BytesIO(b'content'),
+                io.BytesIO(PNG + b'content'),
                 'image/png',
             )
         },
@@ -151,7 +152,7 @@ async def test_delete_icon_for_group(create_group, client):
 
     data = upload_response.json()
     uploaded_path = Path(data['path'])
-    physical_file_path = Path(UPLOAD_DIR) / uploaded_path.name
+    physical_file_path = Path(UPLOAD_DIR) / uploaded_path
     assert physical_file_path.exists()
 
     delete_response = client.delete(f'/group/upload/{group["id"]}/icon')
@@ -172,7 +173,7 @@ async def test_delete_icon_not_found_for_group(create_group, client):
 async def test_upload_cover_for_group(create_group, client):
     """Testa o upload de uma capa para um grupo de pesquisa."""
     group = await create_group()
-    file_content = b'fake background content'
+    file_content = PNG + b'fake background content'
     file_name = 'background.jpg'
 
     response = client.post(
@@ -182,7 +183,7 @@ async def test_upload_cover_for_group(create_group, client):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     final_path = Path(UPLOAD_DIR) / file_name_from_response
     assert final_path.is_file()
     os.remove(final_path)
@@ -194,21 +195,23 @@ async def test_upload_cover_replaces_old_one_for_group(create_group, client):
     group = await create_group()
     first_response = client.post(
         f'/group/upload/{group["id"]}/cover',
-        files={'file': ('first.png', io.BytesIO(b'first'), 'image/png')},
+        files={'file': ('first.png', io.BytesIO(PNG + b'first'), 'image/png')},
     )
     assert first_response.status_code == HTTPStatus.CREATED
     old_path = Path(first_response.json()['path'])
-    old_physical_path = Path(UPLOAD_DIR) / old_path.name
+    old_physical_path = Path(UPLOAD_DIR) / old_path
     assert old_physical_path.exists()
 
     second_response = client.post(
         f'/group/upload/{group["id"]}/cover',
-        files={'file': ('second.png', io.BytesIO(b'second'), 'image/png')},
+        files={
+            'file': ('second.png', io.BytesIO(PNG + b'second'), 'image/png')
+        },
     )
 
     assert second_response.status_code == HTTPStatus.CREATED
     new_path = Path(second_response.json()['path'])
-    new_physical_path = Path(UPLOAD_DIR) / new_path.name
+    new_physical_path = Path(UPLOAD_DIR) / new_path
 
     assert new_physical_path.exists()
     assert not old_physical_path.exists()
@@ -223,13 +226,17 @@ async def test_delete_cover_for_group(create_group, client):
     upload_response = client.post(
         f'/group/upload/{group["id"]}/cover',
         files={
-            'file': ('bg_to_delete.png', io.BytesIO(b'content'), 'image/png')
+            'file': (
+                'bg_to_delete.png',
+                io.BytesIO(PNG + b'content'),
+                'image/png',
+            )
         },
     )
     assert upload_response.status_code == HTTPStatus.CREATED
 
     data = upload_response.json()
-    physical_file_path = Path(UPLOAD_DIR) / Path(data['path']).name
+    physical_file_path = Path(UPLOAD_DIR) / Path(data['path'])
     assert physical_file_path.exists()
 
     delete_response = client.delete(f'/group/upload/{group["id"]}/cover')
@@ -247,3 +254,22 @@ async def test_delete_cover_not_found_for_group(create_group, client):
     group = await create_group()
     response = client.delete(f'/group/upload/{group["id"]}/cover')
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_delete_group_releases_icon(
+    create_group, client, create_admin_user, login_and_set_cookie
+):
+    admin_user = await create_admin_user()
+    authenticated_client = login_and_set_cookie(admin_user)
+    group = await create_group()
+    upload_response = client.post(
+        f'/group/upload/{group["id"]}/icon',
+        files={'file': ('icon.png', io.BytesIO(PNG + b'gone'), 'image/png')},
+    )
+    physical_file_path = Path(UPLOAD_DIR) / upload_response.json()['path']
+    assert physical_file_path.exists()
+
+    authenticated_client.delete(f'/group/{group["id"]}')
+
+    assert not physical_file_path.exists()
@@ -3,9 +3,12 @@ from http import HTTPStatus
 from pathlib import Path
 
 import pytest
+from PIL import Image
 
 from simcc.schemas import institution_model
-from tests.factories import institution_factory
+from simcc.services import institution_service, media_service
+from tests.factories import institution_factory, media_factory
+from tests.factories.media_factory import PNG
 
 
 @pytest.mark.asyncio
@@ -70,6 +73,63 @@ async def test_get_institution(client, create_institution):
     assert institution_model.Institution(**get_response.json())
 
 
+@pytest.mark.asyncio
+async def test_get_institution_stats(
+    client, conn, create_institution, create_researcher
+):
+    institution = await create_institution()
+    await create_researcher(institution=institution)
+    get_response = client.get(f'/institution/{institution.institution_id}/')
+    data = get_response.json()
+    assert data['count_r'] == 1
+    assert data['refreshed_at'] is not None
+
+    await conn.exec('TRUNCATE institution_stats')
+    get_response = client.get(f'/institution/{institution.institution_id}/')
+    assert get_response.json()['count_r'] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_institution_researcher_sample(
+    client, create_institution, create_researcher
+):
+    AMONG = 3
+    institution = await create_institution()
+    researchers = [
+        await create_researcher(institution=institution) for _ in range(AMONG)
+    ]
+    get_response = client.get(f'/institution/{institution.institution_id}/')
+    assert set(get_response.json()['researchers']) == {
+        r.lattes_id for r in researchers
+    }
+
+
+def test_pick_researchers_is_seedable():
+    pool = [str(i) for i in range(100)]
+    institution_service.sample_random.seed(42)
+    first = institution_service.pick_researchers(pool)
+    institution_service.sample_random.seed(42)
+    assert institution_service.pick_researchers(pool[::-1]) == first
+    assert len(first) == institution_service.SAMPLE_SIZE
+
+
+@pytest.mark.asyncio
+async def test_rebuild_institution_stats(
+    client, conn, create_institution, create_admin_user, login_and_set_cookie
+):
+    institution = await create_institution()
+    await conn.exec('TRUNCATE institution_stats')
+    admin_user = await create_admin_user()
+    authenticated_client = login_and_set_cookie(admin_user)
+
+    response = authenticated_client.post('/institution/stats/rebuild/')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['refreshed'] == 1
+
+    get_response = client.get(f'/institution/{institution.institution_id}/')
+    assert get_response.json()['refreshed_at'] is not None
+
+
 @pytest.mark.asyncio
 async def test_put_institution(
     client,
@@ -122,7 +182,7 @@ async def test_delete_institution(
 async def test_upload_institution_icon(create_institution, client):
     """Testa o upload de uma imagem de ícone para uma instituição."""
     institution = await create_institution()
-    file_content = b'fake image content'
+    file_content = PNG + b'fake image content'
     file_name = 'test_image.png'
 
     response = client.post(
@@ -132,10 +192,123 @@ async def test_upload_institution_icon(create_institution, client):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     upload_dir = Path('simcc/storage/upload')
     final_path = upload_dir / file_name_from_response
     assert final_path.is_file()
+    assert data['content_type'] == 'image/png'
+
+
+@pytest.mark.asyncio
+async def test_upload_institution_icon_after_create(conn, client):
+    """A cached miss must not hide an institution created afterwards."""
+    institution = institution_factory.CreateInstitutionFactory()
+    institution = institution_model.Institution(**institution.model_dump())
+    url = f'/institution/upload/{institution.institution_id}/icon'
+
+    response = client.post(url, files={'file': ('i.png', PNG, 'image/png')})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    await institution_service.post_institution(
+        [institution.model_dump()], conn
+    )
+    response = client.post(url, files={'file': ('i.png', PNG, 'image/png')})
+    assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.asyncio
+async def test_institution_icon_gone_after_delete(conn, client):
+    """A cached icon must not outlive its institution."""
+    institution = institution_factory.CreateInstitutionFactory()
+    institution = institution_model.Institution(**institution.model_dump())
+    await institution_service.post_institution(
+        [institution.model_dump()], conn
+    )
+    url = f'/institution/upload/{institution.institution_id}/icon'
+    client.post(url, files={'file': ('i.png', PNG, 'image/png')})
+    assert client.get(url).status_code == HTTPStatus.OK
+
+    await institution_service.delete_institution(
+        conn, institution.institution_id
+    )
+
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.post(url, files={'file': ('i.png', PNG, 'image/png')})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_upload_institution_icon_rejects_invalid_files(
+    create_institution, client, monkeypatch
+):
+    institution = await create_institution()
+
+    response = client.post(
+        f'/institution/upload/{institution.institution_id}/icon',
+        files={'file': ('fake.png', io.BytesIO(b'not an image'), 'image/png')},
+    )
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+    response = client.post(
+        f'/institution/upload/{institution.institution_id}/icon',
+        files={'file': ('cut.png', io.BytesIO(PNG[:20]), 'image/png')},
+    )
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+    monkeypatch.setattr(media_service, 'MAX_SIZE', len(PNG))
+    response = client.post(
+        f'/institution/upload/{institution.institution_id}/icon',
+        files={'file': ('big.png', io.BytesIO(PNG + b'big'), 'image/png')},
+    )
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert not list(Path(media_service.TMP_DIR).iterdir())
+
+
+@pytest.mark.asyncio
+async def test_get_institution_icon_variants(create_institution, client):
+    institution = await create_institution()
+    url = f'/institution/upload/{institution.institution_id}/icon'
+    image = media_factory.image(size=(600, 300), image_format='JPEG')
+    client.post(
+        url, files={'file': ('a.jpg', io.BytesIO(image), 'image/jpeg')}
+    )
+
+    response = client.get(url, params={'size': 64, 'format': 'webp'})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'image/webp'
+    assert Image.open(io.BytesIO(response.content)).size == (64, 32)
+
+    response = client.get(url, params={'size': 256})
+    assert response.headers['content-type'] == 'image/jpeg'
+    assert Image.open(io.BytesIO(response.content)).size == (256, 128)
+
+    response = client.get(url)
+    assert response.content == image
+
+    response = client.get(url, params={'size': 100})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_get_institution_icon_not_modified(create_institution, client):
+    institution = await create_institution()
+    url = f'/institution/upload/{institution.institution_id}/icon'
+    upload = client.post(
+        url, files={'file': ('a.png', io.BytesIO(PNG), 'image/png')}
+    )
+
+    response = client.get(url)
+    assert response.headers['etag'] == f'"{upload.json()["hash"]}"'
+
+    response = client.get(
+        url, headers={'If-None-Match': response.headers['etag']}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(upload.json()['url'])
+    assert response.status_code == HTTPStatus.OK
+    assert 'immutable' in response.headers['cache-control']
 
 
 @pytest.mark.asyncio
@@ -147,7 +320,7 @@ async def test_delete_institution_icon(create_institution, client):
         files={
             'file': (
                 'image_to_delete.png',
-                io.BytesIO(b'content'),
+                io.BytesIO(PNG + b'content'),
                 'image/png',
             )
         },
@@ -156,7 +329,7 @@ async def test_delete_institution_icon(create_institution, client):
 
     data = upload_response.json()
     uploaded_path = Path(data['path'])
-    physical_file_path = Path('simcc/storage/upload') / uploaded_path.name
+    physical_file_path = Path('simcc/storage/upload') / uploaded_path
     assert physical_file_path.exists()
 
     delete_response = client.delete(
@@ -168,6 +341,51 @@ async def test_delete_institution_icon(create_institution, client):
     assert not physical_file_path.exists()
 
 
+@pytest.mark.asyncio
+async def test_delete_institution_releases_icon(
+    create_institution, client, create_admin_user, login_and_set_cookie
+):
+    admin_user = await create_admin_user()
+    authenticated_client = login_and_set_cookie(admin_user)
+    institution = await create_institution()
+    upload_response = client.post(
+        f'/institution/upload/{institution.institution_id}/icon',
+        files={'file': ('icon.png', io.BytesIO(PNG + b'gone'), 'image/png')},
+    )
+    physical_file_path = (
+        Path('simcc/storage/upload') / upload_response.json()['path']
+    )
+    assert physical_file_path.exists()
+
+    authenticated_client.delete(f'/institution/{institution.institution_id}/')
+
+    assert not physical_file_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_same_icon_is_stored_once(create_institution, client):
+    """Duas instituições com o mesmo ícone compartilham o arquivo."""
+    first = await create_institution()
+    second = await create_institution()
+    paths = []
+    for institution in (first, second):
+        response = client.post(
+            f'/institution/upload/{institution.institution_id}/icon',
+            files={'file': ('logo.png', io.BytesIO(PNG), 'image/png')},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        paths.append(response.json()['path'])
+
+    assert paths[0] == paths[1]
+    physical_file_path = Path('simcc/storage/upload') / paths[0]
+
+    client.delete(f'/institution/upload/{first.institution_id}/icon')
+    assert physical_file_path.exists()
+
+    client.delete(f'/institution/upload/{second.institution_id}/icon')
+    assert not physical_file_path.exists()
+
+
 @pytest.mark.asyncio
 async def test_delete_institution_icon_not_found(create_institution, client):
     """Testa a tentativa de exclusão quando a instituição não tem ícone."""
@@ -184,7 +402,7 @@ async def test_delete_institution_icon_not_found(create_institution, client):
 async def test_upload_institution_cover(create_institution, client):
     """Testa o upload de uma imagem de capa para uma instituição."""
     institution = await create_institution()
-    file_content = b'fake background content'
+    file_content = PNG + b'fake background content'
     file_name = 'background.jpg'
 
     response = client.post(
@@ -194,7 +412,7 @@ async def test_upload_institution_cover(create_institution, client):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     final_path = Path('simcc/storage/upload') / file_name_from_response
     assert final_path.is_file()
 
@@ -208,21 +426,23 @@ async def test_upload_institution_cover_replaces_old_one(
 
     first_response = client.post(
         f'/institution/upload/{institution.institution_id}/cover',
-        files={'file': ('first.png', io.BytesIO(b'first'), 'image/png')},
+        files={'file': ('first.png', io.BytesIO(PNG + b'first'), 'image/png')},
     )
     assert first_response.status_code == HTTPStatus.CREATED
     old_path = Path(first_response.json()['path'])
-    old_physical_path = Path('simcc/storage/upload') / old_path.name
+    old_physical_path = Path('simcc/storage/upload') / old_path
     assert old_physical_path.exists()
 
     second_response = client.post(
         f'/institution/upload/{institution.institution_id}/cover',
-        files={'file': ('second.png', io.BytesIO(b'second'), 'image/png')},
+        files={
+            'file': ('second.png', io.BytesIO(PNG + b'second'), 'image/png')
+        },
     )
 
     assert second_response.status_code == HTTPStatus.CREATED
     new_path = Path(second_response.json()['path'])
-    new_physical_path = Path('simcc/storage/upload') / new_path.name
+    new_physical_path = Path('simcc/storage/upload') / new_path
 
     assert new_physical_path.exists()
     assert not old_physical_path.exists()
@@ -236,13 +456,17 @@ async def test_delete_institution_cover(create_institution, client):
     upload_response = client.post(
         f'/institution/upload/{institution.institution_id}/cover',
         files={
-            'file': ('bg_to_delete.png', io.BytesIO(b'content'), 'image/png')
+            'file': (
+                'bg_to_delete.png',
+                io.BytesIO(PNG + b'content'),
+                'image/png',
+            )
         },
     )
     assert upload_response.status_code == HTTPStatus.CREATED
 
     data = upload_response.json()
-    physical_file_path = Path('simcc/storage/upload') / Path(data['path']).name
+    physical_file_path = Path('simcc/storage/upload') / Path(data['path'])
     assert physical_file_path.exists()
 
     delete_response = client.delete(
@@ -267,3 +491,27 @@ async def test_delete_institution_cover_not_found(create_institution, client):
     )
 
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_post_institution_bulk(
+    client, create_admin_user, login_and_set_cookie
+):
+    AMONG = 3
+    institutions = [
+        institution_factory.CreateInstitutionFactory(acronym=f'INST{i}')
+        for i in range(AMONG)
+    ]
+    institutions_json = [i.model_dump(mode='json') for i in institutions]
+    admin_user = await create_admin_user()
+    authenticated_client = login_and_set_cookie(admin_user)
+
+    response = authenticated_client.post(
+        '/institution/bulk/',
+        json=[*institutions_json, institutions_json[0]],
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    data = response.json()
+    assert data['inserted'] == AMONG
+    assert data['rejected'] == 1
+    assert data['rows'][0]['reason'] == 'duplicate row'
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+
+from simcc.core.api_keys import key_usage
+
+
+@pytest.fixture
+def create_key(client, create_user, get_token):
+    async def _create_key():
+        user = await create_user()
+        headers = {'Authorization': f'Bearer {get_token(user)}'}
+        response = client.post('/key', headers=headers, json={'name': 'ci'})
+        assert response.status_code == HTTPStatus.CREATED
+        return user, headers, response.json()['key']
+
+    return _create_key
+
+
+@pytest.mark.asyncio
+async def test_api_key_authenticates(conn, client, create_key):
+    user, headers, key = await create_key()
+
+    for _ in range(2):
+        response = client.get('/user/my-self/', headers={'X-API-Key': key})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+
+    await key_usage.flush(conn)
+    [listed] = client.get('/key', headers=headers).json()
+    EXPECTED_REQUESTS = 2
+    assert listed['request_count'] == EXPECTED_REQUESTS
+    assert listed['last_used'] is not None
+    assert listed['key'] == key[:12] + '...'
+
+
+@pytest.mark.asyncio
+async def test_api_key_with_wrong_secret_is_refused(client, create_key):
+    _, _, key = await create_key()
+
+    response = client.get(
+        '/user/my-self/', headers={'X-API-Key': key[:12] + 'x' * 31}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_deleted_api_key_is_refused(client, create_key):
+    _, headers, key = await create_key()
+    assert client.get('/user/my-self/', headers={'X-API-Key': key}).is_success
+    [listed] = client.get('/key', headers=headers).json()
+
+    client.delete(f'/key/{listed["key_id"]}', headers=headers)
+
+    response = client.get('/user/my-self/', headers={'X-API-Key': key})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_api_key_of_another_user_is_not_deleted(client, create_key):
+    _, headers, key = await create_key()
+    _, other_headers, _ = await create_key()
+    [listed] = client.get('/key', headers=headers).json()
+
+    response = client.delete(f'/key/{listed["key_id"]}', headers=other_headers)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert client.get('/user/my-self/', headers={'X-API-Key': key}).is_success
+
+
+@pytest.mark.asyncio
+async def test_api_key_cannot_manage_keys(client, create_key):
+    _, headers, key = await create_key()
+    [listed] = client.get('/key', headers=headers).json()
+    key_headers = {'X-API-Key': key}
+
+    response = client.post('/key', headers=key_headers, json={'name': 'x'})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = client.get('/key', headers=key_headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = client.delete(f'/key/{listed["key_id"]}', headers=key_headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
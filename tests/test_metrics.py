@@ -0,0 +1,35 @@
+from http import HTTPStatus
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from simcc.core import metrics
+
+
+def test_metrics_counts_requests_by_route(client):
+    client.get('/')
+
+    response = client.get('/metrics')
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert '# TYPE http_request_duration_seconds histogram' in response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in (
+        response.text
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_merged_across_workers(monkeypatch):
+    server = FakeServer()
+    first, second = metrics.Registry(), metrics.Registry()
+    for worker, registry in (('a:1', first), ('b:2', second)):
+        registry.families = metrics.registry.families
+        registry.inc('http_requests_total', route='/', status=200)
+        registry.gauge_add('websocket_connections')
+        monkeypatch.setattr(metrics, 'WORKER_ID', worker)
+        await registry.flush(FakeAsyncRedis(server=server), ttl=30)
+
+    values = await first.snapshot(FakeAsyncRedis(server=server))
+    text = first.render(values)
+    assert 'http_requests_total{route="/",status="200"} 2' in text
+    assert 'websocket_connections 2' in text
@@ -0,0 +1,159 @@
+import hashlib
+import time
+from http import HTTPStatus
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+from jose.utils import base64url_encode
+
+from simcc import security
+from simcc.core import oauth
+from simcc.core.oauth import KeyCache
+
+ACCESS_TOKEN = 'access-token'
+
+
+class StubIdP:
+    """A local identity provider: a token endpoint and a JWKS endpoint."""
+
+    def __init__(self, issuer: str, audience: str):
+        self.issuer = issuer
+        self.audience = audience
+        self.private_keys: dict[str, bytes] = {}
+        self.kid = None
+        self.jwks_requests = 0
+        self.rotate('key-1')
+
+    def rotate(self, kid: str):
+        private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+        self.private_keys[kid] = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        self.kid = kid
+
+    def id_token(self) -> str:
+        digest = hashlib.sha256(ACCESS_TOKEN.encode()).digest()
+        claims = {
+            'iss': self.issuer,
+            'aud': self.audience,
+            'sub': '0000-0002-1825-0097',
+            'exp': int(time.time()) + 300,
+            'at_hash': base64url_encode(digest[:16]).decode(),
+        }
+        return jwt.encode(
+            claims,
+            self.private_keys[self.kid].decode(),
+            algorithm='RS256',
+            headers={'kid': self.kid},
+        )
+
+    def jwks(self) -> dict:
+        keys = []
+        for kid, pem in self.private_keys.items():
+            key = jwk.construct(pem, 'RS256').public_key().to_dict()
+            keys.append({**key, 'kid': kid})
+        return {'keys': keys}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == 'POST':
+            return httpx.Response(
+                HTTPStatus.OK,
+                json={
+                    'id_token': self.id_token(),
+                    'access_token': ACCESS_TOKEN,
+                },
+            )
+        self.jwks_requests += 1
+        return httpx.Response(
+            HTTPStatus.OK,
+            json=self.jwks(),
+            headers={'Cache-Control': 'public, max-age=600'},
+        )
+
+
+@pytest.fixture
+def use_idp(monkeypatch):
+    def _use_idp(idp: StubIdP):
+        transport = httpx.MockTransport(idp)
+        monkeypatch.setattr(
+            oauth, 'client', httpx.AsyncClient(transport=transport)
+        )
+
+    return _use_idp
+
+
+@pytest.fixture
+def orcid(monkeypatch, use_idp):
+    monkeypatch.setenv('ORCID_CLIENT_ID', 'simcc')
+    monkeypatch.setattr(
+        security, 'orcid_keys', KeyCache(security.ORCID_JWKS_URL)
+    )
+    idp = StubIdP('https://orcid.org', 'simcc')
+    use_idp(idp)
+    return idp
+
+
+@pytest.fixture
+def google(monkeypatch, use_idp):
+    monkeypatch.setenv('GOOGLE_CLIENT_ID', 'simcc.apps.googleusercontent.com')
+    monkeypatch.setattr(
+        security, 'google_keys', KeyCache(security.GOOGLE_CERTS_URL)
+    )
+    idp = StubIdP('accounts.google.com', 'simcc.apps.googleusercontent.com')
+    use_idp(idp)
+    return idp
+
+
+def test_max_age_follows_cache_control():
+    MAX_AGE = 21600
+    cache_control = f'public, max-age={MAX_AGE}, must-revalidate'
+    assert oauth.max_age(cache_control) == MAX_AGE
+    assert oauth.max_age('no-cache') == oauth.MIN_MAX_AGE
+    assert oauth.max_age(None) == oauth.DEFAULT_MAX_AGE
+
+
+@pytest.mark.asyncio
+async def test_orcid_keys_are_fetched_once(orcid):
+    for _ in range(3):
+        claims = await security.validate_orcid_code('code')
+        assert claims['sub'] == '0000-0002-1825-0097'
+
+    assert orcid.jwks_requests == 1
+
+
+@pytest.mark.asyncio
+async def test_orcid_key_rotation_fetches_keys_again(orcid, monkeypatch):
+    await security.validate_orcid_code('code')
+    monkeypatch.setattr(oauth, 'KID_MISS_INTERVAL', 0)
+    orcid.rotate('key-2')
+
+    claims = await security.validate_orcid_code('code')
+
+    EXPECTED_REQUESTS = 2
+    assert claims['iss'] == 'https://orcid.org'
+    assert orcid.jwks_requests == EXPECTED_REQUESTS
+
+
+@pytest.mark.asyncio
+async def test_google_token_is_verified(google):
+    claims = await security.validate_google_token('code')
+
+    assert claims['aud'] == 'simcc.apps.googleusercontent.com'
+
+
+@pytest.mark.asyncio
+async def test_google_token_for_another_client_is_refused(google, monkeypatch):
+    monkeypatch.setenv('GOOGLE_CLIENT_ID', 'another-client')
+
+    with pytest.raises(HTTPException) as error:
+        await security.validate_google_token('code')
+
+    assert error.value.status_code == HTTPStatus.UNAUTHORIZED
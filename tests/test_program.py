@@ -5,6 +5,8 @@ from pathlib import Path
 
 import pytest
 
+from tests.factories.media_factory import PNG
+
 # Supondo que `client` e `create_program` sejam fixtures disponíveis
 # create_program deve retornar um programa de pós-graduação criado no banco de dados.
 
@@ -15,7 +17,7 @@ UPLOAD_DIR = 'simcc/storage/upload'
 async def test_upload_icon_for_program(create_program, client):
     """Testa o upload de um ícone para um programa de pós-graduação."""
     program = await create_program()
-    file_content = b'fake icon content'
+    file_content = PNG + b'fake icon content'
     file_name = 'test_icon.png'
 
     response = client.post(
@@ -25,7 +27,7 @@ async def test_upload_icon_for_program(create_program, client):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     final_path = Path(UPLOAD_DIR) / file_name_from_response
     assert final_path.is_file()
     os.remove(final_path)
@@ -40,7 +42,7 @@ async def test_delete_icon_for_program(create_program, client):
         files={
             'file': (
                 'icon_to_delete.png',
-                io.BytesIO(b'content'),
+                io.BytesIO(PNG + b'content'),
                 'image/png',
             )
         },
@@ -49,7 +51,7 @@ async def test_delete_icon_for_program(create_program, client):
 
     data = upload_response.json()
     uploaded_path = Path(data['path'])
-    physical_file_path = Path(UPLOAD_DIR) / uploaded_path.name
+    physical_file_path = Path(UPLOAD_DIR) / uploaded_path
     assert physical_file_path.exists()
 
     delete_response = client.delete(
@@ -74,7 +76,7 @@ async def test_delete_icon_not_found_for_program(create_program, client):
 async def test_upload_cover_for_program(create_program, client):
     """Testa o upload de uma capa para um programa de pós-graduação."""
     program = await create_program()
-    file_content = b'fake background content'
+    file_content = PNG + b'fake background content'
     file_name = 'background.jpg'
 
     response = client.post(
@@ -84,7 +86,7 @@ async def test_upload_cover_for_program(create_program, client):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     final_path = Path(UPLOAD_DIR) / file_name_from_response
     assert final_path.is_file()
     os.remove(final_path)
@@ -98,21 +100,23 @@ async def test_upload_cover_replaces_old_one_for_program(
     program = await create_program()
     first_response = client.post(
         f'/graduate-program/upload/{program["graduate_program_id"]}/cover',
-        files={'file': ('first.png', io.BytesIO(b'first'), 'image/png')},
+        files={'file': ('first.png', io.BytesIO(PNG + b'first'), 'image/png')},
     )
     assert first_response.status_code == HTTPStatus.CREATED
     old_path = Path(first_response.json()['path'])
-    old_physical_path = Path(UPLOAD_DIR) / old_path.name
+    old_physical_path = Path(UPLOAD_DIR) / old_path
     assert old_physical_path.exists()
 
     second_response = client.post(
         f'/graduate-program/upload/{program["graduate_program_id"]}/cover',
-        files={'file': ('second.png', io.BytesIO(b'second'), 'image/png')},
+        files={
+            'file': ('second.png', io.BytesIO(PNG + b'second'), 'image/png')
+        },
     )
 
     assert second_response.status_code == HTTPStatus.CREATED
     new_path = Path(second_response.json()['path'])
-    new_physical_path = Path(UPLOAD_DIR) / new_path.name
+    new_physical_path = Path(UPLOAD_DIR) / new_path
 
     assert new_physical_path.exists()
     assert not old_physical_path.exists()
@@ -127,13 +131,17 @@ async def test_delete_cover_for_program(create_program, client):
     upload_response = client.post(
         f'/graduate-program/upload/{program["graduate_program_id"]}/cover',
         files={
-            'file': ('bg_to_delete.png', io.BytesIO(b'content'), 'image/png')
+            'file': (
+                'bg_to_delete.png',
+                io.BytesIO(PNG + b'content'),
+                'image/png',
+            )
         },
     )
     assert upload_response.status_code == HTTPStatus.CREATED
 
     data = upload_response.json()
-    physical_file_path = Path(UPLOAD_DIR) / Path(data['path']).name
+    physical_file_path = Path(UPLOAD_DIR) / Path(data['path'])
     assert physical_file_path.exists()
 
     delete_response = client.delete(
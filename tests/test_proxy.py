@@ -0,0 +1,37 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from simcc.app import app
+
+
+@pytest.fixture
+def legacy_calls(client):
+    calls = []
+
+    async def handler(request: httpx.Request):
+        calls.append(request)
+        return httpx.Response(HTTPStatus.OK, json={'legacy': True})
+
+    app.state.proxy_client = httpx.AsyncClient(
+        base_url='http://legacy', transport=httpx.MockTransport(handler)
+    )
+    return calls
+
+
+def test_unmatched_path_is_forwarded(client, legacy_calls):
+    response = client.get('/ResearcherData/Query?name=test')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'legacy': True}
+    assert legacy_calls[0].url.path == '/ResearcherData/Query'
+    assert legacy_calls[0].url.params['name'] == 'test'
+
+
+def test_local_not_found_is_not_forwarded(client, legacy_calls):
+    response = client.delete(f'/institution/upload/{uuid4()}/icon')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert not legacy_calls
@@ -1,6 +1,11 @@
 from http import HTTPStatus
 
 import pytest
+from jwt import decode
+
+from simcc import security
+from simcc.schemas import rbac_model
+from simcc.services import rbac_service
 
 
 @pytest.mark.asyncio
@@ -121,3 +126,79 @@ async def test_post_role_forbidden(client, create_user, login_and_set_cookie):
     role_payload = {'name': 'test_forbidden_role'}
     response = authenticated_client.post('/role/', json=role_payload)
     assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_role_change_invalidates_cached_principal(
+    client, conn, create_role, create_user, login_and_set_cookie
+):
+    user = await create_user()
+    authenticated_client = login_and_set_cookie(user)
+
+    response = authenticated_client.get('/role/')
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+    role = await create_role()
+    await rbac_service.post_user_role(
+        conn,
+        rbac_model.CreateUserRole(role_id=role.role_id, user_id=user.user_id),
+    )
+    permissions = await rbac_service.get_permissions(conn, None)
+    admin = next(p for p in permissions if p['name'] == 'ADMIN')
+    await rbac_service.post_role_permissions(
+        conn,
+        rbac_model.CreateRolePermission(
+            permission_id=admin['id'], role_id=role.role_id
+        ),
+    )
+
+    response = authenticated_client.get('/role/')
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_embedded_claims_are_revoked_on_role_change(
+    client, conn, create_admin_user, get_token, monkeypatch
+):
+    monkeypatch.setattr(security, 'EMBEDDED_CLAIMS', True)
+    admin = await create_admin_user()
+    headers = {'Authorization': f'Bearer {get_token(admin)}'}
+    lookups = []
+    get_user_by_email = security._get_user_by_email
+
+    async def counting_lookup(email, conn):
+        lookups.append(email)
+        return await get_user_by_email(email, conn)
+
+    monkeypatch.setattr(security, '_get_user_by_email', counting_lookup)
+    await security.principal_cache.delete(admin.email)
+
+    response = client.get('/role/', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert not lookups
+
+    for role in client.get('/role/', headers=headers).json():
+        await rbac_service.delete_role(conn, role['role_id'])
+
+    response = client.get('/role/', headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert lookups == [admin.email]
+
+
+@pytest.mark.asyncio
+async def test_embedded_claims_ignore_cached_principal(
+    client, conn, create_admin_user, create_user, monkeypatch
+):
+    monkeypatch.setattr(security, 'EMBEDDED_CLAIMS', True)
+    admin = await create_admin_user()
+    user = await create_user()
+    stale = await security._get_principal(admin.email, conn)
+    await security.principal_cache.set(
+        user.email, {**stale.model_dump(mode='json'), 'email': user.email}
+    )
+
+    token = await security.issue_access_token(conn, user.email)
+
+    claims = decode(token, security.SECRET_KEY, algorithms=['HS256'])
+    assert claims['roles'] == []
+    assert claims['permissions'] == []
@@ -38,6 +38,42 @@ async def test_get_researchers(client, create_researcher, create_institution):
     assert len(response.json()) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_researchers_ndjson(
+    client, create_researcher, create_institution
+):
+    AMONG = 2
+    institution = await create_institution()
+    for _ in range(AMONG):
+        await create_researcher(institution=institution)
+    response = client.get(
+        '/researcher/', headers={'Accept': 'application/x-ndjson'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    lines = response.text.splitlines()
+    assert len(lines) == AMONG
+    researcher_model.ResearcherResponse.model_validate_json(lines[0])
+
+
+@pytest.mark.asyncio
+async def test_search_researchers(
+    client, create_researcher, create_institution
+):
+    institution = await create_institution()
+    await create_researcher(institution=institution, name='João Conceição')
+    await create_researcher(institution=institution, name='Maria Silva')
+
+    response = client.get('/researcher/search/', params={'q': 'conceicao'})
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert [r['name'] for r in data] == ['João Conceição']
+    assert data[0]['score'] > 0
+
+    response = client.get('/researcher/search/', params={'q': 'jo'})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_put_researchers(
     client,
@@ -92,3 +128,27 @@ async def test_delete_researcher(
     # Use a non-authenticated client to verify public access reflects the change
     response = client.get('/researcher/')
     assert len(response.json()) == 0
+
+
+@pytest.mark.asyncio
+async def test_post_researcher_bulk(client, create_institution):
+    AMONG = 3
+    institution = await create_institution()
+    researchers = [
+        researcher_factory.CreateResearcherFactory(
+            institution_id=institution.institution_id,
+        ).model_dump(mode='json')
+        for _ in range(AMONG)
+    ]
+    unknown_institution = researcher_factory.CreateResearcherFactory()
+    researchers.append(unknown_institution.model_dump(mode='json'))
+
+    response = client.post('/researcher/bulk/', json=researchers)
+    assert response.status_code == HTTPStatus.CREATED
+    data = response.json()
+    assert data['inserted'] == AMONG
+    assert data['rejected'] == 1
+    assert data['rows'][-1]['reason'] == 'unknown institution'
+
+    response = client.post('/researcher/bulk/', json=researchers[:AMONG])
+    assert response.json()['updated'] == AMONG
@@ -3,8 +3,14 @@ from http import HTTPStatus
 from pathlib import Path
 
 import pytest
+from pwdlib.hashers.argon2 import Argon2Hasher
 
+from simcc import security
+from simcc.core import passwords
+from simcc.core.database import principal_cache
+from simcc.core.workers import hash_pool
 from tests.factories import user_factory
+from tests.factories.media_factory import PNG
 
 
 @pytest.mark.asyncio
@@ -77,6 +83,40 @@ async def test_get_me(client, create_user, login_and_set_cookie):
     assert response.json().get('user_id') == str(user.user_id)
 
 
+@pytest.mark.asyncio
+async def test_cached_principal_has_no_password(
+    client, create_user, login_and_set_cookie
+):
+    user = await create_user()
+    authenticated_client = login_and_set_cookie(user)
+    response = authenticated_client.get('/user/my-self/')
+    assert response.status_code == HTTPStatus.OK
+
+    principal_cache.clear_local()
+    cached = await principal_cache.get(user.email)
+    assert cached['email'] == user.email
+    assert 'password' not in cached
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_lookup_is_not_overwritten(
+    conn, create_user, monkeypatch
+):
+    user = await create_user()
+    get_user_by_email = security._get_user_by_email
+
+    async def racing(email, conn):
+        loaded = await get_user_by_email(email, conn)
+        await security.invalidate_principals([email])
+        return loaded
+
+    monkeypatch.setattr(security, '_get_user_by_email', racing)
+    await security._get_principal(user.email, conn)
+
+    principal_cache.clear_local()
+    assert await principal_cache.get(user.email) is None
+
+
 @pytest.mark.asyncio
 async def test_put_my_user(client, create_user, login_and_set_cookie):
     user = await create_user()
@@ -91,6 +131,75 @@ async def test_put_my_user(client, create_user, login_and_set_cookie):
     assert response.json().get('updated_at')
 
 
+@pytest.mark.asyncio
+async def test_put_user_without_password_keeps_it(
+    client, conn, create_user, get_token
+):
+    user = await create_user()
+    headers = {'Authorization': f'Bearer {get_token(user)}'}
+    stored = await conn.select(
+        'SELECT password FROM users WHERE user_id = %(user_id)s',
+        {'user_id': user.user_id},
+        one=True,
+    )
+
+    payload = user.model_dump(mode='json', exclude={'password'})
+    response = client.put('/user/', headers=headers, json=payload)
+    assert response.status_code == HTTPStatus.OK
+
+    assert stored == await conn.select(
+        'SELECT password FROM users WHERE user_id = %(user_id)s',
+        {'user_id': user.user_id},
+        one=True,
+    )
+    assert get_token(user)
+
+
+@pytest.mark.asyncio
+async def test_login_upgrades_outdated_password_hash(
+    client, conn, create_user
+):
+    user = await create_user()
+    outdated = Argon2Hasher(time_cost=1, memory_cost=19 * 1024).hash(
+        user.password
+    )
+    params = {'user_id': user.user_id, 'password': outdated}
+    await conn.exec(
+        'UPDATE users SET password = %(password)s WHERE user_id = %(user_id)s',
+        params,
+    )
+
+    response = client.post(
+        '/login', data={'username': user.email, 'password': user.password}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    stored = await conn.select(
+        'SELECT password FROM users WHERE user_id = %(user_id)s',
+        params,
+        one=True,
+    )
+    hasher = passwords.password_hash.current_hasher
+    assert stored['password'] != outdated
+    assert not hasher.check_needs_rehash(stored['password'])
+
+
+@pytest.mark.asyncio
+async def test_login_when_hashing_pool_is_full(
+    client, create_user, monkeypatch
+):
+    user = await create_user()
+    monkeypatch.setattr(hash_pool, 'max_queued', 0)
+    monkeypatch.setattr(hash_pool, 'pending', hash_pool.max_workers)
+
+    response = client.post(
+        '/login', data={'username': user.email, 'password': user.password}
+    )
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers['retry-after'] == '1'
+
+
 @pytest.mark.asyncio
 async def test_put_user_by_other_user_forbidden(
     client, create_user, login_and_set_cookie
@@ -187,7 +296,7 @@ async def test_upload_icon(create_user, login_and_set_cookie):
     """Testa o upload de uma imagem de ícone para o usuário."""
     user = await create_user()
     client = login_and_set_cookie(user)
-    file_content = b'fake image content'
+    file_content = PNG + b'fake image content'
     file_name = 'test_image.png'
 
     response = client.post(
@@ -197,11 +306,39 @@ async def test_upload_icon(create_user, login_and_set_cookie):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     upload_dir = Path('simcc/storage/upload')
     final_path = upload_dir / file_name_from_response
     assert final_path.is_file()
 
+    response = client.get('/user/my-self/')
+    assert response.json()['icon_url'] == data['url']
+    assert data['url'].endswith(data['path'])
+
+
+@pytest.mark.asyncio
+async def test_get_icon_batch(client, create_user, login_and_set_cookie):
+    """Testa a busca dos ícones de vários usuários de uma só vez."""
+    user = await create_user()
+    other_user = await create_user()
+    response = login_and_set_cookie(user).post(
+        '/user/upload/icon',
+        files={'file': ('icon.png', io.BytesIO(PNG), 'image/png')},
+    )
+    icon = response.json()
+
+    ids = [str(user.user_id), str(other_user.user_id)]
+    response = client.get('/user/upload/icon', params={'ids': ids})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {ids[0]: icon['url'], ids[1]: None}
+
+    response = client.get(
+        '/user/upload/icon', params={'ids': ids, 'size': 64, 'inline': True}
+    )
+    assert response.json()[ids[0]].startswith('data:image/png;base64,')
+    assert response.json()[ids[1]] is None
+
 
 @pytest.mark.asyncio
 async def test_delete_icon(create_user, login_and_set_cookie):
@@ -214,7 +351,7 @@ async def test_delete_icon(create_user, login_and_set_cookie):
         files={
             'file': (
                 'image_to_delete.png',
-                io.BytesIO(b'content'),
+                io.BytesIO(PNG + b'content'),
                 'image/png',
             )
         },
@@ -223,7 +360,7 @@ async def test_delete_icon(create_user, login_and_set_cookie):
 
     data = upload_response.json()
     uploaded_path = Path(data['path'])
-    physical_file_path = Path('simcc/storage/upload') / uploaded_path.name
+    physical_file_path = Path('simcc/storage/upload') / uploaded_path
     assert physical_file_path.exists()
 
     delete_response = client.delete('/user/upload/icon')
@@ -249,7 +386,7 @@ async def test_upload_cover(create_user, login_and_set_cookie):
     """Testa o upload de uma imagem de capa para o usuário."""
     user = await create_user()
     client = login_and_set_cookie(user)
-    file_content = b'fake background content'
+    file_content = PNG + b'fake background content'
     file_name = 'background.jpg'
 
     response = client.post(
@@ -259,7 +396,7 @@ async def test_upload_cover(create_user, login_and_set_cookie):
 
     assert response.status_code == HTTPStatus.CREATED
     data = response.json()
-    file_name_from_response = Path(data['path']).name
+    file_name_from_response = Path(data['path'])
     final_path = Path('simcc/storage/upload') / file_name_from_response
     assert final_path.is_file()
 
@@ -274,21 +411,23 @@ async def test_upload_cover_replaces_old_one(
 
     first_response = client.post(
         '/user/upload/cover',
-        files={'file': ('first.png', io.BytesIO(b'first'), 'image/png')},
+        files={'file': ('first.png', io.BytesIO(PNG + b'first'), 'image/png')},
     )
     assert first_response.status_code == HTTPStatus.CREATED
     old_path = Path(first_response.json()['path'])
-    old_physical_path = Path('simcc/storage/upload') / old_path.name
+    old_physical_path = Path('simcc/storage/upload') / old_path
     assert old_physical_path.exists()
 
     second_response = client.post(
         '/user/upload/cover',
-        files={'file': ('second.png', io.BytesIO(b'second'), 'image/png')},
+        files={
+            'file': ('second.png', io.BytesIO(PNG + b'second'), 'image/png')
+        },
     )
 
     assert second_response.status_code == HTTPStatus.CREATED
     new_path = Path(second_response.json()['path'])
-    new_physical_path = Path('simcc/storage/upload') / new_path.name
+    new_physical_path = Path('simcc/storage/upload') / new_path
 
     assert new_physical_path.exists()
     assert not old_physical_path.exists()
@@ -303,13 +442,17 @@ async def test_delete_cover(create_user, login_and_set_cookie):
     upload_response = client.post(
         '/user/upload/cover',
         files={
-            'file': ('bg_to_delete.png', io.BytesIO(b'content'), 'image/png')
+            'file': (
+                'bg_to_delete.png',
+                io.BytesIO(PNG + b'content'),
+                'image/png',
+            )
         },
     )
     assert upload_response.status_code == HTTPStatus.CREATED
 
     data = upload_response.json()
-    physical_file_path = Path('simcc/storage/upload') / Path(data['path']).name
+    physical_file_path = Path('simcc/storage/upload') / Path(data['path'])
     assert physical_file_path.exists()
 
     delete_response = client.delete('/user/upload/cover')